@@ -0,0 +1,229 @@
+const path = require('path');
+const fs = require('fs');
+const crypto = require('crypto');
+
+// HotkeyService Class
+// Hotkeys are indexed by id and by key combination, so validation is O(1)
+// and conflict reports are O(n); changes are written to disk asynchronously,
+// coalescing bursts of edits into one atomic write.
+class HotkeyService {
+  constructor(dataDir = path.join(__dirname, 'data'), saveDelayMs = Number(process.env.HOTKEY_SAVE_DELAY_MS || 200)) {
+    this.dataDir = dataDir;
+    this.hotkeyFile = path.join(this.dataDir, 'hotkeys.json');
+    this.saveDelayMs = saveDelayMs;
+    this.saveTimer = null;
+    this.saving = null;
+    this.dirty = false;
+    this.ensureDataDirectory();
+    this.loadHotkeys();
+  }
+
+  generateId() {
+    return crypto.randomUUID();
+  }
+
+  // Modifiers may be missing or partial in requests; absent means not held.
+  // keyCode keeps its type, so 65 and "65" stay different keys.
+  static comboKey(hotkey) {
+    const m = hotkey.modifiers || {};
+    return `${typeof hotkey.keyCode}:${hotkey.keyCode}|${m.ctrl ? 1 : 0}${m.alt ? 1 : 0}${m.shift ? 1 : 0}`;
+  }
+
+  // Only hotkeys explicitly enabled can conflict
+  static isEnabled(hotkey) {
+    return Boolean(hotkey.enabled);
+  }
+
+  ensureDataDirectory() {
+    if (!fs.existsSync(this.dataDir)) {
+      fs.mkdirSync(this.dataDir, { recursive: true });
+    }
+  }
+
+  loadHotkeys() {
+    let hotkeys = [];
+    try {
+      if (fs.existsSync(this.hotkeyFile)) {
+        hotkeys = JSON.parse(fs.readFileSync(this.hotkeyFile, 'utf8')).hotkeys || [];
+      } else {
+        fs.writeFileSync(this.hotkeyFile, JSON.stringify({ hotkeys: [] }, null, 2));
+      }
+    } catch (error) {
+      console.error('Error loading hotkeys:', error);
+    }
+
+    // id -> hotkey, in creation order; combo key -> Set of enabled hotkeys
+    this.byId = new Map();
+    this.byCombo = new Map();
+    for (const hotkey of hotkeys) {
+      this.byId.set(hotkey.id, hotkey);
+      this.index(hotkey);
+    }
+  }
+
+  index(hotkey) {
+    if (!HotkeyService.isEnabled(hotkey)) return;
+    const key = HotkeyService.comboKey(hotkey);
+    if (!this.byCombo.has(key)) {
+      this.byCombo.set(key, new Set());
+    }
+    this.byCombo.get(key).add(hotkey);
+  }
+
+  unindex(hotkey) {
+    const key = HotkeyService.comboKey(hotkey);
+    const bucket = this.byCombo.get(key);
+    if (bucket) {
+      bucket.delete(hotkey);
+      if (bucket.size === 0) {
+        this.byCombo.delete(key);
+      }
+    }
+  }
+
+  // Debounced: the write happens saveDelayMs after the last change
+  saveHotkeys() {
+    this.dirty = true;
+    clearTimeout(this.saveTimer);
+    this.saveTimer = setTimeout(() => this.flush(), this.saveDelayMs);
+  }
+
+  // Write pending changes now; resolves once they are on disk
+  async flush() {
+    clearTimeout(this.saveTimer);
+    this.saveTimer = null;
+    while (this.saving) {
+      await this.saving;
+    }
+    if (!this.dirty) return;
+    this.dirty = false;
+
+    const data = JSON.stringify({ hotkeys: this.getAllHotkeys() }, null, 2);
+    const tmpFile = `${this.hotkeyFile}.tmp`;
+    this.saving = fs.promises.writeFile(tmpFile, data)
+      .then(() => fs.promises.rename(tmpFile, this.hotkeyFile))
+      .catch(error => {
+        console.error('Error saving hotkeys:', error);
+        // Retry with the next change
+        this.dirty = true;
+      })
+      .finally(() => {
+        this.saving = null;
+      });
+    await this.saving;
+  }
+
+  getAllHotkeys() {
+    return Array.from(this.byId.values());
+  }
+
+  getHotkeyById(id) {
+    return this.byId.get(id);
+  }
+
+  createHotkey(hotkeyData) {
+    const hotkey = {
+      id: this.generateId(),
+      name: hotkeyData.name || 'Unnamed Hotkey',
+      soundFile: hotkeyData.soundFile,
+      keyCode: hotkeyData.keyCode,
+      modifiers: {
+        ctrl: hotkeyData.modifiers?.ctrl || false,
+        alt: hotkeyData.modifiers?.alt || false,
+        shift: hotkeyData.modifiers?.shift || false
+      },
+      enabled: hotkeyData.enabled !== undefined ? hotkeyData.enabled : true,
+      createdAt: new Date().toISOString(),
+      updatedAt: new Date().toISOString()
+    };
+
+    const validation = this.validateHotkey(hotkey);
+    if (!validation.valid) {
+      throw new Error(`Hotkey conflict with: ${validation.conflicts.map(c => c.name).join(', ')}`);
+    }
+
+    this.byId.set(hotkey.id, hotkey);
+    this.index(hotkey);
+    this.saveHotkeys();
+    return hotkey;
+  }
+
+  updateHotkey(id, updateData) {
+    const current = this.byId.get(id);
+    if (!current) {
+      throw new Error('Hotkey not found');
+    }
+
+    const updatedHotkey = {
+      ...current,
+      ...updateData,
+      id,
+      updatedAt: new Date().toISOString()
+    };
+
+    const validation = this.validateHotkey(updatedHotkey);
+    if (!validation.valid) {
+      throw new Error(`Hotkey conflict with: ${validation.conflicts.map(c => c.name).join(', ')}`);
+    }
+
+    this.unindex(current);
+    this.byId.set(id, updatedHotkey);
+    this.index(updatedHotkey);
+    this.saveHotkeys();
+    return updatedHotkey;
+  }
+
+  deleteHotkey(id) {
+    const deleted = this.byId.get(id);
+    if (!deleted) {
+      throw new Error('Hotkey not found');
+    }
+
+    this.byId.delete(id);
+    this.unindex(deleted);
+    this.saveHotkeys();
+    return deleted;
+  }
+
+  validateHotkey(hotkey) {
+    const bucket = HotkeyService.isEnabled(hotkey) && this.byCombo.get(HotkeyService.comboKey(hotkey));
+    const conflicts = bucket ? Array.from(bucket).filter(h => h.id !== hotkey.id) : [];
+
+    return {
+      valid: conflicts.length === 0,
+      conflicts: conflicts
+    };
+  }
+
+  getConflicts() {
+    const conflicts = [];
+
+    // Only combinations bound more than once produce pairs
+    for (const bucket of this.byCombo.values()) {
+      if (bucket.size < 2) continue;
+      const enabled = Array.from(bucket);
+      for (let i = 0; i < enabled.length; i++) {
+        for (let j = i + 1; j < enabled.length; j++) {
+          conflicts.push([enabled[i], enabled[j]]);
+        }
+      }
+    }
+
+    return conflicts;
+  }
+
+  findBySoundFile(soundFile) {
+    return this.getAllHotkeys().filter(h => h.soundFile === soundFile);
+  }
+}
+
+// Flush pending hotkey changes, then exit, on the first of these signals
+function flushOnSignals(hotkeyService, signals = ['SIGINT', 'SIGTERM'], exit = code => process.exit(code)) {
+  for (const signal of signals) {
+    process.once(signal, () => {
+      hotkeyService.flush().finally(() => exit(0));
+    });
+  }
+}
+
+module.exports = { HotkeyService, flushOnSignals };
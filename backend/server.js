@@ -7,6 +7,8 @@ const path = require('path');
 const fs = require('fs');
 const crypto = require('crypto');
 require('dotenv').config();
+const { WorkerRegistry } = require('./workers');
+const { HotkeyService, flushOnSignals } = require('./hotkeys');
 
 const app = express();
 const server = http.createServer(app);
@@ -20,157 +22,181 @@ const io = socketIo(server, {
 const PORT = process.env.PORT || 3001;
 const SOUNDS_DIR = process.env.SOUNDS_DIR || '../sounds';
 
-// HotkeyService Class
-class HotkeyService {
-  constructor() {
-    this.dataDir = path.join(__dirname, 'data');
-    this.hotkeyFile = path.join(this.dataDir, 'hotkeys.json');
-    this.ensureDataDirectory();
-    this.loadHotkeys();
+// Socket.io rooms. Each bot worker joins BOT_ROOM and its own worker room;
+// dashboards join only the status streams they subscribe to.
+const BOT_ROOM = 'bots';
+const STREAMS = ['bot_status', 'sounds', 'hotkeys', 'plays'];
+const workerRoom = (workerId) => `worker:${workerId}`;
+const streamRoom = (stream) => `stream:${stream}`;
+
+const workerRegistry = new WorkerRegistry();
+
+// Tell every worker which guilds it now owns
+function publishOwnership() {
+  for (const workerId of workerRegistry.workers.keys()) {
+    io.to(workerRoom(workerId)).emit('ownership', { guild_ids: workerRegistry.ownedBy(workerId) });
   }
+}
 
-  generateId() {
-    return crypto.randomUUID();
+// Send a command to the worker owning the guild. Without a guild, target the
+// first guild with a voice connection, mirroring the bot's own fallback.
+// A guild no registered worker is in gets no command: any other worker would
+// have no voice connection there. Returns whether a worker was sent it.
+function emitToBots(event, data, guildId) {
+  const target = guildId || Object.keys(botStatus.voice_connections)[0];
+  const workerId = target ? workerRegistry.ownerOf(target) : null;
+
+  if (!workerId) {
+    console.warn(`No bot worker serves guild ${target || '(none)'}, dropping ${event}`);
+    return false;
   }
+  io.to(workerRoom(workerId)).emit(event, guildId ? data : { ...data, guild_id: target });
+  return true;
+}
 
-  ensureDataDirectory() {
-    if (!fs.existsSync(this.dataDir)) {
-      fs.mkdirSync(this.dataDir, { recursive: true });
+// Split a multi-guild command by owning worker, one emit per worker. Guilds
+// without an owner are dropped; returns whether any worker was sent a share.
+function emitPlayToGuilds(event, data) {
+  if (!data.guild_ids.length) {
+    return emitToBots(event, data, null);
+  }
+  const byWorker = new Map();
+  const unowned = [];
+  for (const guildId of data.guild_ids) {
+    const workerId = workerRegistry.ownerOf(guildId);
+    if (!workerId) {
+      unowned.push(guildId);
+      continue;
     }
+    if (!byWorker.has(workerId)) {
+      byWorker.set(workerId, []);
+    }
+    byWorker.get(workerId).push(guildId);
+  }
+  if (unowned.length) {
+    console.warn(`No bot worker serves guilds ${unowned.join(', ')}, dropping them from ${event}`);
   }
+  for (const [workerId, guildIds] of byWorker) {
+    io.to(workerRoom(workerId)).emit(event, { ...data, guild_ids: guildIds });
+  }
+  return byWorker.size > 0;
+}
+
+function emitToStream(stream, event, data) {
+  io.to(streamRoom(stream)).emit(event, data);
+}
 
-  loadHotkeys() {
+// SoundLibrary Class
+// Caches the sound listing in memory, merged with metadata computed by the bot
+class SoundLibrary {
+  constructor(soundsPath) {
+    this.soundsPath = soundsPath;
+    this.dataDir = path.join(__dirname, 'data');
+    this.metadataFile = path.join(this.dataDir, 'sound-metadata.json');
+    this.listing = null;
+    this.etag = null;
+    this.building = null;
+    this.loadMetadata();
+    this.watch();
+  }
+
+  loadMetadata() {
     try {
-      if (fs.existsSync(this.hotkeyFile)) {
-        const data = fs.readFileSync(this.hotkeyFile, 'utf8');
-        this.hotkeys = JSON.parse(data);
-      } else {
-        this.hotkeys = { hotkeys: [] };
-        this.saveHotkeys();
-      }
+      this.metadata = fs.existsSync(this.metadataFile)
+        ? JSON.parse(fs.readFileSync(this.metadataFile, 'utf8'))
+        : {};
     } catch (error) {
-      console.error('Error loading hotkeys:', error);
-      this.hotkeys = { hotkeys: [] };
+      console.error('Error loading sound metadata:', error);
+      this.metadata = {};
     }
   }
 
-  saveHotkeys() {
+  async saveMetadata() {
+    const tmpFile = `${this.metadataFile}.tmp`;
     try {
-      fs.writeFileSync(this.hotkeyFile, JSON.stringify(this.hotkeys, null, 2));
+      await fs.promises.mkdir(this.dataDir, { recursive: true });
+      await fs.promises.writeFile(tmpFile, JSON.stringify(this.metadata));
+      await fs.promises.rename(tmpFile, this.metadataFile);
     } catch (error) {
-      console.error('Error saving hotkeys:', error);
-      throw error;
+      console.error('Error saving sound metadata:', error);
     }
   }
 
-  getAllHotkeys() {
-    return this.hotkeys.hotkeys;
+  watch() {
+    // Pick up files copied into the directory outside the upload API
+    try {
+      fs.watch(this.soundsPath, () => this.invalidate());
+    } catch (error) {
+      // Directory may not exist yet; uploads and deletes still invalidate
+    }
   }
 
-  getHotkeyById(id) {
-    return this.hotkeys.hotkeys.find(h => h.id === id);
+  invalidate() {
+    this.listing = null;
+    this.etag = null;
   }
 
-  createHotkey(hotkeyData) {
-    const validation = this.validateHotkey(hotkeyData);
-    if (!validation.valid) {
-      throw new Error(`Hotkey conflict with: ${validation.conflicts.map(c => c.name).join(', ')}`);
-    }
-
-    const hotkey = {
-      id: this.generateId(),
-      name: hotkeyData.name || 'Unnamed Hotkey',
-      soundFile: hotkeyData.soundFile,
-      keyCode: hotkeyData.keyCode,
-      modifiers: {
-        ctrl: hotkeyData.modifiers?.ctrl || false,
-        alt: hotkeyData.modifiers?.alt || false,
-        shift: hotkeyData.modifiers?.shift || false
-      },
-      enabled: hotkeyData.enabled !== undefined ? hotkeyData.enabled : true,
-      createdAt: new Date().toISOString(),
-      updatedAt: new Date().toISOString()
-    };
-
-    this.hotkeys.hotkeys.push(hotkey);
-    this.saveHotkeys();
-    return hotkey;
-  }
-
-  updateHotkey(id, updateData) {
-    const index = this.hotkeys.hotkeys.findIndex(h => h.id === id);
-    if (index === -1) {
-      throw new Error('Hotkey not found');
-    }
-
-    const updatedHotkey = {
-      ...this.hotkeys.hotkeys[index],
-      ...updateData,
-      id,
-      updatedAt: new Date().toISOString()
-    };
-
-    const validation = this.validateHotkey(updatedHotkey);
-    if (!validation.valid) {
-      throw new Error(`Hotkey conflict with: ${validation.conflicts.map(c => c.name).join(', ')}`);
-    }
-
-    this.hotkeys.hotkeys[index] = updatedHotkey;
-    this.saveHotkeys();
-    return updatedHotkey;
+  setMetadata(sounds) {
+    Object.assign(this.metadata, sounds);
+    this.invalidate();
+    return this.saveMetadata();
   }
 
-  deleteHotkey(id) {
-    const index = this.hotkeys.hotkeys.findIndex(h => h.id === id);
-    if (index === -1) {
-      throw new Error('Hotkey not found');
+  removeMetadata(filename) {
+    if (this.metadata[filename]) {
+      delete this.metadata[filename];
+      this.saveMetadata();
     }
-
-    const deleted = this.hotkeys.hotkeys.splice(index, 1)[0];
-    this.saveHotkeys();
-    return deleted;
+    this.invalidate();
   }
 
-  validateHotkey(hotkey) {
-    const conflicts = this.hotkeys.hotkeys.filter(h =>
-      h.keyCode === hotkey.keyCode &&
-      JSON.stringify(h.modifiers) === JSON.stringify(hotkey.modifiers) &&
-      h.id !== hotkey.id &&
-      h.enabled && hotkey.enabled
-    );
-
-    return {
-      valid: conflicts.length === 0,
-      conflicts: conflicts
-    };
+  async getListing() {
+    if (this.listing) {
+      return { listing: this.listing, etag: this.etag };
+    }
+    if (!this.building) {
+      this.building = this.build().finally(() => {
+        this.building = null;
+      });
+    }
+    return this.building;
   }
 
-  getConflicts() {
-    const conflicts = [];
-    const enabled = this.hotkeys.hotkeys.filter(h => h.enabled);
-
-    for (let i = 0; i < enabled.length; i++) {
-      for (let j = i + 1; j < enabled.length; j++) {
-        const h1 = enabled[i];
-        const h2 = enabled[j];
-
-        if (h1.keyCode === h2.keyCode &&
-            JSON.stringify(h1.modifiers) === JSON.stringify(h2.modifiers)) {
-          conflicts.push([h1, h2]);
-        }
+  async build() {
+    let files;
+    try {
+      files = await fs.promises.readdir(this.soundsPath);
+    } catch (error) {
+      if (error.code === 'ENOENT') {
+        files = [];
+      } else {
+        throw error;
       }
     }
 
-    return conflicts;
-  }
+    const audioFiles = files.filter(file => {
+      const ext = path.extname(file).toLowerCase();
+      return ['.mp3', '.wav', '.ogg', '.m4a'].includes(ext);
+    });
+    const stats = await Promise.all(audioFiles.map(file => fs.promises.stat(path.join(this.soundsPath, file))));
+
+    const listing = audioFiles.map((file, i) => ({
+      name: path.parse(file).name,
+      filename: file,
+      path: `/sounds/${file}`,
+      size: stats[i].size,
+      ...(this.metadata[file] ? { metadata: this.metadata[file] } : {})
+    }));
 
-  findBySoundFile(soundFile) {
-    return this.hotkeys.hotkeys.filter(h => h.soundFile === soundFile);
+    this.listing = listing;
+    this.etag = `"${crypto.createHash('sha1').update(JSON.stringify(listing)).digest('hex')}"`;
+    return { listing, etag: this.etag };
   }
 }
 
 // Initialize hotkey service
 const hotkeyService = new HotkeyService();
+const soundLibrary = new SoundLibrary(path.join(__dirname, SOUNDS_DIR));
 
 // Middleware
 app.use(cors());
@@ -212,9 +238,60 @@ const upload = multer({
 let botStatus = {
   connected: false,
   guilds: [],
-  voice_connections: {}
+  voice_connections: {},
+  roster_version: 0,
+  workers: []
 };
 
+// Per-worker state. Single-bot deployments report as the 'default' worker.
+// rosters: workerId -> { version, guilds: Map(id -> guild) }
+const rosters = new Map();
+// Paginated roster syncs in progress: workerId -> { version, pagesReceived, totalPages, guilds }
+const pendingRosterSyncs = new Map();
+const voiceByWorker = new Map();
+
+const workerIdOf = (body) => body.worker_id || 'default';
+
+function getRoster(workerId) {
+  if (!rosters.has(workerId)) {
+    rosters.set(workerId, { version: 0, guilds: new Map() });
+  }
+  return rosters.get(workerId);
+}
+
+// Rebuild the merged views in botStatus after a worker's state changed
+function refreshBotStatus() {
+  const guilds = new Map();
+  let version = 0;
+  for (const roster of rosters.values()) {
+    for (const [id, guild] of roster.guilds) {
+      guilds.set(id, guild);
+    }
+    version = Math.max(version, roster.version);
+  }
+  botStatus.guilds = Array.from(guilds.values());
+  botStatus.roster_version = version;
+  botStatus.voice_connections = Object.assign({}, ...voiceByWorker.values());
+  botStatus.workers = workerRegistry.summary();
+}
+
+// Guilds follow the worker holding their voice session, so a reported
+// connection can move ownership
+function setWorkerVoice(workerId, voiceConnections) {
+  voiceByWorker.set(workerId, voiceConnections);
+  if (workerRegistry.setVoice(workerId, Object.keys(voiceConnections))) {
+    publishOwnership();
+  }
+}
+
+function applyGuildEvent(index, type, guild) {
+  if (type === 'guild_remove') {
+    index.delete(guild.id);
+  } else {
+    index.set(guild.id, { ...index.get(guild.id), ...guild });
+  }
+}
+
 // Existing API Routes
 app.get('/api/status', (req, res) => {
   res.json({ status: 'running', bot: botStatus });
@@ -222,64 +299,133 @@ app.get('/api/status', (req, res) => {
 
 app.post('/api/bot/ready', (req, res) => {
   const botData = req.body;
+  const workerId = workerIdOf(botData);
 
   // Update bot status with received data
   botStatus.connected = true;
   if (botData.guilds) {
-    botStatus.guilds = botData.guilds;
+    // Single-payload roster from bots that don't page their sync
+    getRoster(workerId).guilds = new Map(botData.guilds.map(g => [g.id, g]));
   }
   if (botData.voice_connections) {
-    botStatus.voice_connections = botData.voice_connections;
+    setWorkerVoice(workerId, botData.voice_connections);
   }
+  refreshBotStatus();
 
-  console.log(`Discord bot connected - ${botStatus.guilds?.length || 0} guilds, ${Object.keys(botStatus.voice_connections || {}).length} voice connections`);
+  console.log(`Discord bot ${workerId} connected - ${botData.guild_count ?? botData.guilds?.length ?? 0} guilds, ${Object.keys(botData.voice_connections || {}).length} voice connections`);
 
   // Emit updated status to all connected clients
-  io.emit('bot_status', botStatus);
+  emitToStream('bot_status', 'bot_status', botStatus);
   res.json({ success: true });
 });
 
+// One page of a worker's initial guild roster; swapped in once all pages arrive
+app.post('/api/bot/guilds/sync', (req, res) => {
+  const { version, page, total_pages, guilds } = req.body;
+  const workerId = workerIdOf(req.body);
+
+  if (!Number.isInteger(version) || !Number.isInteger(page) || !Number.isInteger(total_pages) || !Array.isArray(guilds)) {
+    return res.status(400).json({ error: 'version, page, total_pages and guilds are required' });
+  }
+
+  const roster = getRoster(workerId);
+  let pending = pendingRosterSyncs.get(workerId);
+  if (!pending || pending.version !== version) {
+    if (version <= roster.version) {
+      return res.status(409).json({ error: 'Stale roster version', roster_version: roster.version });
+    }
+    pending = { version, pagesReceived: new Set(), totalPages: total_pages, guilds: new Map() };
+    pendingRosterSyncs.set(workerId, pending);
+  }
+  for (const guild of guilds) {
+    pending.guilds.set(guild.id, guild);
+  }
+  pending.pagesReceived.add(page);
+
+  if (pending.pagesReceived.size >= pending.totalPages) {
+    roster.guilds = pending.guilds;
+    // Events that arrived mid-sync were applied to the staged roster too
+    roster.version = Math.max(roster.version, version);
+    pendingRosterSyncs.delete(workerId);
+    refreshBotStatus();
+
+    console.log(`Guild roster synced for ${workerId}: ${roster.guilds.size} guilds (version ${version})`);
+    emitToStream('bot_status', 'bot_status', botStatus);
+  }
+
+  res.json({ success: true });
+});
+
+// Incremental guild_join / guild_remove / guild_update from a worker
+app.post('/api/bot/guilds/event', (req, res) => {
+  const { type, version, guild } = req.body;
+  const workerId = workerIdOf(req.body);
+
+  if (!['guild_join', 'guild_remove', 'guild_update'].includes(type) || !guild?.id || !Number.isInteger(version)) {
+    return res.status(400).json({ error: 'Invalid guild event' });
+  }
+
+  const roster = getRoster(workerId);
+  if (version <= roster.version) {
+    // Out of order or replayed; the roster already reflects something newer
+    return res.json({ success: true, applied: false });
+  }
+
+  applyGuildEvent(roster.guilds, type, guild);
+  const pending = pendingRosterSyncs.get(workerId);
+  if (pending) {
+    applyGuildEvent(pending.guilds, type, guild);
+  }
+  roster.version = version;
+  refreshBotStatus();
+
+  emitToStream('bot_status', 'guild_event', { type, guild, version });
+  res.json({ success: true, applied: true });
+});
+
 app.post('/api/bot/voice-status', (req, res) => {
   const { voice_connections } = req.body;
 
   if (voice_connections) {
-    botStatus.voice_connections = voice_connections;
-    console.log(`Voice connections updated: ${Object.keys(voice_connections).length} active`);
+    setWorkerVoice(workerIdOf(req.body), voice_connections);
+    refreshBotStatus();
+    console.log(`Voice connections updated: ${Object.keys(botStatus.voice_connections).length} active`);
 
     // Emit updated status to all connected clients
-    io.emit('bot_status', botStatus);
+    emitToStream('bot_status', 'bot_status', botStatus);
   }
 
   res.json({ success: true });
 });
 
-app.get('/api/sounds', (req, res) => {
-  const soundsPath = path.join(__dirname, SOUNDS_DIR);
-
-  if (!fs.existsSync(soundsPath)) {
-    return res.json([]);
-  }
-
+app.get('/api/sounds', async (req, res) => {
   try {
-    const files = fs.readdirSync(soundsPath)
-      .filter(file => {
-        const ext = path.extname(file).toLowerCase();
-        return ['.mp3', '.wav', '.ogg', '.m4a'].includes(ext);
-      })
-      .map(file => ({
-        name: path.parse(file).name,
-        filename: file,
-        path: `/sounds/${file}`,
-        size: fs.statSync(path.join(soundsPath, file)).size
-      }));
-
-    res.json(files);
+    const { listing, etag } = await soundLibrary.getListing();
+
+    res.set('ETag', etag);
+    if (req.fresh) {
+      return res.status(304).end();
+    }
+    res.json(listing);
   } catch (error) {
     console.error('Error reading sounds directory:', error);
     res.status(500).json({ error: 'Failed to read sounds directory' });
   }
 });
 
+// Duration, layout, loudness and peaks computed by the bot at ingest
+app.post('/api/bot/sound-metadata', async (req, res) => {
+  const { sounds } = req.body;
+
+  if (!sounds || typeof sounds !== 'object') {
+    return res.status(400).json({ error: 'sounds object required' });
+  }
+
+  await soundLibrary.setMetadata(sounds);
+  emitToStream('sounds', 'sound_metadata', sounds);
+  res.json({ success: true, count: Object.keys(sounds).length });
+});
+
 app.post('/api/sounds/upload', upload.single('sound'), (req, res) => {
   if (!req.file) {
     return res.status(400).json({ error: 'No file uploaded' });
@@ -292,27 +438,92 @@ app.post('/api/sounds/upload', upload.single('sound'), (req, res) => {
     size: req.file.size
   };
 
-  // Notify all connected clients about new sound
-  io.emit('sound_added', soundInfo);
+  soundLibrary.invalidate();
+
+  // Notify dashboards and bots (which fingerprint it) about new sound
+  io.to([streamRoom('sounds'), BOT_ROOM]).emit('sound_added', soundInfo);
 
   res.json({ success: true, sound: soundInfo });
 });
 
+// Files copied into sounds/ by a bulk import (python -m bot.importer), announced in one batch
+app.post('/api/sounds/imported', async (req, res) => {
+  const { sounds } = req.body;
+
+  if (!Array.isArray(sounds) || !sounds.every(f => typeof f === 'string')) {
+    return res.status(400).json({ error: 'sounds array of filenames required' });
+  }
+
+  const soundsPath = path.join(__dirname, SOUNDS_DIR);
+  const audioFiles = sounds.filter(file =>
+    path.basename(file) === file && ['.mp3', '.wav', '.ogg', '.m4a'].includes(path.extname(file).toLowerCase())
+  );
+  const stats = await Promise.all(audioFiles.map(file =>
+    fs.promises.stat(path.join(soundsPath, file)).catch(() => null)
+  ));
+  const imported = audioFiles
+    .map((file, i) => stats[i] && {
+      name: path.parse(file).name,
+      filename: file,
+      path: `/sounds/${file}`,
+      size: stats[i].size
+    })
+    .filter(Boolean);
+
+  soundLibrary.invalidate();
+  if (imported.length > 0) {
+    io.to([streamRoom('sounds'), BOT_ROOM]).emit('sounds_imported', imported);
+  }
+
+  res.json({ success: true, count: imported.length, sounds: imported });
+});
+
 app.post('/api/play', (req, res) => {
-  const { sound, guild_id, triggered_by } = req.body;
+  const { sound, guild_id, guild_ids, start_at, triggered_by, start, end, cue } = req.body;
 
   if (!sound) {
     return res.status(400).json({ error: 'Sound name required' });
   }
+  if (start_at !== undefined && start_at !== null && !Number.isFinite(start_at)) {
+    return res.status(400).json({ error: 'start_at must be epoch milliseconds' });
+  }
+  if (guild_ids !== undefined && !Array.isArray(guild_ids)) {
+    return res.status(400).json({ error: 'guild_ids must be an array' });
+  }
+  for (const offset of [start, end]) {
+    if (offset !== undefined && offset !== null && !(Number.isFinite(offset) && offset >= 0)) {
+      return res.status(400).json({ error: 'start and end must be offsets in seconds' });
+    }
+  }
+
+  // Optional segment of the sound: offsets in seconds or a named cue point
+  const segment = {};
+  for (const [key, value] of Object.entries({ start, end, cue })) {
+    if (value !== undefined && value !== null) {
+      segment[key] = value;
+    }
+  }
 
   // Log if triggered by hotkey
   if (triggered_by === 'hotkey') {
     console.log(`Hotkey triggered sound: ${sound}`);
   }
 
-  // In a real implementation, this would communicate with the Discord bot
-  // For now, we'll just emit a socket event
-  io.emit('play_sound', { sound, guild_id, triggered_by });
+  if (guild_ids?.length || start_at) {
+    // Synchronized play: each owning worker gets its share of the guilds
+    const data = { sound, guild_ids: guild_ids || (guild_id ? [guild_id] : []), start_at, triggered_by, ...segment };
+    if (!emitPlayToGuilds('play_sound', data) && data.guild_ids.length) {
+      return res.status(503).json({ error: 'No bot worker serves those guilds' });
+    }
+    emitToStream('plays', 'play_sound', data);
+    return res.json({ success: true, message: `Scheduled ${sound}` });
+  }
+
+  // Route to the bot serving the guild; dashboards only see it if subscribed
+  if (!emitToBots('play_sound', { sound, guild_id, triggered_by, ...segment }, guild_id) && guild_id) {
+    return res.status(503).json({ error: 'No bot worker serves that guild' });
+  }
+  emitToStream('plays', 'play_sound', { sound, guild_id, triggered_by, ...segment });
 
   res.json({ success: true, message: `Playing ${sound}` });
 });
@@ -345,7 +556,8 @@ app.delete('/api/sounds/:filename', (req, res) => {
 
   try {
     fs.unlinkSync(filePath);
-    io.emit('sound_deleted', filename);
+    soundLibrary.removeMetadata(filename);
+    io.to([streamRoom('sounds'), BOT_ROOM]).emit('sound_deleted', filename);
     res.json({ success: true, message: 'Sound deleted' });
   } catch (error) {
     console.error('Error deleting sound:', error);
@@ -371,8 +583,8 @@ app.post('/api/hotkeys', (req, res) => {
   try {
     const hotkey = hotkeyService.createHotkey(req.body);
 
-    // Notify all clients about new hotkey
-    io.emit('hotkey_added', hotkey);
+    // Notify subscribed clients, and bots so they pin the bound sound
+    io.to([streamRoom('hotkeys'), BOT_ROOM]).emit('hotkey_added', hotkey);
 
     res.status(201).json(hotkey);
   } catch (error) {
@@ -387,8 +599,8 @@ app.put('/api/hotkeys/:id', (req, res) => {
     const { id } = req.params;
     const hotkey = hotkeyService.updateHotkey(id, req.body);
 
-    // Notify all clients about updated hotkey
-    io.emit('hotkey_updated', hotkey);
+    // Notify subscribed clients, and bots so they re-pin bound sounds
+    io.to([streamRoom('hotkeys'), BOT_ROOM]).emit('hotkey_updated', hotkey);
 
     res.json(hotkey);
   } catch (error) {
@@ -407,8 +619,8 @@ app.delete('/api/hotkeys/:id', (req, res) => {
     const { id } = req.params;
     const deleted = hotkeyService.deleteHotkey(id);
 
-    // Notify all clients about deleted hotkey
-    io.emit('hotkey_deleted', id);
+    // Notify subscribed clients, and bots so they unpin the sound
+    io.to([streamRoom('hotkeys'), BOT_ROOM]).emit('hotkey_deleted', id);
 
     res.json({ success: true, deleted });
   } catch (error) {
@@ -447,27 +659,82 @@ app.get('/api/hotkeys/conflicts', (req, res) => {
 io.on('connection', (socket) => {
   console.log('Client connected:', socket.id);
 
-  // Send current bot status to new client
-  socket.emit('bot_status', botStatus);
-
   socket.on('disconnect', () => {
-    console.log('Client disconnected:', socket.id);
+    console.log(`${socket.data.clientType === 'bot' ? 'Bot' : 'Client'} disconnected:`, socket.id);
+    if (socket.data.workerId && workerRegistry.unregister(socket.data.workerId, socket.id)) {
+      // Hand the departed worker's guilds to the remaining workers. Its
+      // voice connections are re-reported if it comes back.
+      voiceByWorker.delete(socket.data.workerId);
+      refreshBotStatus();
+      publishOwnership();
+      emitToStream('bot_status', 'bot_status', botStatus);
+    }
+  });
+
+  // Bot workers identify themselves and the guilds their client is in
+  socket.on('register_bot', (data = {}) => {
+    const workerId = workerIdOf(data);
+    socket.data.clientType = 'bot';
+    socket.data.workerId = workerId;
+    socket.join([BOT_ROOM, workerRoom(workerId)]);
+
+    workerRegistry.register(workerId, socket.id, data.guild_ids || []);
+    refreshBotStatus();
+    publishOwnership();
+    console.log(`Bot worker registered: ${workerId} (${(data.guild_ids || []).length} guilds, owns ${workerRegistry.ownedBy(workerId).length})`);
+  });
+
+  // Dashboards pick the status streams they display
+  socket.on('subscribe', (streams = []) => {
+    socket.data.clientType = 'dashboard';
+    for (const stream of streams) {
+      if (STREAMS.includes(stream)) {
+        socket.join(streamRoom(stream));
+      }
+    }
+    if (streams.includes('bot_status')) {
+      // Send current bot status to new subscriber
+      socket.emit('bot_status', botStatus);
+    }
+  });
+
+  socket.on('unsubscribe', (streams = []) => {
+    for (const stream of streams) {
+      socket.leave(streamRoom(stream));
+    }
   });
 
   socket.on('join_voice', (data) => {
-    // Forward to bot (in real implementation)
     console.log('Join voice request:', data);
-    io.emit('bot_command', { command: 'join', ...data });
+    emitToBots('bot_command', { command: 'join', ...data }, data?.guild_id);
   });
 
   socket.on('leave_voice', (data) => {
     console.log('Leave voice request:', data);
-    io.emit('bot_command', { command: 'leave', ...data });
+    emitToBots('bot_command', { command: 'leave', ...data }, data?.guild_id);
+  });
+
+  // Volume and ducking go to the worker playing in that guild
+  socket.on('set_volume', (data) => {
+    emitToBots('set_volume', data, data?.guild_id);
+  });
+
+  socket.on('set_ducking', (data) => {
+    emitToBots('set_ducking', data, data?.guild_id);
+  });
+
+  // Per-sound volume is stored in sound metadata, which every worker applies
+  socket.on('set_sound_volume', (data) => {
+    io.to(BOT_ROOM).emit('set_sound_volume', data);
   });
 
   socket.on('play_sound', (data) => {
     console.log('Play sound request:', data);
-    io.emit('bot_command', { command: 'play', ...data });
+    if (data?.guild_ids?.length || data?.start_at) {
+      emitPlayToGuilds('bot_command', { command: 'play', ...data, guild_ids: data.guild_ids || (data.guild_id ? [data.guild_id] : []) });
+    } else {
+      emitToBots('bot_command', { command: 'play', ...data }, data?.guild_id);
+    }
   });
 });
 
@@ -483,6 +750,9 @@ app.use((error, req, res, next) => {
   res.status(500).json({ error: 'Internal server error' });
 });
 
+// Write out debounced hotkey changes before exiting
+flushOnSignals(hotkeyService);
+
 server.listen(PORT, () => {
   console.log(`Server running on port ${PORT}`);
   console.log(`Sounds directory: ${path.resolve(__dirname, SOUNDS_DIR)}`);
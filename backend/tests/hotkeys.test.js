@@ -0,0 +1,115 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { HotkeyService, flushOnSignals } = require('../hotkeys');
+
+const ctrlA = { name: 'Airhorn', soundFile: 'airhorn.mp3', keyCode: 65, modifiers: { ctrl: true } };
+
+describe('HotkeyService', () => {
+  let dataDir;
+  let service;
+
+  beforeEach(() => {
+    dataDir = fs.mkdtempSync(path.join(os.tmpdir(), 'hotkeys-'));
+    service = new HotkeyService(dataDir, 60 * 1000);
+  });
+
+  afterEach(async () => {
+    await service.flush();
+    fs.rmSync(dataDir, { recursive: true, force: true });
+  });
+
+  function saved() {
+    return fs.readFileSync(path.join(dataDir, 'hotkeys.json'), 'utf8');
+  }
+
+  describe('validation', () => {
+    it('should reject an enabled hotkey bound to a taken combination', () => {
+      const first = service.createHotkey(ctrlA);
+
+      const validation = service.validateHotkey({ ...ctrlA, enabled: true });
+      expect(validation.valid).toBe(false);
+      expect(validation.conflicts.map(h => h.id)).toEqual([first.id]);
+      expect(() => service.createHotkey(ctrlA)).toThrow('Hotkey conflict with: Airhorn');
+    });
+
+    it('should treat missing modifiers as not held', () => {
+      service.createHotkey({ ...ctrlA, modifiers: { ctrl: true, alt: false, shift: false } });
+      expect(service.validateHotkey({ ...ctrlA, enabled: true }).valid).toBe(false);
+    });
+
+    it('should allow the same key with other modifiers', () => {
+      service.createHotkey(ctrlA);
+      expect(service.validateHotkey({ ...ctrlA, modifiers: { ctrl: true, shift: true }, enabled: true }).valid).toBe(true);
+    });
+
+    it('should not treat a string keyCode as the same key', () => {
+      service.createHotkey(ctrlA);
+      expect(service.validateHotkey({ ...ctrlA, keyCode: '65', enabled: true }).valid).toBe(true);
+    });
+
+    it('should only count hotkeys that are explicitly enabled', () => {
+      service.createHotkey({ ...ctrlA, enabled: false });
+      expect(service.createHotkey(ctrlA).enabled).toBe(true);
+      // Legacy entries and requests without the flag never conflict
+      expect(service.validateHotkey(ctrlA).valid).toBe(true);
+    });
+
+    it('should not conflict with itself on update', () => {
+      const hotkey = service.createHotkey(ctrlA);
+      expect(service.updateHotkey(hotkey.id, { name: 'Renamed' }).name).toBe('Renamed');
+    });
+  });
+
+  describe('conflicts', () => {
+    it('should report each pair of enabled hotkeys sharing a combination', () => {
+      const legacy = [
+        { id: 'a', ...ctrlA, enabled: true },
+        { id: 'b', ...ctrlA, enabled: true },
+        { id: 'c', ...ctrlA },
+        { id: 'd', ...ctrlA, keyCode: 66, enabled: true }
+      ];
+      fs.writeFileSync(path.join(dataDir, 'hotkeys.json'), JSON.stringify({ hotkeys: legacy }));
+      service = new HotkeyService(dataDir, 60 * 1000);
+
+      expect(service.getConflicts().map(pair => pair.map(h => h.id))).toEqual([['a', 'b']]);
+    });
+
+    it('should free a combination when its hotkey is deleted or disabled', () => {
+      const hotkey = service.createHotkey(ctrlA);
+      service.updateHotkey(hotkey.id, { enabled: false });
+      expect(service.validateHotkey({ ...ctrlA, enabled: true }).valid).toBe(true);
+
+      service.updateHotkey(hotkey.id, { enabled: true });
+      service.deleteHotkey(hotkey.id);
+      expect(service.validateHotkey({ ...ctrlA, enabled: true }).valid).toBe(true);
+    });
+  });
+
+  describe('saving', () => {
+    it('should write pretty-printed JSON that survives a restart', async () => {
+      const hotkey = service.createHotkey(ctrlA);
+      await service.flush();
+
+      expect(saved()).toBe(JSON.stringify({ hotkeys: [hotkey] }, null, 2));
+      expect(new HotkeyService(dataDir).getHotkeyById(hotkey.id)).toEqual(hotkey);
+    });
+
+    it('should flush pending changes on SIGTERM before exiting', async () => {
+      const before = process.listeners('SIGTERM');
+      const exit = jest.fn();
+      flushOnSignals(service, ['SIGTERM'], exit);
+      const handler = process.listeners('SIGTERM').find(listener => !before.includes(listener));
+      process.removeListener('SIGTERM', handler);
+
+      const hotkey = service.createHotkey(ctrlA);
+      expect(JSON.parse(saved()).hotkeys).toEqual([]);
+
+      handler();
+      await service.flush();
+      await new Promise(resolve => setImmediate(resolve));
+      expect(JSON.parse(saved()).hotkeys).toEqual([hotkey]);
+      expect(exit).toHaveBeenCalledWith(0);
+    });
+  });
+});
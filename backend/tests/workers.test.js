@@ -0,0 +1,125 @@
+const { HashRing, WorkerRegistry } = require('../workers');
+
+const guildIds = Array.from({ length: 200 }, (_, i) => String(1000 + i));
+
+function owners(registry) {
+  return new Map(guildIds.map(guildId => [guildId, registry.ownerOf(guildId)]));
+}
+
+describe('HashRing', () => {
+  it('should return null when empty', () => {
+    expect(new HashRing().lookup('123')).toBeNull();
+  });
+
+  it('should map a key to the same node regardless of insertion order', () => {
+    const a = new HashRing();
+    const b = new HashRing();
+    ['w0', 'w1', 'w2'].forEach(node => a.add(node));
+    ['w2', 'w0', 'w1'].forEach(node => b.add(node));
+
+    for (const guildId of guildIds) {
+      expect(a.lookup(guildId)).toBe(b.lookup(guildId));
+    }
+  });
+
+  it('should skip nodes that accept() rejects', () => {
+    const ring = new HashRing();
+    ['w0', 'w1', 'w2'].forEach(node => ring.add(node));
+
+    for (const guildId of guildIds) {
+      expect(ring.lookup(guildId, node => node === 'w1')).toBe('w1');
+    }
+    expect(ring.lookup('123', () => false)).toBeNull();
+  });
+});
+
+describe('WorkerRegistry', () => {
+  let registry;
+
+  beforeEach(() => {
+    registry = new WorkerRegistry();
+    registry.register('w0', 'socket-0', guildIds);
+    registry.register('w1', 'socket-1', guildIds);
+  });
+
+  it('should assign every guild to exactly one worker', () => {
+    const assigned = owners(registry);
+    expect([...assigned.values()].every(w => w === 'w0' || w === 'w1')).toBe(true);
+    expect(registry.ownedBy('w0').length + registry.ownedBy('w1').length).toBe(guildIds.length);
+    expect(registry.ownedBy('w0').length).toBeGreaterThan(0);
+    expect(registry.ownedBy('w1').length).toBeGreaterThan(0);
+  });
+
+  it('should keep assignments stable when a worker re-registers', () => {
+    const before = owners(registry);
+    registry.register('w0', 'socket-0b', guildIds);
+    expect(owners(registry)).toEqual(before);
+  });
+
+  it('should only move guilds to a newly registered worker', () => {
+    const before = owners(registry);
+    registry.register('w2', 'socket-2', guildIds);
+    const after = owners(registry);
+
+    const moved = guildIds.filter(guildId => before.get(guildId) !== after.get(guildId));
+    expect(moved.length).toBeGreaterThan(0);
+    expect(moved.every(guildId => after.get(guildId) === 'w2')).toBe(true);
+  });
+
+  it('should hand a disconnected worker\'s guilds to the others', () => {
+    const before = owners(registry);
+    expect(registry.unregister('w1', 'socket-1')).toBe(true);
+    const after = owners(registry);
+
+    for (const guildId of guildIds) {
+      expect(after.get(guildId)).toBe('w0');
+    }
+    expect(registry.ownedBy('w1')).toEqual([]);
+    // Guilds w0 already owned stay put
+    expect(guildIds.filter(g => before.get(g) === 'w0').every(g => after.get(g) === 'w0')).toBe(true);
+  });
+
+  it('should ignore a disconnect from a replaced socket', () => {
+    registry.register('w1', 'socket-1b', guildIds);
+    expect(registry.unregister('w1', 'socket-1')).toBe(false);
+    expect(registry.summary().map(w => w.worker_id)).toEqual(['w0', 'w1']);
+  });
+
+  it('should only assign a guild to workers that are in it', () => {
+    registry.register('w2', 'socket-2', ['5']);
+    registry.register('w3', 'socket-3', ['6']);
+
+    expect(registry.ownerOf('5')).toBe('w2');
+    expect(registry.ownerOf(6)).toBe('w3');
+    expect(registry.ownerOf('7')).toBeNull();
+  });
+
+  it('should keep a guild with the worker holding its voice session', () => {
+    const guildId = guildIds.find(g => registry.ownerOf(g) === 'w0');
+    expect(registry.setVoice('w1', [guildId])).toBe(true);
+    expect(registry.ownerOf(guildId)).toBe('w1');
+
+    // A new worker doesn't take it back from the connected one
+    registry.register('w2', 'socket-2', guildIds);
+    expect(registry.ownerOf(guildId)).toBe('w1');
+    expect(registry.setVoice('w1', [guildId])).toBe(false);
+  });
+
+  it('should return a guild to the ring when its voice session ends', () => {
+    const before = owners(registry);
+    const guildId = guildIds.find(g => before.get(g) === 'w0');
+    registry.setVoice('w1', [guildId]);
+
+    expect(registry.setVoice('w1', [])).toBe(true);
+    expect(owners(registry)).toEqual(before);
+  });
+
+  it('should forget a departed worker\'s voice sessions', () => {
+    const guildId = guildIds.find(g => registry.ownerOf(g) === 'w0');
+    registry.setVoice('w1', [guildId]);
+    registry.unregister('w1', 'socket-1');
+    registry.register('w1', 'socket-1b', guildIds);
+
+    expect(registry.ownerOf(guildId)).toBe('w0');
+  });
+});
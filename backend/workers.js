@@ -0,0 +1,161 @@
+const crypto = require('crypto');
+
+// HashRing Class
+// Consistent hashing with virtual nodes, so adding or removing a worker only
+// moves the guilds that hashed to it
+class HashRing {
+  constructor(replicas = 100) {
+    this.replicas = replicas;
+    this.points = [];
+  }
+
+  static hash(key) {
+    return crypto.createHash('md5').update(String(key)).digest().readUInt32BE(0);
+  }
+
+  add(node) {
+    for (let i = 0; i < this.replicas; i++) {
+      this.points.push({ hash: HashRing.hash(`${node}#${i}`), node });
+    }
+    this.points.sort((a, b) => a.hash - b.hash);
+  }
+
+  remove(node) {
+    this.points = this.points.filter(p => p.node !== node);
+  }
+
+  // First node clockwise from key that accept() allows
+  lookup(key, accept = () => true) {
+    if (this.points.length === 0) {
+      return null;
+    }
+    const hash = HashRing.hash(key);
+    let lo = 0;
+    let hi = this.points.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (this.points[mid].hash < hash) {
+        lo = mid + 1;
+      } else {
+        hi = mid;
+      }
+    }
+
+    const tried = new Set();
+    for (let i = 0; i < this.points.length; i++) {
+      const { node } = this.points[(lo + i) % this.points.length];
+      if (!tried.has(node)) {
+        tried.add(node);
+        if (accept(node)) {
+          return node;
+        }
+      }
+    }
+    return null;
+  }
+}
+
+// WorkerRegistry Class
+// Assigns each guild to one of the bot workers that can serve it. A worker
+// holding a voice session in a guild owns it; the ring only places guilds
+// no worker is connected in.
+class WorkerRegistry {
+  constructor() {
+    this.workers = new Map();
+    this.ring = new HashRing();
+    this.owners = new Map();
+    // workerId -> Set of guild ids it has a voice session in
+    this.voice = new Map();
+  }
+
+  register(workerId, socketId, guildIds) {
+    if (!this.workers.has(workerId)) {
+      this.ring.add(workerId);
+    }
+    this.workers.set(workerId, { socketId, guilds: new Set(guildIds.map(String)) });
+    this.rebalance();
+  }
+
+  unregister(workerId, socketId) {
+    const worker = this.workers.get(workerId);
+    if (!worker || worker.socketId !== socketId) {
+      return false;
+    }
+    this.workers.delete(workerId);
+    this.voice.delete(workerId);
+    this.ring.remove(workerId);
+    this.rebalance();
+    return true;
+  }
+
+  // Record the guilds a worker reports voice sessions in. Returns whether
+  // any guild changed owner.
+  setVoice(workerId, guildIds) {
+    this.voice.set(workerId, new Set(guildIds.map(String)));
+    const before = this.owners;
+    this.rebalance();
+    if (before.size !== this.owners.size) {
+      return true;
+    }
+    for (const [guildId, owner] of this.owners) {
+      if (before.get(guildId) !== owner) {
+        return true;
+      }
+    }
+    return false;
+  }
+
+  // Registered workers with a voice session in the guild
+  connectedIn(guildId) {
+    const connected = [];
+    for (const [workerId, guilds] of this.voice) {
+      if (this.workers.has(workerId) && guilds.has(guildId)) {
+        connected.push(workerId);
+      }
+    }
+    return connected;
+  }
+
+  // A worker can only own guilds its Discord client is in. Moving a guild
+  // away from the worker with its voice session would strand the session,
+  // so connected workers win over the ring.
+  rebalance() {
+    const owners = new Map();
+    const rosters = Array.from(this.workers.values(), worker => worker.guilds);
+    for (const guilds of [...rosters, ...this.voice.values()]) {
+      for (const guildId of guilds) {
+        if (!owners.has(guildId)) {
+          const connected = this.connectedIn(guildId);
+          const accept = connected.length
+            ? w => connected.includes(w)
+            : w => this.workers.get(w).guilds.has(guildId);
+          owners.set(guildId, this.ring.lookup(guildId, accept));
+        }
+      }
+    }
+    this.owners = owners;
+  }
+
+  ownerOf(guildId) {
+    return this.owners.get(String(guildId)) || null;
+  }
+
+  ownedBy(workerId) {
+    const owned = [];
+    for (const [guildId, owner] of this.owners) {
+      if (owner === workerId) {
+        owned.push(guildId);
+      }
+    }
+    return owned;
+  }
+
+  summary() {
+    return Array.from(this.workers.keys(), workerId => ({
+      worker_id: workerId,
+      owned_guilds: this.ownedBy(workerId).length
+    }));
+  }
+}
+
+module.exports = { HashRing, WorkerRegistry };
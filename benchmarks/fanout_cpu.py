@@ -0,0 +1,99 @@
+"""
+Compare CPU cost of playing one sound in N guilds at once.
+
+Per guild:  every voice client Opus-encodes its own copy of the PCM frames
+            (what discord.py does for a plain PCM source)
+Broadcast:  one OpusBroadcast encodes the frames once and N subscribers
+            read the shared packets
+
+The sound is a synthetic tone (or --file, decoded once up front with ffmpeg),
+so the numbers cover encoding and fan-out only, not decoding or sending.
+Needs libopus; set OPUS_LIBRARY if it isn't on the default search path.
+
+Usage:
+    python benchmarks/fanout_cpu.py --seconds 5 --guilds 1 2 4 8 16 32
+"""
+
+import argparse
+import ctypes.util
+import math
+import os
+import struct
+import sys
+import time
+
+import discord
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.audio import FRAME_SIZE, OpusBroadcast, iter_decoder
+
+
+def load_opus():
+    if discord.opus.is_loaded():
+        return True
+    library = os.getenv('OPUS_LIBRARY') or ctypes.util.find_library('opus')
+    if not library:
+        return False
+    try:
+        discord.opus.load_opus(library)
+    except OSError:
+        return False
+    return discord.opus.is_loaded()
+
+
+def tone_frames(seconds, frequency=440):
+    samples_per_frame = FRAME_SIZE // 4
+    frames = []
+    for f in range(int(seconds * 50)):
+        values = []
+        for i in range(samples_per_frame):
+            sample = int(12000 * math.sin(2 * math.pi * frequency * (f * samples_per_frame + i) / 48000))
+            values += (sample, sample)
+        frames.append(struct.pack(f'<{len(values)}h', *values))
+    return frames
+
+
+def per_guild(frames, guilds):
+    for _ in range(guilds):
+        encoder = discord.opus.Encoder()
+        for frame in frames:
+            encoder.encode(frame, encoder.SAMPLES_PER_FRAME)
+
+
+def broadcast(frames, guilds):
+    shared = OpusBroadcast(frames)
+    subscribers = [shared.subscribe() for _ in range(guilds)]
+    for subscriber in subscribers:
+        while subscriber.read():
+            pass
+
+
+def cpu_ms(fn, *args):
+    started = time.process_time()
+    fn(*args)
+    return (time.process_time() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0, help='length of the synthetic tone')
+    parser.add_argument('--file', help='benchmark this sound instead of a tone')
+    parser.add_argument('--guilds', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    if not load_opus():
+        sys.exit("libopus not found; install it or set OPUS_LIBRARY")
+
+    frames = list(iter_decoder(discord.FFmpegPCMAudio(args.file))) if args.file else tone_frames(args.seconds)
+    print(f"{len(frames)} frames ({len(frames) * 0.02:.1f}s of audio)\n")
+    print(f"{'guilds':>6}{'per guild':>14}{'broadcast':>14}{'saved':>8}")
+    for guilds in args.guilds:
+        before = cpu_ms(per_guild, frames, guilds)
+        after = cpu_ms(broadcast, frames, guilds)
+        saved = f"{(1 - after / before) * 100:.0f}%" if before else 'n/a'
+        print(f"{guilds:>6}{before:>12.1f}ms{after:>12.1f}ms{saved:>8}")
+
+
+if __name__ == '__main__':
+    main()
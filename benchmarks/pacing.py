@@ -0,0 +1,127 @@
+"""
+Compare audio pacing: one discord.py AudioPlayer thread per voice client vs
+the shared PacingEngine.
+
+Each simulated session plays --seconds of pre-encoded Opus frames into a
+stub voice client that only timestamps send_audio_packet calls, so the
+numbers cover pacing, threading and scheduling only, not encoding or
+network I/O. Reported per model and session count:
+
+    threads  extra threads used for playback
+    cpu      process CPU time as a share of one core over the run
+    jitter   |interval between a client's packets - 20ms|, p50/p99/max
+
+Usage:
+    python benchmarks/pacing.py --seconds 3 --sessions 1 10 50 100 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+from discord.player import AudioPlayer
+from discord.utils import MISSING
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.audio import CachedSource, FRAME_DURATION
+from bot.pacing import OPUS_SILENCE, PacingEngine
+
+
+class OpusFrames(CachedSource):
+    def is_opus(self):
+        return True
+
+
+class StubWebSocket:
+    async def speak(self, state):
+        pass
+
+
+class StubClient:
+    """Enough of a VoiceClient for AudioPlayer and PacingEngine"""
+
+    def __init__(self, loop):
+        self.sent = []
+        # discord.py's VoiceClient starts without an encoder as MISSING, not None
+        self.encoder = MISSING
+        self.ws = StubWebSocket()
+        self.client = type('StubBot', (), {'loop': loop})()
+
+    def is_connected(self):
+        return True
+
+    def send_audio_packet(self, data, *, encode=True):
+        if data != OPUS_SILENCE:
+            self.sent.append(time.perf_counter())
+
+
+def jitter_ms(clients):
+    samples = []
+    for client in clients:
+        samples += [abs(b - a - FRAME_DURATION) * 1000 for a, b in zip(client.sent, client.sent[1:])]
+    samples.sort()
+    if not samples:
+        return {}
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {'p50': pick(0.5), 'p99': pick(0.99), 'max': samples[-1], 'mean': statistics.mean(samples)}
+
+
+def run_model(model, sessions, frames, loop, pacing_threads):
+    clients = [StubClient(loop) for _ in range(sessions)]
+    done = threading.Semaphore(0)
+    threads_before = threading.active_count()
+    started_cpu, started_wall = time.process_time(), time.perf_counter()
+
+    engine = PacingEngine(pacing_threads) if model == 'shared' else None
+    peak_threads = threading.active_count()
+    for client in clients:
+        source = OpusFrames([b'\xfc\xff\xfe'] * frames)
+        if engine is not None:
+            engine.play(client, source, after=lambda error: done.release())
+        else:
+            AudioPlayer(source, client, after=lambda error: done.release()).start()
+        peak_threads = max(peak_threads, threading.active_count())
+    for _ in clients:
+        done.acquire()
+
+    cpu = time.process_time() - started_cpu
+    wall = time.perf_counter() - started_wall
+    if engine is not None:
+        engine.close()
+    return {
+        'threads': peak_threads - threads_before,
+        'cpu_pct': cpu / wall * 100,
+        'jitter': jitter_ms(clients),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0, help='length of each simulated sound')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    parser.add_argument('--pacing-threads', type=int, default=1, help='PacingEngine pool size')
+    args = parser.parse_args()
+
+    # AudioPlayer updates the speaking state on the client's event loop
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    frames = int(args.seconds / FRAME_DURATION)
+
+    print(f"{frames} frames per session, shared engine with {args.pacing_threads} thread(s)\n")
+    print(f"{'sessions':>8} {'model':<10}{'threads':>8}{'cpu':>8}{'p50':>9}{'p99':>9}{'max':>9}  jitter ms")
+    for sessions in args.sessions:
+        for model in ('per-thread', 'shared'):
+            result = run_model(model, sessions, frames, loop, args.pacing_threads)
+            j = result['jitter']
+            print(f"{sessions:>8} {model:<10}{result['threads']:>8}{result['cpu_pct']:>7.1f}%"
+                  f"{j.get('p50', 0):>9.3f}{j.get('p99', 0):>9.3f}{j.get('max', 0):>9.3f}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == '__main__':
+    main()
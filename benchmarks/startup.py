@@ -0,0 +1,210 @@
+"""
+Time from process start to the first playable trigger: the old sequential
+startup (Opus lookup and every optional module at import, then everything
+in on_ready after login) vs SoundboardBot.startup() running beside the
+Discord login.
+
+A fake backend (aiohttp + python-socketio) runs in this process and sends a
+play_sound as soon as a bot registers with its guilds. Discord is simulated:
+login is a --login-ms sleep and voice sessions are mocked. Each run starts a
+fresh interpreter, so imports are included. Reported per mode, median of
+--runs, in ms since the bot process started:
+
+    import    until bot.main is imported
+    catalog   until the sound library is indexed
+    first     until the first play_sound that played
+
+Usage:
+    python benchmarks/startup.py --sounds 300 --sound-kb 512 --login-ms 800 --runs 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f'Guild {guild_id}'
+        self.member_count = 10
+        self.voice_client = None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_backend(port, latency, started):
+    """Answer the bot's backend calls after latency seconds; play as soon as it registers"""
+    import socketio
+    from aiohttp import web
+
+    sio = socketio.AsyncServer(async_mode='aiohttp')
+    app = web.Application()
+    sio.attach(app)
+
+    async def ok(request):
+        await asyncio.sleep(latency)
+        return web.json_response({'success': True})
+
+    async def hotkeys(request):
+        await asyncio.sleep(latency)
+        return web.json_response([])
+
+    for route in ('ready', 'guilds/sync', 'guilds/event', 'voice-status', 'sound-metadata'):
+        app.router.add_post(f'/api/bot/{route}', ok)
+    app.router.add_get('/api/hotkeys', hotkeys)
+
+    async def play(sid, guild_id):
+        await asyncio.sleep(latency)
+        await sio.emit('play_sound', {'sound': 'sound0.mp3', 'guild_id': guild_id, 'triggered_by': 'benchmark'}, to=sid)
+
+    @sio.on('register_bot')
+    async def register_bot(sid, data):
+        # Sent like a dashboard click, after the registration has been handled
+        if data.get('guild_ids'):
+            sio.start_background_task(play, sid, data['guild_ids'][0])
+
+    async def serve():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        started.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def child(mode, login):
+    """One bot startup; prints a JSON line of timings since it began"""
+    t0 = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    if mode == 'sequential':
+        # What used to load at import: every optional module, and the Opus lookup
+        import aiohttp.web, sqlite3  # noqa: F401
+        import bot.analytics, bot.direct, bot.pacing  # noqa: F401
+    import bot.main as main
+    from bot.sessions import VoiceSession
+    if mode == 'sequential':
+        main.load_opus()
+    imported = time.perf_counter()
+
+    soundboard = main.soundboard
+    soundboard.sync_app_commands = False
+    guilds = [FakeGuild(i) for i in range(1, 4)]
+    type(main.bot).guilds = property(lambda self: guilds)
+    timings = {}
+
+    record_outcome = soundboard.record_outcome
+
+    def record(source, guild_id, sound_name, outcome, stages, started, **request):
+        record_outcome(source, guild_id, sound_name, outcome, stages, started, **request)
+        if outcome == 'played' and 'first' not in timings:
+            timings['first'] = time.perf_counter()
+    soundboard.record_outcome = record
+
+    load_catalog = soundboard.load_catalog
+
+    async def timed_catalog():
+        await load_catalog()
+        timings['catalog'] = time.perf_counter()
+    soundboard.load_catalog = timed_catalog
+
+    async def on_ready_sequential():
+        # on_ready before parallel startup, minus slash command sync
+        async with soundboard.backend_session() as session:
+            async with session.post(f'{soundboard.backend_url}/api/bot/ready', json={'connected': True}):
+                pass
+        await soundboard.sync_guilds(guilds)
+        await soundboard.load_catalog()
+        await soundboard.start_analytics()
+        soundboard.install_reload_signal()
+        soundboard.ingest_task = asyncio.create_task(soundboard.ingest_metadata())
+        await soundboard.connect_to_backend()
+        await soundboard.start_direct_trigger()
+        await soundboard.start_metrics()
+
+    async def scenario():
+        if mode == 'concurrent':
+            soundboard.begin_startup()
+        await asyncio.sleep(login)
+        # Voice sessions exist as soon as the gateway is ready
+        for guild in guilds:
+            soundboard.sessions.add(VoiceSession(guild.id, type('Channel', (), {'id': guild.id * 10, 'name': 'General'})()))
+        if mode == 'concurrent':
+            await main.on_ready()
+        else:
+            await on_ready_sequential()
+        while 'first' not in timings or 'catalog' not in timings:
+            await asyncio.sleep(0.005)
+        await soundboard.sio.disconnect()
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        asyncio.run(scenario())
+    print(json.dumps({
+        'import': (imported - t0) * 1000,
+        'catalog': (timings['catalog'] - t0) * 1000,
+        'first': (timings['first'] - t0) * 1000,
+    }))
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sounds', type=int, default=300, help='sound files in the library')
+    parser.add_argument('--sound-kb', type=int, default=256, help='size of each sound file')
+    parser.add_argument('--login-ms', type=float, default=800, help='simulated Discord login time')
+    parser.add_argument('--backend-ms', type=float, default=20, help='fake backend response time')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', choices=('sequential', 'concurrent'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.login_ms / 1000)
+        return
+
+    port = free_port()
+    started = threading.Event()
+    threading.Thread(target=run_backend, args=(port, args.backend_ms / 1000, started), daemon=True).start()
+    started.wait()
+
+    with tempfile.TemporaryDirectory() as sounds:
+        for i in range(args.sounds):
+            with open(os.path.join(sounds, f'sound{i}.mp3'), 'wb') as f:
+                f.write(os.urandom(args.sound_kb * 1024))
+        env = dict(os.environ, BOT_MOCK_VOICE='true', BOT_SOUNDS_DIR=sounds,
+                   BACKEND_URL=f'http://127.0.0.1:{port}', BOT_ANALYTICS_DB=os.path.join(sounds, '.plays.db'))
+        for name in ('DIRECT_TRIGGER_PORT', 'METRICS_PORT', 'BOT_TRACE_FILE', 'PACING_THREADS'):
+            env.pop(name, None)
+
+        print(f"{args.sounds} sounds x {args.sound_kb}KB, login {args.login_ms:.0f}ms, "
+              f"backend {args.backend_ms:.0f}ms, median of {args.runs}\n")
+        print(f"{'mode':<12}{'import':>10}{'catalog':>10}{'first':>10}")
+        for mode in ('sequential', 'concurrent'):
+            runs = []
+            for _ in range(args.runs):
+                out = subprocess.run(
+                    [sys.executable, __file__, '--child', mode, '--login-ms', str(args.login_ms)],
+                    env=env, capture_output=True, text=True, check=True, timeout=120
+                )
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{mode:<12}{median['import']:>10.0f}{median['catalog']:>10.0f}{median['first']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Compare hotkey trigger latency: backend relay vs the bot's direct endpoint.
+
+Relayed:  POST /api/play -> backend emits 'play_sound' to the guild's worker -> Socket.io client
+Direct:   POST /play (or WebSocket /ws) on the bot's DirectTriggerServer
+
+The bot side is simulated in-process: a Socket.io client registered as the
+only worker in a benchmark guild stands in for the bot on the relayed path,
+and a DirectTriggerServer with a stub soundboard on the direct path. Both record when the play command arrives, so the numbers
+cover transport only, not audio playback.
+
+Usage:
+    cd backend && npm start                      # for the relayed path
+    python benchmarks/trigger_latency.py --backend http://localhost:3001 -n 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+import socketio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.direct import DirectTriggerServer
+
+
+class StubSoundboard:
+    def __init__(self):
+        self.arrivals = asyncio.Queue()
+
+    async def dispatch_play(self, data, triggered_by):
+        self.arrivals.put_nowait(time.perf_counter())
+        return True
+
+
+def summarize(label, samples):
+    if not samples:
+        print(f"{label:<22} no samples")
+        return
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    print(f"{label:<22} n={len(samples):<5} mean={statistics.mean(samples):7.3f}ms "
+          f"p50={p(0.50):7.3f}ms p95={p(0.95):7.3f}ms p99={p(0.99):7.3f}ms")
+
+
+BENCH_WORKER = 'trigger-latency-bench'
+# A guild no real worker is in, so the backend routes it to the stub alone
+BENCH_GUILD = 'trigger-latency-bench'
+
+
+async def bench_relayed(backend_url, count):
+    arrivals = asyncio.Queue()
+    owned = asyncio.Event()
+    sio = socketio.AsyncClient()
+
+    @sio.on('play_sound')
+    async def on_play(data):
+        arrivals.put_nowait(time.perf_counter())
+
+    @sio.on('ownership')
+    async def on_ownership(data):
+        if BENCH_GUILD in data.get('guild_ids', []):
+            owned.set()
+
+    try:
+        await sio.connect(backend_url)
+        await sio.emit('register_bot', {'worker_id': BENCH_WORKER, 'guild_ids': [BENCH_GUILD]})
+        await asyncio.wait_for(owned.wait(), timeout=5)
+    except Exception as e:
+        print(f"Relayed path skipped, backend not reachable or didn't assign the guild: {e!r}")
+        if sio.connected:
+            await sio.disconnect()
+        return []
+
+    samples = []
+    async with aiohttp.ClientSession() as session:
+        for _ in range(count):
+            sent = time.perf_counter()
+            async with session.post(f'{backend_url}/api/play',
+                                    json={'sound': 'bench.mp3', 'guild_id': BENCH_GUILD,
+                                          'triggered_by': 'benchmark'}) as resp:
+                await resp.read()
+            arrived = await asyncio.wait_for(arrivals.get(), timeout=5)
+            samples.append((arrived - sent) * 1000)
+    await sio.disconnect()
+    return samples
+
+
+async def bench_direct(count, port):
+    board = StubSoundboard()
+    server = DirectTriggerServer(board, port=port, token='bench')
+    await server.start()
+
+    http_samples, ws_samples = [], []
+    headers = {'Authorization': 'Bearer bench'}
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(count):
+                sent = time.perf_counter()
+                async with session.post(f'http://127.0.0.1:{port}/play', headers=headers,
+                                        json={'sound': 'bench.mp3', 'guild_id': '1'}) as resp:
+                    await resp.read()
+                http_samples.append((await board.arrivals.get() - sent) * 1000)
+
+            async with session.ws_connect(f'http://127.0.0.1:{port}/ws?token=bench') as ws:
+                for i in range(count):
+                    sent = time.perf_counter()
+                    await ws.send_json({'id': i, 'sound': 'bench.mp3', 'guild_id': '1'})
+                    ws_samples.append((await board.arrivals.get() - sent) * 1000)
+                    await ws.receive_json()
+    finally:
+        await server.stop()
+    return http_samples, ws_samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default=os.getenv('BACKEND_URL', 'http://localhost:3001'))
+    parser.add_argument('--port', type=int, default=3061)
+    parser.add_argument('-n', '--count', type=int, default=200)
+    args = parser.parse_args()
+
+    relayed = await bench_relayed(args.backend, args.count)
+    direct_http, direct_ws = await bench_direct(args.count, args.port)
+
+    print("\nTime from client send to play command reaching the bot:")
+    summarize("relayed (backend)", relayed)
+    summarize("direct HTTP", direct_http)
+    summarize("direct WebSocket", direct_ws)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    ts REAL NOT NULL,
+    sound TEXT NOT NULL,
+    guild TEXT,
+    source TEXT,
+    outcome TEXT NOT NULL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS plays_ts ON plays (ts);
+"""
+
+
+class PlayAnalytics:
+    """Local SQLite log of every play request, for popularity queries
+
+    ``record`` only enqueues; a writer thread commits queued rows in batches
+    of up to ``batch_size`` (or every ``flush_interval`` seconds), so the
+    play path never waits on disk.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=100000)
+        self._closed = threading.Event()
+
+        with contextlib.closing(self._connect()) as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+
+        self._thread = threading.Thread(target=self._write, name='soundboard-analytics', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, sound, guild_id, source, outcome, latency_ms):
+        row = (time.time(), sound, str(guild_id) if guild_id is not None else None, source, outcome, latency_ms)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def pending(self):
+        """Number of records waiting for the writer thread"""
+        return self._queue.qsize()
+
+    def _write(self):
+        db = self._connect()
+        try:
+            while not (self._closed.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    with db:
+                        db.executemany('INSERT INTO plays VALUES (?, ?, ?, ?, ?, ?)', batch)
+                except sqlite3.Error as e:
+                    print(f"Failed to write {len(batch)} play records: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            db.close()
+
+    def flush(self):
+        """Block until every queued record is committed"""
+        self._queue.join()
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+
+    def top_sounds(self, limit, since=None):
+        """Most played sounds as (sound, plays), most popular first"""
+        with contextlib.closing(self._connect()) as db:
+            return db.execute(
+                "SELECT sound, COUNT(*) AS plays FROM plays WHERE outcome = 'played' AND ts >= ? "
+                "GROUP BY sound ORDER BY plays DESC, sound LIMIT ?",
+                (since or 0, limit)
+            ).fetchall()
@@ -0,0 +1,542 @@
+import audioop
+import collections
+import threading
+
+import discord
+
+# 20ms of 48kHz 16-bit stereo PCM, the unit discord.py sends per packet
+FRAME_SIZE = discord.opus.Encoder.FRAME_SIZE
+FRAME_DURATION = discord.opus.Encoder.FRAME_LENGTH / 1000
+SILENCE = b'\x00' * FRAME_SIZE
+
+
+def frame_span(start=None, end=None):
+    """(first, stop) frame indexes for a segment in seconds; stop None means to the end"""
+    first = int(round((start or 0) / FRAME_DURATION))
+    stop = int(round(end / FRAME_DURATION)) if end is not None else None
+    return first, stop
+
+
+class FrameCache:
+    """Byte-bounded LRU cache of fully decoded PCM frames, keyed by sound
+
+    Keys in ``pinned`` are never evicted, even when pinned entries alone
+    exceed the budget; unpinned entries are evicted around them. Keys
+    whose sound turned out longer than max_entry_bytes are remembered in
+    ``oversized`` so they aren't decoded for the cache again.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.pinned = frozenset()
+        self.oversized = set()
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached frame list for key, or None"""
+        with self._lock:
+            frames = self._entries.get(key)
+            if frames is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frames
+
+    def accepts(self, nbytes):
+        """Whether an entry of nbytes would be kept at all"""
+        return nbytes <= self.max_entry_bytes
+
+    def put(self, key, frames):
+        """Store a complete frame list, evicting least recently used entries"""
+        nbytes = len(frames) * FRAME_SIZE
+        if not frames:
+            return False
+        if not self.accepts(nbytes):
+            self.reject(key)
+            return False
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.resident_bytes -= len(old) * FRAME_SIZE
+            self._entries[key] = frames
+            self.resident_bytes += nbytes
+            for candidate in list(self._entries):
+                if self.resident_bytes <= self.max_bytes:
+                    break
+                if candidate == key or candidate in self.pinned:
+                    continue
+                evicted = self._entries.pop(candidate)
+                self.resident_bytes -= len(evicted) * FRAME_SIZE
+        return True
+
+    def reject(self, key):
+        """Remember that key's sound is too long to cache"""
+        with self._lock:
+            self.oversized.add(key)
+
+    def retain(self, keys):
+        """Drop every entry whose key isn't in keys; returns how many were dropped"""
+        with self._lock:
+            self.oversized.intersection_update(keys)
+            stale = [key for key in self._entries if key not in keys]
+            for key in stale:
+                self.resident_bytes -= len(self._entries.pop(key)) * FRAME_SIZE
+        return len(stale)
+
+    def set_pinned(self, keys):
+        """Replace the set of keys exempt from eviction"""
+        with self._lock:
+            self.pinned = frozenset(keys)
+
+    def discard(self, key):
+        with self._lock:
+            frames = self._entries.pop(key, None)
+            if frames is not None:
+                self.resident_bytes -= len(frames) * FRAME_SIZE
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+
+class CachedSource(discord.AudioSource):
+    """Plays a sound, or frames first..stop of it, straight from its cached PCM frames"""
+
+    def __init__(self, frames, first=0, stop=None):
+        self.frames = frames
+        self.position = first
+        self.stop = len(frames) if stop is None else min(stop, len(frames))
+
+    def read(self):
+        if self.position >= self.stop:
+            return b''
+        frame = self.frames[self.position]
+        self.position += 1
+        return frame
+
+
+class StreamingSource(discord.AudioSource):
+    """Plays frames as soon as ffmpeg decodes them
+
+    A background thread pulls frames from ``decoder`` into a bounded ring
+    buffer that the voice player drains. When the buffer is full the decoder
+    thread blocks until playback catches up. Every decoded frame is also kept
+    so the finished sound can be stored in ``cache`` under ``key``; if
+    playback stops early, decoding continues without a consumer until the
+    cache entry is complete. With ``first``/``stop`` only that frame range
+    is played, though the whole file still decodes into the cache.
+    """
+
+    def __init__(self, decoder, key=None, cache=None, buffer_frames=50, first=0, stop=None):
+        self.decoder = decoder
+        self.key = key
+        self.cache = cache
+        self.buffer_frames = buffer_frames
+        self.first = first
+        self.stop = stop
+
+        self._buffer = collections.deque()
+        self._cond = threading.Condition()
+        self._finished = False
+        self._detached = False
+        self._frames = [] if cache is not None and key is not None else None
+
+        self._thread = threading.Thread(target=self._decode, name='soundboard-decoder', daemon=True)
+        self._thread.start()
+
+    def _decode(self):
+        index = -1
+        try:
+            while True:
+                frame = self.decoder.read()
+                if len(frame) != FRAME_SIZE:
+                    break
+                index += 1
+
+                if self._frames is not None:
+                    self._frames.append(frame)
+                    if not self.cache.accepts(len(self._frames) * FRAME_SIZE):
+                        # Too long to cache, stop collecting
+                        self._frames = None
+                        self.cache.reject(self.key)
+
+                if index < self.first:
+                    continue
+                if self.stop is not None and index >= self.stop:
+                    # Past the segment: let playback finish, keep decoding for the cache
+                    with self._cond:
+                        self._finished = True
+                        self._cond.notify_all()
+                    if self._frames is None:
+                        break
+                    continue
+
+                with self._cond:
+                    if self._detached:
+                        if self._frames is None:
+                            break
+                        continue
+                    while len(self._buffer) >= self.buffer_frames and not self._detached:
+                        self._cond.wait()
+                    if not self._detached:
+                        self._buffer.append(frame)
+                        self._cond.notify_all()
+        except Exception as e:
+            print(f"Decoder for {self.key} failed: {e}")
+            self._frames = None
+        finally:
+            self.decoder.cleanup()
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+        if self._frames:
+            self.cache.put(self.key, self._frames)
+
+    def read(self):
+        with self._cond:
+            while not self._buffer and not self._finished:
+                self._cond.wait()
+            if not self._buffer:
+                return b''
+            frame = self._buffer.popleft()
+            self._cond.notify_all()
+            return frame
+
+    def buffered(self):
+        """Number of decoded frames waiting to be played"""
+        return len(self._buffer)
+
+    def ready(self):
+        """Whether read() would return without waiting for the decoder"""
+        return bool(self._buffer) or self._finished
+
+    def cleanup(self):
+        with self._cond:
+            self._detached = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+
+def iter_decoder(decoder):
+    """PCM frames from an FFmpegPCMAudio until it runs out"""
+    try:
+        while True:
+            frame = decoder.read()
+            if len(frame) != FRAME_SIZE:
+                return
+            yield frame
+    finally:
+        decoder.cleanup()
+
+
+def collect_frames(frames, key, cache):
+    """Pass frames through, storing the complete sound in cache at the end"""
+    collected = []
+    for frame in frames:
+        if collected is not None:
+            collected.append(frame)
+            if not cache.accepts(len(collected) * FRAME_SIZE):
+                collected = None
+                cache.reject(key)
+        yield frame
+    if collected:
+        cache.put(key, collected)
+
+
+class MixerTrack:
+    """One sound inside a MixerSource"""
+
+    __slots__ = ('source', 'key', 'gain', 'level')
+
+    def __init__(self, source, key, gain):
+        self.source = source
+        self.key = key
+        self.gain = gain
+        # Ducking level actually applied, ramped toward its target
+        self.level = 1.0
+
+
+class MixerSource(discord.AudioSource):
+    """A guild's PCM playback, with live volume and optional ducking
+
+    Guild volume, per-sound gain and ducking are read on every 20ms frame,
+    so changing them takes effect mid-sound without restarting the decode.
+    Gain is one ``audioop.mul`` over the whole frame and overlapping sounds
+    are summed with ``audioop.add``, which saturates instead of wrapping.
+
+    Without ducking a new sound replaces the current one, as before. With
+    ``duck_gain`` set, sounds keep playing under newer ones at that gain,
+    ramping over ``ramp_frames`` frames to avoid clicks, and come back up
+    when the newer sounds end.
+    """
+
+    def __init__(self, volume=1.0, duck_gain=None, ramp_frames=5):
+        self.volume = volume
+        self.duck_gain = duck_gain
+        self.ramp_frames = max(1, ramp_frames)
+        self._tracks = []
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def sources(self):
+        return [track.source for track in self._tracks]
+
+    def add(self, source, key=None, gain=1.0):
+        """Start source in this mix; False if the mix already ended and can't take it"""
+        with self._lock:
+            if self._finished:
+                return False
+            if self.duck_gain is None:
+                replaced, self._tracks = self._tracks, []
+            else:
+                replaced = []
+            self._tracks = self._tracks + [MixerTrack(source, key, gain)]
+        for track in replaced:
+            track.source.cleanup()
+        return True
+
+    def set_sound_gain(self, key, gain):
+        for track in self._tracks:
+            if track.key == key:
+                track.gain = gain
+
+    def ready(self):
+        tracks = self._tracks
+        return not tracks or any(getattr(t.source, 'ready', lambda: True)() for t in tracks)
+
+    def read(self):
+        tracks = self._tracks
+        if not tracks and self._finished:
+            return b''
+        if len(tracks) == 1 and tracks[0].level == 1.0:
+            # Common case: one sound, read it directly (waiting on the decoder like before)
+            frame = tracks[0].source.read()
+            return self._ended(tracks) if not frame else self._apply(frame, self.volume * tracks[0].gain)
+
+        mixed, ended = None, []
+        newest = tracks[-1] if tracks else None
+        duck = self.duck_gain
+        ramp_step = (1.0 - duck if duck is not None and duck < 1.0 else 1.0) / self.ramp_frames
+        for track in tracks:
+            target = duck if track is not newest and duck is not None else 1.0
+            if track.level != target:
+                step = min(ramp_step, abs(target - track.level))
+                track.level += step if target > track.level else -step
+            # Another sound's decoder stalling must not hold up the rest of the mix
+            ready = getattr(track.source, 'ready', None)
+            if ready is not None and not ready():
+                continue
+            frame = track.source.read()
+            if not frame:
+                ended.append(track)
+                continue
+            frame = self._apply(frame, self.volume * track.gain * track.level)
+            mixed = frame if mixed is None else audioop.add(mixed, frame, 2)
+
+        if ended:
+            end = self._ended(ended)
+            if mixed is None:
+                return end
+        return SILENCE if mixed is None else mixed
+
+    @staticmethod
+    def _apply(frame, gain):
+        if len(frame) < FRAME_SIZE:
+            frame += SILENCE[len(frame):]
+        return frame if gain == 1.0 else audioop.mul(frame, 2, gain)
+
+    def _ended(self, ended):
+        with self._lock:
+            self._tracks = [t for t in self._tracks if t not in ended]
+            if not self._tracks:
+                self._finished = True
+        for track in ended:
+            track.source.cleanup()
+        # A sound added while the last one was ending keeps the player going
+        return b'' if self._finished else SILENCE
+
+    def detach(self):
+        """Move the sounds still playing to a new mixer, leaving this one ended
+
+        For resuming on another voice client: the old client's player cleans
+        up this mixer when it stops, which no longer touches those sounds.
+        """
+        with self._lock:
+            tracks, self._tracks = self._tracks, []
+            self._finished = True
+        mixer = MixerSource(self.volume, self.duck_gain, self.ramp_frames)
+        mixer._tracks = tracks
+        return mixer
+
+    def cleanup(self):
+        with self._lock:
+            tracks, self._tracks = self._tracks, []
+            self._finished = True
+        for track in tracks:
+            track.source.cleanup()
+
+
+class OpusBroadcast:
+    """Encodes a sound to Opus once and shares the packets with every player
+
+    A background thread encodes ``frames`` (any iterable of PCM frames) into
+    a packet list that only ever grows. Each subscriber is an independent
+    audio source with its own read cursor, so one decode and one encode
+    serve any number of voice sessions, including ones that join later.
+    """
+
+    def __init__(self, frames, key=None, encoder_factory=None, on_finish=None):
+        self.key = key
+        self.packets = []
+        self.nbytes = 0
+        self.finished = False
+        self.failed = False
+        self._frames = frames
+        self._encoder = (encoder_factory or discord.opus.Encoder)()
+        self._on_finish = on_finish
+        self._cond = threading.Condition()
+
+        self._thread = threading.Thread(target=self._encode, name='soundboard-encoder', daemon=True)
+        self._thread.start()
+
+    def _encode(self):
+        try:
+            for frame in self._frames:
+                packet = self._encoder.encode(frame, self._encoder.SAMPLES_PER_FRAME)
+                with self._cond:
+                    self.packets.append(packet)
+                    self.nbytes += len(packet)
+                    self._cond.notify_all()
+        except Exception as e:
+            print(f"Encoder for {self.key} failed: {e}")
+            self.failed = True
+        finally:
+            if self._on_finish is not None:
+                self._on_finish(self)
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def packet(self, index):
+        """Packet at index, waiting for the encoder if needed; None past the end"""
+        with self._cond:
+            while index >= len(self.packets) and not self.finished:
+                self._cond.wait()
+            if index < len(self.packets):
+                return self.packets[index]
+            return None
+
+    def subscribe(self, first=0, stop=None):
+        return BroadcastSubscriber(self, first, stop)
+
+
+class BroadcastSubscriber(discord.AudioSource):
+    """One voice session's cursor into a shared OpusBroadcast, optionally over frames first..stop"""
+
+    def __init__(self, broadcast, first=0, stop=None):
+        self.broadcast = broadcast
+        self.position = first
+        self.stop = stop
+
+    def is_opus(self):
+        return True
+
+    def ready(self):
+        """Whether read() would return without waiting for the encoder"""
+        return self.position < len(self.broadcast.packets) or self.broadcast.finished
+
+    def read(self):
+        if self.stop is not None and self.position >= self.stop:
+            return b''
+        packet = self.broadcast.packet(self.position)
+        if packet is None:
+            return b''
+        self.position += 1
+        return packet
+
+
+class OpusCache:
+    """Byte-bounded LRU of OpusBroadcasts, so concurrent and repeat plays share one encode"""
+
+    def __init__(self, max_bytes, encoder_factory=None):
+        self.max_bytes = max_bytes
+        self.encoder_factory = encoder_factory
+        self.resident_bytes = 0
+        self._entries = collections.OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            broadcast = self._entries.get(key)
+            if broadcast is None or broadcast.failed:
+                return None
+            self._entries.move_to_end(key)
+            return broadcast
+
+    def open(self, key, frames):
+        """The broadcast for key, starting an encode of frames if there is none"""
+        with self._lock:
+            broadcast = self._entries.get(key)
+            if broadcast is not None and not broadcast.failed:
+                self._entries.move_to_end(key)
+                return broadcast
+            broadcast = OpusBroadcast(frames, key=key, encoder_factory=self.encoder_factory,
+                                      on_finish=self._finished)
+            self._entries[key] = broadcast
+            return broadcast
+
+    def _finished(self, broadcast):
+        with self._lock:
+            if self._entries.get(broadcast.key) is not broadcast:
+                return
+            if broadcast.failed:
+                del self._entries[broadcast.key]
+                return
+            self._sizes[broadcast.key] = broadcast.nbytes
+            self.resident_bytes += broadcast.nbytes
+            for key in list(self._entries):
+                if self.resident_bytes <= self.max_bytes or key == broadcast.key:
+                    break
+                if key in self._sizes:
+                    del self._entries[key]
+                    self.resident_bytes -= self._sizes.pop(key)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self.resident_bytes -= self._sizes.pop(key, 0)
+
+    def retain(self, keys):
+        """Drop every entry whose key isn't in keys; returns how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if key not in keys]
+            for key in stale:
+                del self._entries[key]
+                self.resident_bytes -= self._sizes.pop(key, 0)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            for key in self._sizes:
+                del self._entries[key]
+            self._sizes.clear()
+            self.resident_bytes = 0
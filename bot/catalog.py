@@ -0,0 +1,201 @@
+import bisect
+import hashlib
+import os
+import threading
+
+from bot.fuzzy import FuzzyIndex
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_digest(path):
+    """Fingerprint a file by content, so renamed copies share a digest"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SoundEntry:
+    """A file in the sound library"""
+
+    __slots__ = ('name', 'filename', 'path', 'size', 'mtime_ns', 'digest')
+
+    def __init__(self, filename, path, size, mtime_ns, digest):
+        self.name = os.path.splitext(filename)[0]
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+
+
+class NameIndex:
+    """Sorted, case-insensitive index of sound names for prefix completion
+
+    Lookups are two binary searches plus a slice, so completion stays well
+    inside Discord's autocomplete deadline for libraries of any size; adds
+    and removes keep the list sorted in place.
+    """
+
+    def __init__(self):
+        self._keys = []
+
+    def __len__(self):
+        return len(self._keys)
+
+    def copy(self):
+        clone = NameIndex()
+        clone._keys = list(self._keys)
+        return clone
+
+    def add(self, name, filename):
+        key = (name.lower(), filename)
+        index = bisect.bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key:
+            self._keys.insert(index, key)
+
+    def remove(self, name, filename):
+        key = (name.lower(), filename)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def complete(self, prefix, limit=25):
+        """Filenames whose name starts with prefix, alphabetically"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._keys, (prefix,))
+        # Every name with this prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self._keys, (prefix + '\U0010ffff',), lo=start)
+        return [filename for _, filename in self._keys[start:min(end, start + limit)]]
+
+
+class SoundCatalog:
+    """Index of the sounds directory by filename, name and content digest
+
+    Files are only re-hashed when their size or mtime changes, so rescans of
+    a large library are cheap. Identical audio uploaded under different names
+    shares a digest, which is what the playback cache is keyed by.
+    """
+
+    def __init__(self, sounds_dir):
+        self.sounds_dir = sounds_dir
+        self._by_filename = {}
+        self._by_path = {}
+        self._by_digest = {}
+        self.names = NameIndex()
+        self.fuzzy = FuzzyIndex()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_filename)
+
+    def __iter__(self):
+        return iter(list(self._by_filename.values()))
+
+    def get(self, filename):
+        return self._by_filename.get(filename)
+
+    def find(self, name):
+        """Entry by exact filename, or by name ignoring case and extension"""
+        entry = self._by_filename.get(name)
+        if entry is not None:
+            return entry
+        for filename in self.names.complete(name, limit=10):
+            entry = self._by_filename.get(filename)
+            if entry is not None and entry.name.lower() == name.lower():
+                return entry
+        return None
+
+    def digests(self):
+        return set(self._by_digest)
+
+    def copy(self):
+        """Independent catalog with the same entries, so a rescan can run beside this one"""
+        clone = SoundCatalog(self.sounds_dir)
+        with self._lock:
+            clone._by_filename = dict(self._by_filename)
+            clone._by_path = dict(self._by_path)
+            clone._by_digest = {digest: list(entries) for digest, entries in self._by_digest.items()}
+            clone.names = self.names.copy()
+            clone.fuzzy = self.fuzzy.copy()
+        return clone
+
+    def cache_key(self, path):
+        """Key to cache a sound's decoded frames under"""
+        entry = self._by_path.get(os.path.normpath(path))
+        return entry.digest if entry is not None else path
+
+    def scan(self):
+        """Rescan the sounds directory; returns (added, removed) filenames"""
+        try:
+            filenames = [f for f in os.listdir(self.sounds_dir)
+                         if f.lower().endswith(AUDIO_EXTENSIONS)]
+        except FileNotFoundError:
+            filenames = []
+
+        added = []
+        for filename in filenames:
+            if self.add_file(filename):
+                added.append(filename)
+
+        present = set(filenames)
+        removed = [f for f in list(self._by_filename) if f not in present]
+        for filename in removed:
+            self.remove_file(filename)
+        return added, removed
+
+    def add_file(self, filename):
+        """Index one file, reusing its digest if unchanged; True if new or changed"""
+        path = os.path.normpath(os.path.join(self.sounds_dir, filename))
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.remove_file(filename)
+            return False
+
+        current = self._by_filename.get(filename)
+        if current is not None and current.size == st.st_size and current.mtime_ns == st.st_mtime_ns:
+            return False
+
+        entry = SoundEntry(filename, path, st.st_size, st.st_mtime_ns, content_digest(path))
+        with self._lock:
+            self._unindex(filename)
+            self._by_filename[filename] = entry
+            self._by_path[path] = entry
+            self._by_digest.setdefault(entry.digest, []).append(entry)
+            self.names.add(entry.name, filename)
+            self.fuzzy.add(entry.name, filename)
+        return True
+
+    def remove_file(self, filename):
+        """Drop a file; returns its digest if no other file shares it"""
+        with self._lock:
+            entry = self._unindex(filename)
+        if entry is None or entry.digest in self._by_digest:
+            return None
+        return entry.digest
+
+    def _unindex(self, filename):
+        entry = self._by_filename.pop(filename, None)
+        if entry is None:
+            return None
+        self._by_path.pop(entry.path, None)
+        self.names.remove(entry.name, filename)
+        self.fuzzy.remove(filename)
+        same = [e for e in self._by_digest.get(entry.digest, []) if e is not entry]
+        if same:
+            self._by_digest[entry.digest] = same
+        else:
+            self._by_digest.pop(entry.digest, None)
+        return entry
+
+    def duplicates(self):
+        """Filenames grouped by digest, for digests shared by several files"""
+        return {
+            digest: sorted(e.filename for e in entries)
+            for digest, entries in self._by_digest.items()
+            if len(entries) > 1
+        }
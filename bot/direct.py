@@ -0,0 +1,128 @@
+import hmac
+import json
+import time
+
+from aiohttp import web, WSMsgType
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class DirectTriggerServer:
+    """Optional HTTP/WebSocket endpoint for trusted local clients
+
+    Hotkey clients that already know the guild and sound filename can send
+    play commands straight to the bot instead of going through the backend's
+    /api/play relay and Socket.io broadcast. The backend stays the control
+    plane; this only shortcuts the play path.
+
+    With a token set, requests must send ``Authorization: Bearer <token>``
+    (or ``?token=`` for WebSockets). Without one, only loopback clients are
+    accepted. Either way, browsers always send ``Origin``, so a request
+    carrying one is refused unless it's in ``allowed_origins``; that keeps
+    web pages from posting plays cross-site, while non-browser clients send
+    none. Allowed origins also get CORS headers and preflight answers.
+    """
+
+    def __init__(self, soundboard, host='127.0.0.1', port=3060, token=None, allowed_origins=()):
+        self.soundboard = soundboard
+        self.host = host
+        self.port = port
+        self.token = token
+        self.allowed_origins = frozenset(allowed_origins)
+        self.runner = None
+
+        self.app = web.Application(middlewares=[self.cors])
+        self.app.router.add_post('/play', self.handle_play)
+        self.app.router.add_route('OPTIONS', '/play', self.handle_preflight)
+        self.app.router.add_get('/ws', self.handle_ws)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        print(f"⚡ Direct trigger endpoint listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def origin_allowed(self, request):
+        origin = request.headers.get('Origin')
+        return origin is None or origin in self.allowed_origins
+
+    @web.middleware
+    async def cors(self, request, handler):
+        """Refuse unlisted browser origins; let listed ones read the reply"""
+        if not self.origin_allowed(request):
+            return web.json_response({'error': 'Origin not allowed'}, status=403)
+        response = await handler(request)
+        if 'Origin' in request.headers:
+            response.headers['Access-Control-Allow-Origin'] = request.headers['Origin']
+            response.headers['Vary'] = 'Origin'
+        return response
+
+    async def handle_preflight(self, request):
+        return web.Response(status=204, headers={
+            'Access-Control-Allow-Methods': 'POST',
+            'Access-Control-Allow-Headers': 'Authorization, Content-Type',
+            'Access-Control-Max-Age': '600'
+        })
+
+    def authorized(self, request):
+        if not self.token:
+            return request.remote in LOOPBACK_ADDRESSES
+        supplied = request.query.get('token', '')
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            supplied = header[len('Bearer '):]
+        return hmac.compare_digest(supplied, self.token)
+
+    async def play(self, command):
+        """Run one play command; returns the JSON reply"""
+        if not isinstance(command, dict):
+            return {'success': False, 'error': 'Expected a JSON object'}
+        sound = command.get('sound')
+        if not sound:
+            return {'success': False, 'error': 'Sound name required'}
+
+        started = time.perf_counter()
+        success = await self.soundboard.dispatch_play(command, 'direct')
+        return {
+            'success': success,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def handle_play(self, request):
+        if not self.authorized(request):
+            return web.json_response({'error': 'Unauthorized'}, status=401)
+        try:
+            command = await request.json()
+        except ValueError:
+            return web.json_response({'error': 'Invalid JSON'}, status=400)
+
+        reply = await self.play(command)
+        status = 200 if reply['success'] else 400 if 'error' in reply else 409
+        return web.json_response(reply, status=status)
+
+    async def handle_ws(self, request):
+        """Persistent connection: one JSON play command per message"""
+        if not self.authorized(request):
+            return web.json_response({'error': 'Unauthorized'}, status=401)
+
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                command = json.loads(msg.data)
+            except ValueError:
+                await ws.send_json({'success': False, 'error': 'Invalid JSON'})
+                continue
+            reply = await self.play(command)
+            if isinstance(command, dict) and 'id' in command:
+                reply['id'] = command['id']
+            await ws.send_json(reply)
+        return ws
@@ -0,0 +1,177 @@
+import os
+import re
+
+# Anything str.isalnum() rejects, so names in any script keep their letters
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def normalize(name):
+    """Lowercase, with runs of punctuation, dashes and underscores as one space"""
+    return _SEPARATORS.sub(' ', name.lower()).strip()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit
+
+    Only the diagonal band of width 2 * limit + 1 is computed; any cell
+    outside it is already more than limit edits away.
+    """
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [over] * (len(b) + 1)
+        current[0] = row_min = i if i <= limit else over
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+class FuzzyIndex:
+    """Trigram index over sound names for resolving near-miss requests
+
+    Candidates are the names sharing the most trigrams with the query; only
+    those few are scored by edit distance. Trigrams found in more than
+    stop_df names (like "sou" in a library of "sound N effect" files) are
+    too common to tell names apart and aren't walked; candidates come from
+    the query's rarer trigrams. A query made only of common trigrams is
+    narrowed by length instead, since a match can't differ in length by
+    more than the allowed distance. Either way a lookup touches a bounded
+    number of names, however large the library.
+    """
+
+    def __init__(self, candidates=20, stop_df=200):
+        self.candidates = candidates
+        self.stop_df = stop_df
+        self._names = {}
+        self._grams = {}
+        self._lengths = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def copy(self):
+        clone = FuzzyIndex(self.candidates, self.stop_df)
+        clone._names = dict(self._names)
+        clone._grams = {gram: set(filenames) for gram, filenames in self._grams.items()}
+        clone._lengths = {length: set(filenames) for length, filenames in self._lengths.items()}
+        return clone
+
+    @classmethod
+    def from_directory(cls, directory, extensions):
+        index = cls()
+        try:
+            filenames = os.listdir(directory)
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            name, ext = os.path.splitext(filename)
+            if ext.lower() in extensions:
+                index.add(name, filename)
+        return index
+
+    def add(self, name, filename):
+        self.remove(filename)
+        key = normalize(name)
+        self._names[filename] = key
+        self._lengths.setdefault(len(key), set()).add(filename)
+        for gram in trigrams(key):
+            self._grams.setdefault(gram, set()).add(filename)
+
+    def remove(self, filename):
+        key = self._names.pop(filename, None)
+        if key is None:
+            return
+        same_length = self._lengths.get(len(key))
+        if same_length is not None:
+            same_length.discard(filename)
+            if not same_length:
+                del self._lengths[len(key)]
+        for gram in trigrams(key):
+            filenames = self._grams.get(gram)
+            if filenames is not None:
+                filenames.discard(filename)
+                if not filenames:
+                    del self._grams[gram]
+
+    def matches(self, query, limit=3):
+        """Up to limit (filename, distance) pairs close enough to query, best first"""
+        key = normalize(query)
+        if not key:
+            return []
+        # Allow roughly one typo per three characters
+        max_distance = max(1, len(key) // 3)
+
+        grams = trigrams(key)
+        postings = [self._grams[gram] for gram in grams if gram in self._grams]
+        rare = [filenames for filenames in postings if len(filenames) <= self.stop_df]
+        common = [filenames for filenames in postings if len(filenames) > self.stop_df]
+
+        shared = {}
+        if rare:
+            for filenames in rare:
+                for filename in filenames:
+                    shared[filename] = shared.get(filename, 0) + 1
+            by_count = {}
+            for filename, count in shared.items():
+                by_count.setdefault(count, []).append(filename)
+            pool = []
+            for count in sorted(by_count, reverse=True):
+                pool.extend(sorted(by_count[count]))
+                if len(pool) >= self.candidates:
+                    break
+        elif common:
+            # Nearest lengths first: they need the fewest edits
+            pool = []
+            for offset in sorted(range(-max_distance, max_distance + 1), key=abs):
+                pool.extend(sorted(self._lengths.get(len(key) + offset, ())))
+                if len(pool) >= self.candidates:
+                    break
+        else:
+            return []
+        # Common trigrams only break ties among the few candidates left
+        pool = pool[:self.candidates]
+        for filename in pool:
+            shared[filename] = shared.get(filename, 0) + sum(filename in filenames for filenames in common)
+        ranked = sorted(pool, key=lambda f: (-shared[f], f))
+
+        scored = []
+        bound = max_distance
+        for filename in ranked:
+            name = self._names[filename]
+            # An edit changes at most three trigrams, so each trigram one side lacks is a third of an edit
+            if max(len(grams), len(trigrams(name))) - shared[filename] > 3 * bound:
+                continue
+            distance = edit_distance(key, name, bound)
+            if distance <= bound:
+                scored.append((distance, -shared[filename], filename))
+                if len(scored) >= limit:
+                    # Later candidates share fewer trigrams, so they'd lose a tie
+                    scored.sort()
+                    del scored[limit:]
+                    bound = scored[-1][0] - 1
+                    if bound < 0:
+                        break
+        scored.sort()
+        return [(filename, distance) for distance, _, filename in scored[:limit]]
+
+    def closest(self, query):
+        """Best matching filename, or None"""
+        found = self.matches(query, limit=1)
+        return found[0][0] if found else None
@@ -0,0 +1,195 @@
+"""
+Bulk-import a sound pack (a .zip or .tar archive, or a directory) into the library.
+
+    python -m bot.importer pack.zip
+    python -m bot.importer ~/packs/memes --dry-run
+
+Files are checked (audio extension, size limit, hidden and resource-fork
+files skipped), renamed with the same rule as dashboard uploads and
+hashed in parallel. Sounds whose contents are already in the library, or
+earlier in the pack, are skipped. The rest are moved into place and the
+backend is told in batches small enough for its request size limit: it
+sends one sounds_imported event per batch, and the bot indexes each batch
+and analyzes it across INGEST_WORKERS threads.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tarfile
+import tempfile
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.catalog import AUDIO_EXTENSIONS, content_digest
+
+# Same limit as /api/sounds/upload
+MAX_SOUND_BYTES = 10 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+# Filenames per /api/sounds/imported request; even at 255 characters each
+# this stays well under the backend's 100kb JSON body limit
+NOTIFY_BATCH_SIZE = 200
+_UNSAFE = re.compile(r'[^a-zA-Z0-9.-]')
+
+
+def safe_name(member):
+    """Library filename for a pack member, or None if it shouldn't be imported"""
+    parts = re.split(r'[\\/]', member)
+    filename = parts[-1]
+    if not filename or filename.startswith('.') or '__MACOSX' in parts:
+        return None
+    if not filename.lower().endswith(AUDIO_EXTENSIONS):
+        return None
+    return _UNSAFE.sub('_', filename)
+
+
+def iter_pack(path):
+    """(member name, declared size, open function) for each file in a pack"""
+    if os.path.isdir(path):
+        for root, _, filenames in os.walk(path):
+            for filename in sorted(filenames):
+                full = os.path.join(root, filename)
+                yield os.path.relpath(full, path), os.path.getsize(full), lambda full=full: open(full, 'rb')
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as pack:
+            for info in pack.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, lambda info=info: pack.open(info)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as pack:
+            for info in pack:
+                # Links and devices are never extracted
+                if info.isfile():
+                    yield info.name, info.size, lambda info=info: pack.extractfile(info)
+    else:
+        raise ValueError(f"{path} is not a directory, zip or tar archive")
+
+
+def copy_limited(src, dst, limit):
+    """Bytes copied, or None once src passes limit (archive sizes can lie)"""
+    copied = 0
+    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b''):
+        copied += len(chunk)
+        if copied > limit:
+            return None
+        dst.write(chunk)
+    return copied
+
+
+def unused_name(filename, taken):
+    name, ext = os.path.splitext(filename)
+    candidate, n = filename, 1
+    while candidate.lower() in taken:
+        n += 1
+        candidate = f'{name}-{n}{ext}'
+    return candidate
+
+
+def library_files(sounds_dir):
+    try:
+        return [f for f in os.listdir(sounds_dir) if f.lower().endswith(AUDIO_EXTENSIONS)]
+    except FileNotFoundError:
+        return []
+
+
+def import_pack(path, sounds_dir, max_bytes=MAX_SOUND_BYTES, workers=None, dry_run=False):
+    """Copy new sounds from a pack into sounds_dir
+
+    Returns {'imported': [filename], 'skipped': [(member, reason)]}.
+    Members are staged in a temporary directory inside sounds_dir and
+    renamed into place, so the bot and backend never see partial files.
+    """
+    os.makedirs(sounds_dir, exist_ok=True)
+    imported, skipped, staged = [], [], []
+
+    with tempfile.TemporaryDirectory(prefix='.import-', dir=sounds_dir) as staging, \
+            ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 2) as pool:
+        library = library_files(sounds_dir)
+        # The existing library hashes while the pack is being read
+        existing = [pool.submit(content_digest, os.path.join(sounds_dir, f)) for f in library]
+
+        # Archives are read sequentially; hashing below is what fans out
+        for member, size, open_member in iter_pack(path):
+            filename = safe_name(member)
+            if filename is None:
+                skipped.append((member, 'not a sound'))
+                continue
+            if size > max_bytes:
+                skipped.append((member, 'too large'))
+                continue
+            temp = os.path.join(staging, str(len(staged)))
+            with open_member() as src, open(temp, 'wb') as dst:
+                copied = copy_limited(src, dst, max_bytes)
+            if not copied:
+                skipped.append((member, 'empty' if copied == 0 else 'too large'))
+                continue
+            staged.append((member, filename, temp))
+
+        digests = list(pool.map(content_digest, [temp for _, _, temp in staged]))
+        seen = {future.result() for future in existing}
+        taken = {f.lower() for f in library}
+        for (member, filename, temp), digest in zip(staged, digests):
+            if digest in seen:
+                skipped.append((member, 'duplicate'))
+                continue
+            seen.add(digest)
+            filename = unused_name(filename, taken)
+            taken.add(filename.lower())
+            if not dry_run:
+                os.replace(temp, os.path.join(sounds_dir, filename))
+            imported.append(filename)
+
+    return {'imported': imported, 'skipped': skipped}
+
+
+def notify_backend(backend_url, filenames, timeout=30, batch_size=NOTIFY_BATCH_SIZE):
+    """Announce imported files to the backend, batch_size per request; returns how many it listed"""
+    count = 0
+    for start in range(0, len(filenames), batch_size):
+        request = urllib.request.Request(
+            f'{backend_url}/api/sounds/imported',
+            data=json.dumps({'sounds': filenames[start:start + batch_size]}).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            count += json.load(resp).get('count', 0)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pack', help='zip or tar archive, or a directory of sounds')
+    parser.add_argument('--sounds-dir', default=os.getenv('BOT_SOUNDS_DIR', 'sounds'))
+    parser.add_argument('--backend-url', default=os.getenv('BACKEND_URL', 'http://localhost:3001'))
+    parser.add_argument('--workers', type=int, help='hashing threads (default: one per core)')
+    parser.add_argument('--max-mb', type=float, default=MAX_SOUND_BYTES / 1024 / 1024, help='largest sound to accept')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be imported')
+    args = parser.parse_args()
+
+    try:
+        result = import_pack(args.pack, args.sounds_dir, int(args.max_mb * 1024 * 1024), args.workers, args.dry_run)
+    except (OSError, ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+        sys.exit(f"❌ Import failed: {e}")
+
+    for member, reason in result['skipped']:
+        print(f"⏭️  {member}: {reason}")
+    print(f"📦 {'Would import' if args.dry_run else 'Imported'} {len(result['imported'])} sounds, "
+          f"skipped {len(result['skipped'])}")
+
+    if result['imported'] and not args.dry_run:
+        try:
+            notify_backend(args.backend_url, result['imported'])
+            print("📡 Backend notified")
+        except OSError as e:
+            print(f"Failed to notify backend ({e}); the bot will pick the files up on its next !reload")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,52 +1,264 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 import os
 import asyncio
+import time
 import aiohttp
 import ctypes.util
+import math
+import re
+import signal
+from concurrent.futures import ThreadPoolExecutor
+import sys
 import socketio
 from dotenv import load_dotenv
 
+# Allow running as a script (python bot/main.py) as well as a package module
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.audio import (FRAME_DURATION, frame_span, FrameCache, CachedSource, StreamingSource, OpusCache,
+                       collect_frames, iter_decoder)
+from bot.sessions import VoiceSession, SessionRegistry, backoff_delay
+from bot.catalog import AUDIO_EXTENSIONS, SoundCatalog
+from bot.metadata import MetadataStore, analyze
+from bot.trace import TraceRecorder, elapsed_ms
+from bot.metrics import MetricsRegistry, http_trace_config, monitor_loop_lag
+# Optional features (direct trigger, metrics endpoint, analytics, pacing) import
+# their modules when enabled, keeping aiohttp.web and sqlite3 off the startup path
+
 load_dotenv()
 
-# Ensure opus is loaded for voice functionality
-if not discord.opus.is_loaded():
+
+def load_opus():
+    """Ensure opus is loaded for voice functionality
+
+    find_library may shell out to ldconfig or a compiler, so this runs in a
+    worker thread during startup rather than at import.
+    """
+    if discord.opus.is_loaded():
+        return True
     opus_lib = ctypes.util.find_library('opus')
     if opus_lib:
         discord.opus.load_opus(opus_lib)
         print(f"Opus loaded: {discord.opus.is_loaded()}")
     else:
         print("Warning: Opus library not found! Voice functionality may not work.")
+    return discord.opus.is_loaded()
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.voice_states = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Multi-worker deployments run one process per shard (or per token)
+shard_options = {}
+if os.getenv('BOT_SHARD_COUNT'):
+    shard_options = {
+        'shard_id': int(os.getenv('BOT_SHARD_ID', '0')),
+        'shard_count': int(os.getenv('BOT_SHARD_COUNT'))
+    }
+
+bot = commands.Bot(command_prefix='!', intents=intents, **shard_options)
 
 class SoundboardBot:
     def __init__(self):
-        self.voice_clients = {}
+        self.sessions = SessionRegistry()
         self.backend_url = os.getenv('BACKEND_URL', 'http://localhost:3001')
+        # Identifies this process when several bot workers share one backend
+        self.worker_id = os.getenv('BOT_WORKER_ID', 'default')
+        # Guild ids the backend routes here; None until it first says
+        self.owned_guilds = None
         # Enable mock mode for WSL2/environments where voice doesn't work
         self.mock_mode = os.getenv('BOT_MOCK_VOICE', 'false').lower() == 'true'
         print(f"🔧 SoundboardBot initialized:", flush=True)
         print(f"   Backend URL: {self.backend_url}", flush=True)
+        print(f"   Worker ID: {self.worker_id}", flush=True)
         print(f"   Mock Mode: {self.mock_mode}", flush=True)
         print(f"   BOT_MOCK_VOICE env var: '{os.getenv('BOT_MOCK_VOICE', 'NOT_SET')}'", flush=True)
         if self.mock_mode:
             print("🎭 Mock voice mode is ENABLED - voice connections will be simulated", flush=True)
 
+        # Sound library, fingerprinted by content so duplicates share cache entries
+        self.sounds_dir = os.getenv('BOT_SOUNDS_DIR', 'sounds')
+        self.catalog = SoundCatalog(self.sounds_dir)
+        # Optional: fetch sounds from the backend's /sounds route when the bot doesn't
+        # share its disk; sounds_dir is then a bounded cache of the sounds played
+        self.remote = None
+        sounds_url = os.getenv('BOT_SOUNDS_URL')
+        if sounds_url:
+            from bot.remote import RemoteSoundCache
+            self.remote = RemoteSoundCache(
+                sounds_url, self.sounds_dir,
+                int(os.getenv('REMOTE_SOUND_CACHE_MB', '1024')) * 1024 * 1024,
+                revalidate_seconds=float(os.getenv('REMOTE_SOUND_REVALIDATE_SECONDS', '300')),
+                on_download=self.remote_downloaded,
+                on_evict=self.remote_evicted
+            )
+        # Duration, layout, loudness and waveform peaks, computed once per digest
+        self.metadata = MetadataStore(os.getenv('BOT_METADATA_FILE', os.path.join(self.sounds_dir, '.metadata.json')))
+        self.ingest_workers = int(os.getenv('INGEST_WORKERS', str(os.cpu_count() or 2)))
+        # About 1KB per sound with its waveform peaks; batches stay well under the backend's 100kb body limit
+        self.metadata_batch_size = int(os.getenv('METADATA_BATCH_SIZE', '50'))
+        self.ingest_task = None
+        # Startup work that doesn't need the Discord gateway (see startup())
+        self.startup_task = None
+        self.startup_seconds = None
+
+        # Decoded PCM frames of recently played sounds, so replays skip ffmpeg
+        cache_mb = int(os.getenv('SOUND_CACHE_MB', '256'))
+        entry_mb = int(os.getenv('SOUND_CACHE_ENTRY_MB', '64'))
+        self.frame_cache = FrameCache(cache_mb * 1024 * 1024, entry_mb * 1024 * 1024)
+        self.stream_buffer_frames = int(os.getenv('STREAM_BUFFER_FRAMES', '50'))
+        # Opus packets encoded once and shared by every guild playing the same sound
+        self.opus_cache = OpusCache(int(os.getenv('OPUS_CACHE_MB', '64')) * 1024 * 1024)
+
+        # Guild roster is synced in pages, then kept current with versioned events.
+        # Versions start from wall-clock ms so a restarted bot supersedes the old one.
+        self.guild_sync_page_size = int(os.getenv('GUILD_SYNC_PAGE_SIZE', '200'))
+        self.roster_version = int(time.time() * 1000)
+
+        # Optional low-latency play endpoint for trusted local clients
+        self.direct_server = None
+        # Near-miss sound names: 'auto' plays the closest match, 'suggest' only names it, 'off'
+        self.fuzzy_mode = os.getenv('FUZZY_PLAY_MODE', 'suggest').lower()
+        # Per-guild playback settings ({'volume', 'ducking'}), kept across reconnects,
+        # and the gain older sounds drop to under newer ones when ducking is on
+        self.guild_audio = {}
+        self.duck_gain = float(os.getenv('DUCK_GAIN', '0.3'))
+        self.max_volume = float(os.getenv('MAX_VOLUME', '2.0'))
+        # /play is registered with Discord once per process
+        self.sync_app_commands = os.getenv('SYNC_APP_COMMANDS', 'true').lower() == 'true'
+        self.app_commands_synced = False
+
+        # Optional record of every play request, for offline replay (bot/replay.py)
+        trace_file = os.getenv('BOT_TRACE_FILE')
+        # How far ahead synchronized plays may be scheduled
+        self.max_schedule_ahead = float(os.getenv('MAX_SCHEDULE_AHEAD_SECONDS', '300'))
+        self.trace = TraceRecorder(trace_file) if trace_file else None
+
+        # Play history in SQLite (opened at startup); the most played sounds
+        # are decoded into the caches ahead of demand
+        self.analytics_path = os.getenv('BOT_ANALYTICS_DB', os.path.join(self.sounds_dir, '.analytics.db'))
+        self.analytics = None
+        self.cache_warm_top_k = int(os.getenv('CACHE_WARM_TOP_K', '20'))
+        self.cache_warm_interval = float(os.getenv('CACHE_WARM_INTERVAL_SECONDS', '900'))
+        self.cache_warm_window = float(os.getenv('CACHE_WARM_WINDOW_DAYS', '7')) * 86400
+        self.warm_task = None
+        # Hotkeys by id; sounds bound to enabled ones stay pinned in the frame cache
+        self.hotkeys = {}
+        self.prefetching = set()
+        self.reload_lock = asyncio.Lock()
+        # Files added or removed while a reload rescans, re-checked before its catalog is swapped in
+        self.reload_touched = None
+
+        # Dropped voice connections are retried with jittered exponential backoff
+        self.voice_retry_attempts = int(os.getenv('VOICE_RECONNECT_ATTEMPTS', '8'))
+        self.voice_retry_base = float(os.getenv('VOICE_RECONNECT_BASE_SECONDS', '1'))
+        self.voice_retry_cap = float(os.getenv('VOICE_RECONNECT_MAX_SECONDS', '60'))
+        self.reconnect_tasks = {}
+
+        # Optional: pace every session's audio from PACING_THREADS shared threads
+        # instead of one discord.py player thread per voice client
+        pacing_threads = int(os.getenv('PACING_THREADS', '0'))
+        self.pacing = None
+        if pacing_threads > 0:
+            from bot.pacing import PacingEngine
+            self.pacing = PacingEngine(pacing_threads)
+
+        # Counters and latency histograms, served on METRICS_PORT when set
+        self.metrics = MetricsRegistry()
+        self.setup_metrics()
+        self.metrics_server = None
+        self.lag_task = None
+
         # Initialize Socket.io client for backend communication
         self.sio = socketio.AsyncClient()
         self.setup_socketio_handlers()
 
+    def setup_metrics(self):
+        """Register the bot's metrics; gauges are computed when scraped"""
+        m = self.metrics
+        self.plays_total = m.counter('soundboard_plays_total', 'Play requests by outcome and trigger source',
+                                     ('outcome', 'source'))
+        self.stage_seconds = m.histogram('soundboard_play_stage_seconds', 'Time spent in each play stage',
+                                         ('stage',))
+        m.gauge('soundboard_voice_sessions', 'Active voice sessions', ('mode',), func=lambda: {
+            'mock': sum(1 for s in self.sessions if self.mock_mode or s.mock),
+            'live': sum(1 for s in self.sessions if not (self.mock_mode or s.mock)),
+        })
+        m.counter('soundboard_frame_cache_lookups_total', 'Decoded frame cache lookups by result', ('result',),
+                  func=lambda: {'hit': self.frame_cache.hits, 'miss': self.frame_cache.misses})
+        m.gauge('soundboard_frame_cache_hit_ratio', 'Share of frame cache lookups that hit',
+                func=lambda: self.frame_cache.hits / max(1, self.frame_cache.hits + self.frame_cache.misses))
+        m.gauge('soundboard_cache_resident_bytes', 'Bytes held by the audio caches', ('cache',), func=lambda: {
+            'pcm': self.frame_cache.resident_bytes,
+            'opus': self.opus_cache.resident_bytes,
+        })
+        m.gauge('soundboard_analytics_queue_depth', 'Play records waiting for the analytics writer',
+                func=lambda: self.analytics.pending() if self.analytics is not None else 0)
+        m.counter('soundboard_analytics_dropped_total', 'Play records dropped because the analytics queue was full',
+                  func=lambda: self.analytics.dropped if self.analytics is not None else 0)
+        m.gauge('soundboard_stream_buffered_frames', 'Decoded frames buffered ahead of playback by guild',
+                ('guild',), func=lambda: {
+                    str(s.guild_id): sum(source.buffered() for source in s.mixer.sources()
+                                         if isinstance(source, StreamingSource))
+                    for s in self.sessions if s.mixer is not None
+                })
+        m.gauge('soundboard_mixer_tracks', 'Sounds mixing in each voice session', ('guild',), func=lambda: {
+            str(s.guild_id): len(s.mixer.sources()) if s.mixer is not None else 0 for s in self.sessions
+        })
+        self.backend_connects = m.counter('soundboard_backend_connects_total', 'Socket.io connections to the backend')
+        self.backend_reconnects = m.counter('soundboard_backend_reconnects_total',
+                                            'Socket.io connections after the first one')
+        self.loop_lag = m.histogram('soundboard_event_loop_lag_seconds', 'How late the event loop runs timers')
+        self.loop_lag_last = m.gauge('soundboard_event_loop_lag_last_seconds', 'Most recent event loop lag sample')
+        self.voice_recovery = m.histogram('soundboard_voice_recovery_seconds',
+                                          'Time from a dropped voice connection to its resume',
+                                          buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+        self.voice_reconnects = m.counter('soundboard_voice_reconnects_total',
+                                          'Voice reconnect attempts by result', ('result',))
+        self.backend_latency = m.histogram('soundboard_backend_request_seconds', 'Backend HTTP request latency',
+                                           ('method', 'path'))
+        self.backend_errors = m.counter('soundboard_backend_request_errors_total', 'Backend HTTP requests that failed',
+                                        ('method', 'path'))
+        self.http_trace = http_trace_config(self.backend_latency, self.backend_errors)
+        if self.remote is not None:
+            m.counter('soundboard_remote_sound_fetches_total', 'Remote sound lookups by result', ('result',),
+                      func=lambda: dict(self.remote.results))
+            m.gauge('soundboard_remote_sound_cache_bytes', 'Bytes of remote sounds cached on local disk',
+                    func=lambda: self.remote.resident_bytes)
+        if self.pacing is not None:
+            loops = self.pacing.loops
+            m.gauge('soundboard_pacing_streams', 'Sounds being paced by the shared engine',
+                    func=self.pacing.active)
+            m.counter('soundboard_pacing_late_ticks_total', 'Pacing ticks that overran their 20ms slot',
+                      func=lambda: sum(loop.late_ticks for loop in loops))
+            m.counter('soundboard_pacing_underruns_total', 'Frames skipped because a source was not ready',
+                      func=lambda: sum(loop.underruns for loop in loops))
+
+    def backend_session(self):
+        """HTTP session for backend calls, timed into the backend latency histogram"""
+        return aiohttp.ClientSession(trace_configs=[self.http_trace])
+
     def setup_socketio_handlers(self):
         """Setup Socket.io event handlers"""
         @self.sio.event
         async def connect():
             print("🔌 Connected to backend via Socket.io")
+            if self.backend_connects.value() > 0:
+                self.backend_reconnects.inc()
+            self.backend_connects.inc()
+            await self.register_with_backend()
+            await self.update_voice_status()
+            await self.sync_hotkeys()
+
+        @self.sio.event
+        async def ownership(data):
+            """Guilds the backend routes to this worker after a rebalance"""
+            self.owned_guilds = set(data.get('guild_ids', []))
+            print(f"🧭 Worker {self.worker_id} now owns {len(self.owned_guilds)} guilds")
 
         @self.sio.event
         async def disconnect():
@@ -62,38 +274,781 @@ class SoundboardBot:
             if not sound_name:
                 print("❌ No sound name provided in play_sound event")
                 return
+            data = self.owned_share(data)
+            if data is None:
+                return
 
-            # Find the first available guild with voice connection
-            guild_id = None
-            for gid in self.voice_clients:
-                guild_id = gid
-                break
+            await self.dispatch_play(await self.resolve_request(data), triggered_by)
 
-            if not guild_id:
-                print("❌ No voice connections available to play sound")
+        @self.sio.event
+        async def bot_command(data):
+            """Handle join/leave/play commands routed from dashboards"""
+            command = data.get('command')
+            guild_id = data.get('guild_id')
+            print(f"🎛️ Received bot_command: {command} (guild: {guild_id})")
+            data = self.owned_share(data)
+            if data is None:
                 return
+            try:
+                if command == 'play' and data.get('sound'):
+                    await self.dispatch_play(await self.resolve_request(data), data.get('triggered_by', 'dashboard'))
+                elif command == 'join' and guild_id and data.get('channel_id'):
+                    await self.connect_to_voice(int(guild_id), int(data['channel_id']))
+                elif command == 'leave' and guild_id:
+                    await self.disconnect_from_voice(int(guild_id))
+            except (TypeError, ValueError):
+                print(f"❌ Invalid bot_command payload: {data}")
 
-            # Construct sound path
-            sound_path = f"sounds/{sound_name}"
-            if not os.path.exists(sound_path):
-                print(f"❌ Sound file not found: {sound_path}")
-                return
+        @self.sio.event
+        async def set_volume(data):
+            """Change a guild's volume, including for sounds already playing"""
+            try:
+                self.set_volume(int(data['guild_id']), float(data['volume']))
+            except (KeyError, TypeError, ValueError):
+                print(f"❌ Invalid set_volume payload: {data}")
+
+        @self.sio.event
+        async def set_ducking(data):
+            try:
+                self.set_ducking(int(data['guild_id']), bool(data.get('enabled')))
+            except (KeyError, TypeError, ValueError):
+                print(f"❌ Invalid set_ducking payload: {data}")
+
+        @self.sio.event
+        async def set_sound_volume(data):
+            try:
+                await self.set_sound_volume(data['sound'], float(data['volume']))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"❌ Invalid set_sound_volume payload {data}: {e}")
+
+        @self.sio.event
+        async def sound_added(data):
+            """Fingerprint newly uploaded sounds"""
+            filename = data.get('filename')
+            if filename:
+                await self.new_sounds([filename])
+
+        @self.sio.event
+        async def sounds_imported(sounds):
+            """Index a bulk import in one pass instead of one event per file"""
+            await self.new_sounds([s['filename'] for s in sounds if s.get('filename')])
+
+        @self.sio.event
+        async def sound_deleted(filename):
+            """Forget deleted sounds and free their cache entry if unshared"""
+            if self.remote is not None:
+                await self.remote.remove(filename)
+            self.touch([filename])
+            digest = self.catalog.remove_file(filename)
+            if digest is not None:
+                self.frame_cache.discard(digest)
+                self.opus_cache.discard(digest)
+
+        @self.sio.event
+        async def hotkey_added(hotkey):
+            self.hotkeys[hotkey['id']] = hotkey
+            self.refresh_pins()
+
+        @self.sio.event
+        async def hotkey_updated(hotkey):
+            self.hotkeys[hotkey['id']] = hotkey
+            self.refresh_pins()
+
+        @self.sio.event
+        async def hotkey_deleted(hotkey_id):
+            if self.hotkeys.pop(hotkey_id, None) is not None:
+                self.refresh_pins()
+
+    async def new_sounds(self, filenames):
+        """Sounds added on the backend: indexed from the shared disk, or fetched ahead of their first play"""
+        if self.remote is not None:
+            # Downloads are indexed by remote_downloaded; unchanged copies need nothing
+            await self.remote.prefetch(filenames)
+        else:
+            await self.add_sounds(filenames)
+
+    async def remote_downloaded(self, filenames):
+        """Index fetched sounds before they're decoded, so they're cached by content digest"""
+        self.touch(filenames)
+
+        def index():
+            for filename in filenames:
+                self.catalog.add_file(filename)
+        await asyncio.get_running_loop().run_in_executor(None, index)
+        # Duplicate reports, pins and analysis don't hold up the play
+        asyncio.create_task(self.add_sounds(filenames))
+
+    async def sound_path(self, sound_name):
+        """Local path of a sound, fetched or revalidated first if the library is remote; None if missing"""
+        if self.remote is not None:
+            return await self.remote.fetch(sound_name)
+        path = os.path.join(self.sounds_dir, sound_name)
+        return path if os.path.exists(path) else None
+
+    def remote_evicted(self, filename):
+        # Decoded frames stay cached by digest; a re-download finds them again
+        self.touch([filename])
+        self.catalog.remove_file(filename)
+
+    def touch(self, filenames):
+        """Note files changed on disk, so a reload running now doesn't swap in a catalog without the change"""
+        if self.reload_touched is not None:
+            self.reload_touched.update(filenames)
+
+    async def add_sounds(self, filenames):
+        """Fingerprint new files, then analyze and publish their metadata as one batch"""
+        self.touch(filenames)
+
+        def index():
+            for filename in filenames:
+                self.catalog.add_file(filename)
+        await asyncio.get_running_loop().run_in_executor(None, index)
+        entries = [e for e in map(self.catalog.get, filenames) if e is not None]
+        if entries:
+            self.report_duplicates()
+            self.refresh_pins()
+            await self.ingest_metadata(entries)
+
+    async def sync_hotkeys(self):
+        """Fetch every hotkey binding; later changes arrive as hotkey_* events"""
+        try:
+            async with self.backend_session() as session:
+                async with session.get(f'{self.backend_url}/api/hotkeys') as resp:
+                    hotkeys = await resp.json()
+        except Exception as e:
+            print(f"Failed to fetch hotkeys: {e}")
+            return
+        self.hotkeys = {h['id']: h for h in hotkeys}
+        self.refresh_pins()
+
+    def refresh_pins(self):
+        """Pin sounds bound to enabled hotkeys, unpin the rest, and prefetch any not yet cached"""
+        paths = {os.path.join(self.sounds_dir, h['soundFile']) for h in self.hotkeys.values()
+                 if h.get('enabled', True) and h.get('soundFile')}
+        pins = {self.catalog.cache_key(path): path for path in paths if os.path.exists(path)}
+        self.frame_cache.set_pinned(pins)
+        absent = [os.path.basename(path) for path in paths if not os.path.exists(path)]
+        if self.remote is not None and absent:
+            # Hotkey sounds not fetched yet are pinned once they've downloaded
+            asyncio.create_task(self.remote.prefetch(absent))
+
+        # Sounds too long for the cache would otherwise be decoded again on every refresh
+        missing = [(path, key) for key, path in pins.items()
+                   if key not in self.frame_cache and key not in self.frame_cache.oversized
+                   and key not in self.prefetching]
+        if missing:
+            self.prefetching.update(key for _, key in missing)
+            asyncio.create_task(self.prefetch(missing))
+        return pins
+
+    async def prefetch(self, sounds):
+        """Decode (path, key) pairs into the frame cache one at a time"""
+        loop = asyncio.get_running_loop()
+        try:
+            for path, key in sounds:
+                if key in self.frame_cache.pinned and key not in self.frame_cache:
+                    await loop.run_in_executor(None, self.warm_sound, path, key)
+        finally:
+            self.prefetching.difference_update(key for _, key in sounds)
+        print(f"📌 Prefetched {len(sounds)} hotkey sounds")
+
+    def begin_startup(self):
+        """Start startup() once; safe to call again from on_ready after a gateway reconnect"""
+        if self.startup_task is None:
+            self.startup_task = asyncio.create_task(self.startup())
+        return self.startup_task
+
+    async def startup(self):
+        """Everything that doesn't need the Discord gateway, run while it logs in
+
+        The Opus library lookup, the catalog scan (then analytics and cache
+        warming), the backend Socket.io connection and the optional endpoints
+        start concurrently instead of one after another in on_ready, so the
+        bot can play as soon as a voice session exists. Metadata analysis
+        continues in the background.
+        """
+        started = time.perf_counter()
+
+        async def library():
+            if self.remote is not None:
+                await self.remote.open()
+            await self.load_catalog()
+            await self.start_analytics()
+            self.ingest_task = asyncio.create_task(self.ingest_metadata())
 
-            # Play the sound
-            success = await self.play_sound(guild_id, sound_path)
-            if success:
-                print(f"✅ Successfully played {sound_name}")
+        results = await asyncio.gather(
+            asyncio.get_running_loop().run_in_executor(None, load_opus),
+            library(),
+            self.connect_to_backend(),
+            self.start_direct_trigger(),
+            self.start_metrics(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"❌ Startup step failed: {result}")
+        self.install_reload_signal()
+        self.startup_seconds = time.perf_counter() - started
+        print(f"🚀 Startup tasks finished in {self.startup_seconds * 1000:.0f}ms")
+
+    async def load_catalog(self):
+        """Scan the sounds directory off the event loop"""
+        added, removed = await asyncio.get_running_loop().run_in_executor(None, self.catalog.scan)
+        print(f"📚 Sound catalog: {len(self.catalog)} sounds ({len(added)} indexed, {len(removed)} removed)")
+        self.report_duplicates()
+        # Cache keys are content digests, which the scan may have just learned
+        self.refresh_pins()
+
+    async def reload_library(self, reset_caches=False):
+        """Rescan sounds/ and rebuild indexes and caches while voice stays up
+
+        The rescan runs on a copy of the catalog in a worker thread (only new
+        or changed files are hashed) and is swapped in with one assignment,
+        so plays during the reload resolve against the old index. Cache
+        entries are keyed by content digest and survive unless their file
+        changed or reset_caches is set; sounds already playing hold their own
+        frames either way. Files added or deleted through events while the
+        rescan runs are checked again on the copy before the swap, so the
+        reload can't undo them. Returns (added, removed), or None if a reload
+        was already running.
+        """
+        if self.reload_lock.locked():
+            print("🔁 Reload already in progress")
+            return None
+        async with self.reload_lock:
+            loop = asyncio.get_running_loop()
+            self.reload_touched = set()
+            try:
+                catalog = self.catalog.copy()
+                added, removed = await loop.run_in_executor(None, catalog.scan)
+                while self.reload_touched:
+                    touched, self.reload_touched = self.reload_touched, set()
+
+                    def recheck():
+                        # add_file drops files that are gone from disk
+                        for filename in touched:
+                            catalog.add_file(filename)
+                    await loop.run_in_executor(None, recheck)
+                self.catalog = catalog
+            finally:
+                self.reload_touched = None
+
+            if reset_caches:
+                self.frame_cache.clear()
+                self.opus_cache.clear()
+                dropped = 'all'
             else:
-                print(f"❌ Failed to play {sound_name}")
+                digests = catalog.digests()
+                dropped = self.frame_cache.retain(digests) + self.opus_cache.retain(digests)
+            print(f"🔁 Reloaded sound library: {len(catalog)} sounds ({len(added)} new or changed, "
+                  f"{len(removed)} removed), dropped {dropped} cache entries")
+
+            self.report_duplicates()
+            self.refresh_pins()
+            await self.ingest_metadata()
+            if self.analytics is not None and self.cache_warm_top_k > 0:
+                await self.warm_cache()
+            return added, removed
+
+    def install_reload_signal(self):
+        """Reload the library on SIGHUP, where the platform has it"""
+        if not hasattr(signal, 'SIGHUP'):
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.create_task(self.reload_library()))
+        except (NotImplementedError, RuntimeError) as e:
+            print(f"SIGHUP reload unavailable: {e}")
+
+    async def ingest_metadata(self, entries=None):
+        """Analyze sounds that have no metadata yet, then publish it to the backend"""
+        entries = list(self.catalog) if entries is None else entries
+        pending = [e for e in entries if not self.metadata.analyzed(e.digest)]
+        loop = asyncio.get_running_loop()
+
+        if pending:
+            print(f"🔬 Analyzing {len(pending)} sounds with {self.ingest_workers} workers")
+            # Each analysis runs ffprobe/ffmpeg subprocesses, so threads spread it across cores
+            with ThreadPoolExecutor(max_workers=self.ingest_workers) as pool:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(pool, analyze, e.path) for e in pending),
+                    return_exceptions=True
+                )
+            for entry, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    print(f"❌ Failed to analyze {entry.filename}: {result}")
+                    continue
+                self.metadata.update(entry.digest, result)
+            await loop.run_in_executor(None, self.metadata.save)
+
+        await self.publish_metadata(entries)
+
+    async def publish_metadata(self, entries):
+        """Send metadata for entries to the backend's sound listing, in batches; returns whether all were accepted"""
+        sounds = []
+        for entry in entries:
+            metadata = self.metadata.get(entry.digest)
+            if metadata is not None:
+                sounds.append((entry.filename, dict(metadata, digest=entry.digest)))
+        if not sounds:
+            return True
+
+        batch_size = self.metadata_batch_size
+        try:
+            async with self.backend_session() as session:
+                for start in range(0, len(sounds), batch_size):
+                    batch = dict(sounds[start:start + batch_size])
+                    async with session.post(f'{self.backend_url}/api/bot/sound-metadata', json={'sounds': batch}) as resp:
+                        if resp.status != 200:
+                            print(f"Sound metadata batch at {start} of {len(sounds)} rejected: {resp.status}")
+                            return False
+            print(f"📡 Published metadata for {len(sounds)} sounds")
+            return True
+        except Exception as e:
+            print(f"Failed to publish sound metadata: {e}")
+            return False
+
+    async def resolve_sound(self, name):
+        """Look a requested sound up exactly, then fuzzily
+
+        Returns (entry, suggestions): entry is the sound to play, or None;
+        suggestions are filenames to offer instead when FUZZY_PLAY_MODE is
+        'suggest'. With a remote library the catalog only holds cached
+        files, so the exact name is fetched before settling for a cached
+        near miss; near misses of sounds never fetched aren't found.
+        """
+        entry = self.catalog.find(name)
+        if entry is None and self.remote is not None:
+            filename = name if name.lower().endswith(AUDIO_EXTENSIONS) else f"{name}.mp3"
+            if await self.remote.fetch(filename) is not None:
+                entry = self.catalog.get(filename)
+        if entry is not None or self.fuzzy_mode == 'off':
+            return entry, []
+        query = os.path.splitext(name)[0] if name.lower().endswith(AUDIO_EXTENSIONS) else name
+        matches = [filename for filename, _ in self.catalog.fuzzy.matches(query)]
+        if matches and self.fuzzy_mode == 'auto':
+            return self.catalog.get(matches[0]), []
+        return None, matches
+
+    async def resolve_request(self, data):
+        """A routed play request with its sound resolved through resolve_sound()"""
+        sound_name = data['sound']
+        if self.catalog.get(sound_name) is not None:
+            return data
+        entry, suggestions = await self.resolve_sound(sound_name)
+        if entry is None:
+            if suggestions:
+                print(f"❓ {sound_name} not found, closest: {', '.join(suggestions)}")
+            return data
+        print(f"🔎 Resolved {sound_name} to {entry.filename}")
+        return dict(data, sound=entry.filename)
+
+    def report_duplicates(self):
+        duplicates = self.catalog.duplicates()
+        for filenames in duplicates.values():
+            print(f"♻️ Identical audio shared by: {', '.join(filenames)}")
+        return duplicates
+
+    async def register_with_backend(self):
+        """Identify as a bot so the backend routes play commands to our guild rooms"""
+        # sio.connected is only set once the connect handler has returned
+        if not (self.sio.connected or self.sio.namespaces):
+            return
+        guild_ids = [str(guild.id) for guild in bot.guilds]
+        await self.sio.emit('register_bot', {'worker_id': self.worker_id, 'guild_ids': guild_ids})
 
     async def connect_to_backend(self):
         """Connect to backend Socket.io server"""
+        if self.sio.connected:
+            return
         try:
             await self.sio.connect(self.backend_url)
             print("🔌 Socket.io client connected to backend")
         except Exception as e:
             print(f"❌ Failed to connect to backend: {e}")
     
+    async def trigger(self, sound_name, guild_id=None, triggered_by='unknown', segment=None):
+        """Play a sound file by filename, in guild_id or the first connected guild
+
+        segment is an optional (start, end) in seconds; end may be None.
+        """
+        started = time.perf_counter()
+        stages = {}
+        try:
+            session = self.sessions.get(int(guild_id)) if guild_id else self.sessions.first()
+        except (TypeError, ValueError):
+            session = None
+        if session is None:
+            print("❌ No voice connections available to play sound")
+            self.record_outcome(triggered_by, guild_id, sound_name, 'no_session', stages, started, segment=segment)
+            return False
+        if session.reconnecting:
+            print(f"⏳ Voice in guild {session.guild_id} is reconnecting, not playing {sound_name}")
+            self.record_outcome(triggered_by, session.guild_id, sound_name, 'reconnecting', stages, started,
+                                segment=segment)
+            return False
+
+        sound_path = await self.sound_path(sound_name)
+        if sound_path is None:
+            print(f"❌ Sound file not found: {sound_name}")
+            self.record_outcome(triggered_by, session.guild_id, sound_name, 'not_found', stages, started,
+                                segment=segment)
+            return False
+        stages['resolve'] = elapsed_ms(started)
+
+        # Play the sound
+        success = await self.play_sound(session.guild_id, sound_path, stages, segment)
+        if success:
+            print(f"✅ Successfully played {sound_name} ({triggered_by})")
+        else:
+            print(f"❌ Failed to play {sound_name}")
+        self.record_outcome(triggered_by, session.guild_id, sound_name, 'played' if success else 'failed', stages, started,
+                            segment=segment)
+        return success
+
+    def owned_share(self, data):
+        """data limited to the guilds this worker owns; None if it owns none of them
+
+        A command for another worker's guild means the backend's routing is
+        stale or wrong, so it's logged and dropped rather than played from a
+        worker the owner doesn't know about. Until the backend has reported
+        ownership every guild is accepted, and a guild this worker holds a
+        voice session in always is: the backend keeps those here too.
+        """
+        if self.owned_guilds is None:
+            return data
+        if data.get('guild_ids'):
+            owned = [g for g in data['guild_ids'] if self.owns(g)]
+            foreign = [g for g in data['guild_ids'] if not self.owns(g)]
+            if foreign:
+                print(f"🧭 Ignoring guilds {', '.join(map(str, foreign))}, not owned by worker {self.worker_id}")
+            return dict(data, guild_ids=owned) if owned else None
+        guild_id = data.get('guild_id')
+        if guild_id and not self.owns(guild_id):
+            print(f"🧭 Ignoring command for guild {guild_id}, not owned by worker {self.worker_id}")
+            return None
+        return data
+
+    def owns(self, guild_id):
+        """Whether the backend routes guild_id here or this worker is connected there"""
+        if str(guild_id) in self.owned_guilds:
+            return True
+        try:
+            return int(guild_id) in self.sessions
+        except (TypeError, ValueError):
+            return False
+
+    async def dispatch_play(self, data, triggered_by):
+        """Play now, or at data['start_at'] (epoch ms) across data['guild_ids']
+
+        data['start']/data['end'] (seconds) or data['cue'] limit playback to
+        a segment of the sound.
+        """
+        sound_name = data['sound']
+        try:
+            segment = self.segment_for(sound_name, data.get('start'), data.get('end'), data.get('cue'))
+        except ValueError as e:
+            print(f"❌ Invalid segment for {sound_name}: {e}")
+            return False
+        if data.get('start_at') is not None or data.get('guild_ids'):
+            guild_ids = data.get('guild_ids') or ([data['guild_id']] if data.get('guild_id') else [])
+            scheduled = await self.schedule_play(sound_name, guild_ids, data.get('start_at'), triggered_by, segment)
+            return scheduled > 0
+        return await self.trigger(sound_name, data.get('guild_id'), triggered_by, segment)
+
+    def segment_for(self, sound_name, start=None, end=None, cue=None):
+        """(start, end) seconds from explicit offsets or a cue in the sound's metadata; None for all of it"""
+        if cue:
+            entry = self.catalog.get(sound_name)
+            span = self.metadata.cue(entry.digest, cue) if entry is not None else None
+            if span is None:
+                raise ValueError(f"no cue named {cue!r}")
+            start, end = span
+        if start is None and end is None:
+            return None
+        start = float(start or 0)
+        end = float(end) if end is not None else None
+        if start < 0 or (end is not None and end <= start):
+            raise ValueError(f"bad offsets {start}..{end}")
+        return start, end
+
+    async def schedule_play(self, sound_name, guild_ids, start_at=None, triggered_by='unknown', segment=None):
+        """Start a sound in several guilds on the same 20ms frame boundary
+
+        start_at is wall-clock epoch milliseconds (so several workers can agree
+        on it); it is mapped onto the event loop's monotonic clock and rounded
+        up to a frame boundary. Sources are prepared up front, so streaming
+        decodes are already buffering when the moment comes. Returns the
+        number of sessions scheduled.
+        """
+        # Rejected requests return before any source starts decoding
+        try:
+            start_time = None if start_at is None else float(start_at) / 1000
+        except (TypeError, ValueError):
+            start_time = math.nan
+        if start_time is not None and not math.isfinite(start_time):
+            print(f"❌ Invalid scheduled start {start_at!r}, expected epoch milliseconds")
+            return 0
+        if start_time is not None and start_time - time.time() > self.max_schedule_ahead:
+            print(f"❌ Scheduled start is {start_time - time.time():.1f}s away, limit is {self.max_schedule_ahead}s")
+            return 0
+
+        sessions = []
+        for guild_id in guild_ids or []:
+            try:
+                session = self.sessions.get(int(guild_id))
+            except (TypeError, ValueError):
+                session = None
+            if session is None:
+                print(f"❌ No voice connection in guild {guild_id}, skipping scheduled play")
+            elif session.reconnecting:
+                print(f"⏳ Voice in guild {guild_id} is reconnecting, skipping scheduled play")
+            else:
+                sessions.append(session)
+        first = self.sessions.first()
+        if not guild_ids and first is not None and not first.reconnecting:
+            sessions.append(first)
+        if not sessions:
+            print("❌ No voice connections available to play sound")
+            return 0
+
+        sound_path = await self.sound_path(sound_name)
+        if sound_path is None:
+            print(f"❌ Sound file not found: {sound_name}")
+            return 0
+
+        plays = []
+        gain = self.sound_gain(self.catalog.cache_key(sound_path))
+        # Guilds with adjusted volume mix their own PCM; the rest can share one encode
+        live = [s for s in sessions if not (self.mock_mode or s.mock or self.needs_pcm(s, gain))]
+        shared = self.create_shared_sources(sound_path, len(live), segment) if len(live) > 1 else None
+        for session in sessions:
+            try:
+                if self.mock_mode or session.mock:
+                    source = None
+                elif shared and session in live:
+                    source = shared.pop()
+                else:
+                    source = self.create_source(sound_path, segment)
+                plays.append((session, source))
+            except Exception as e:
+                session.record_failure()
+                print(f"Failed to prepare {sound_name} for guild {session.guild_id}: {e}")
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        delay = 0.0 if start_time is None else start_time - time.time()
+        target = math.ceil((now + max(delay, 0.0)) / FRAME_DURATION) * FRAME_DURATION
+
+        request = {'segment': segment, 'start_at': start_at, 'guild_ids': guild_ids}
+        loop.call_at(target, self.start_scheduled, plays, sound_name, triggered_by, target, request)
+        print(f"⏱️ Scheduled {sound_name} in {len(plays)} guild(s) in {(target - now) * 1000:.0f}ms")
+        return len(plays)
+
+    def start_scheduled(self, plays, sound_name, triggered_by, target, request=None):
+        """Runs on the event loop at the scheduled frame boundary
+
+        request holds the schedule_play arguments to trace with each start.
+        """
+        lateness = round((asyncio.get_running_loop().time() - target) * 1000, 3)
+        key = self.catalog.cache_key(os.path.join(self.sounds_dir, sound_name))
+        gain = self.sound_gain(key)
+        for session, source in plays:
+            started = time.perf_counter()
+            try:
+                if source is None:
+                    session.record_play()
+                else:
+                    session.play(source, key, gain)
+                outcome = 'played'
+            except Exception as e:
+                session.record_failure()
+                print(f"Failed to start scheduled {sound_name} in guild {session.guild_id}: {e}")
+                outcome = 'failed'
+            self.record_outcome(triggered_by, session.guild_id, sound_name, outcome, {'lateness': lateness}, started,
+                                **(request or {}))
+        print(f"🔊 Started {sound_name} in {len(plays)} guild(s), {lateness}ms after target")
+
+    def record_outcome(self, source, guild_id, sound_name, outcome, stages, started, **request):
+        """Count a finished play request and append it to the trace if one is recorded
+
+        request is the segment, start_at and guild_ids the play was asked
+        for, kept in the trace so a replay issues the same request.
+        """
+        self.plays_total.inc(outcome=outcome, source=source)
+        for stage, ms in stages.items():
+            self.stage_seconds.observe(ms / 1000, stage=stage)
+        total = time.perf_counter() - started
+        self.stage_seconds.observe(total, stage='total')
+        if self.analytics is not None:
+            self.analytics.record(sound_name, guild_id, source, outcome, round(total * 1000, 3))
+        if self.trace is not None:
+            self.trace.record(source, guild_id, sound_name, outcome, stages, started, **request)
+
+    async def start_direct_trigger(self):
+        """Start the optional direct trigger endpoint if DIRECT_TRIGGER_PORT is set"""
+        port = os.getenv('DIRECT_TRIGGER_PORT')
+        if not port or self.direct_server is not None:
+            return
+        from bot.direct import DirectTriggerServer
+        self.direct_server = DirectTriggerServer(
+            self,
+            host=os.getenv('DIRECT_TRIGGER_HOST', '127.0.0.1'),
+            port=int(port),
+            token=os.getenv('DIRECT_TRIGGER_TOKEN'),
+            allowed_origins=[o.strip() for o in os.getenv('DIRECT_TRIGGER_ORIGINS', '').split(',') if o.strip()]
+        )
+        try:
+            await self.direct_server.start()
+        except OSError as e:
+            print(f"❌ Failed to start direct trigger endpoint: {e}")
+            self.direct_server = None
+
+    async def start_analytics(self):
+        """Open the play history and keep the caches warm with its most played sounds"""
+        if self.analytics is not None:
+            return
+        from bot.analytics import PlayAnalytics
+        try:
+            self.analytics = await asyncio.get_running_loop().run_in_executor(None, PlayAnalytics, self.analytics_path)
+        except Exception as e:
+            print(f"❌ Failed to open play analytics at {self.analytics_path}: {e}")
+            return
+        if self.cache_warm_top_k > 0:
+            self.warm_task = asyncio.create_task(self.warm_periodically())
+
+    async def warm_periodically(self):
+        while True:
+            try:
+                await self.warm_cache()
+            except Exception as e:
+                print(f"Cache warming failed: {e}")
+            await asyncio.sleep(self.cache_warm_interval)
+
+    async def warm_cache(self):
+        """Decode the top-K sounds of the popularity window that aren't cached yet"""
+        loop = asyncio.get_running_loop()
+        since = time.time() - self.cache_warm_window
+        top = await loop.run_in_executor(None, self.analytics.top_sounds, self.cache_warm_top_k, since)
+        warmed = 0
+        for sound, plays in top:
+            path = os.path.join(self.sounds_dir, sound)
+            if not os.path.exists(path):
+                continue
+            key = self.catalog.cache_key(path)
+            if key in self.frame_cache or key in self.frame_cache.oversized:
+                continue
+            # One at a time, so warming never competes with live plays for every core
+            if await loop.run_in_executor(None, self.warm_sound, path, key):
+                warmed += 1
+        if warmed:
+            print(f"🔥 Warmed cache with {warmed} of the {len(top)} most played sounds")
+        return warmed
+
+    def warm_sound(self, path, key):
+        """Decode a sound into the frame cache, and encode it too when Opus is available"""
+        try:
+            for _ in collect_frames(self.decode_frames(path), key, self.frame_cache):
+                pass
+        except Exception as e:
+            print(f"Failed to warm {path}: {e}")
+            return False
+        frames = self.frame_cache.get(key)
+        if frames is not None and discord.opus.is_loaded() and key not in self.opus_cache:
+            self.opus_cache.open(key, frames)
+        return frames is not None
+
+    async def sync_slash_commands(self):
+        """Register /play with Discord, once per process"""
+        if not self.sync_app_commands or self.app_commands_synced:
+            return
+        try:
+            synced = await bot.tree.sync()
+            self.app_commands_synced = True
+            print(f"⌨️ Synced {len(synced)} slash commands")
+        except Exception as e:
+            print(f"Failed to sync slash commands: {e}")
+
+    async def start_metrics(self):
+        """Serve /metrics and sample event loop lag if METRICS_PORT is set"""
+        port = os.getenv('METRICS_PORT')
+        if not port or self.metrics_server is not None:
+            return
+        from bot.metrics import MetricsServer
+        self.metrics_server = MetricsServer(self.metrics, host=os.getenv('METRICS_HOST', '127.0.0.1'), port=int(port))
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            print(f"❌ Failed to start metrics endpoint: {e}")
+            self.metrics_server = None
+            return
+        self.lag_task = asyncio.create_task(monitor_loop_lag(self.loop_lag, self.loop_lag_last))
+
+    async def connect_with_backoff(self, channel, attempts=None):
+        """channel.connect(), retried with jittered exponential backoff; raises the last error"""
+        attempts = self.voice_retry_attempts if attempts is None else attempts
+        for attempt in range(max(1, attempts)):
+            try:
+                return await channel.connect()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.voice_reconnects.inc(result='failed')
+                if attempt + 1 >= attempts:
+                    raise
+                delay = backoff_delay(attempt, self.voice_retry_base, self.voice_retry_cap)
+                print(f"Voice connect to {channel.name} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def supervise(self, session):
+        """Start resuming a dropped session, unless already in progress"""
+        task = self.reconnect_tasks.get(session.guild_id)
+        if task is not None and not task.done():
+            return task
+        session.drop()
+        task = asyncio.create_task(self.resume_session(session))
+        self.reconnect_tasks[session.guild_id] = task
+        return task
+
+    async def resume_session(self, session):
+        """Reconnect a dropped session to its last channel, continuing the sounds it was mixing"""
+        guild_id = session.guild_id
+        try:
+            await self.update_voice_status()
+            channel = bot.get_channel(session.channel.id)
+            if channel is None:
+                raise RuntimeError(f"channel {session.channel.id} no longer exists")
+            if session.client is not None:
+                try:
+                    await session.client.disconnect(force=True)
+                except Exception:
+                    pass
+            client = await self.connect_with_backoff(channel)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Giving up on voice in guild {guild_id}: {e}")
+            self.voice_reconnects.inc(result='gave_up')
+            if self.sessions.get(guild_id) is session:
+                self.sessions.remove(guild_id)
+                await self.update_voice_status()
+            return False
+        finally:
+            if self.reconnect_tasks.get(guild_id) is asyncio.current_task():
+                del self.reconnect_tasks[guild_id]
+
+        if self.sessions.get(guild_id) is not session:
+            # Left or re-joined elsewhere while we were reconnecting
+            await client.disconnect()
+            return False
+        recovered = session.attach(client)
+        self.voice_recovery.observe(recovered)
+        self.voice_reconnects.inc(result='recovered')
+        self.sessions.move(guild_id, channel)
+        print(f"🔄 Voice in {channel.name} resumed after {recovered:.1f}s")
+        await self.update_voice_status()
+        return True
+
     async def connect_to_voice(self, guild_id, channel_id):
         """Connect to a voice channel"""
         guild = bot.get_guild(guild_id)
@@ -106,14 +1061,15 @@ class SoundboardBot:
             print(f"Voice channel {channel_id} not found or invalid")
             return False
 
+        # A supervisor still resuming the old session would fight this connection
+        task = self.reconnect_tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
         if self.mock_mode:
             print(f"🎭 MOCK MODE: Simulating connection to {channel.name} in {guild.name}")
-            # Store mock connection info
-            self.voice_clients[guild_id] = {
-                'channel': channel,
-                'mock': True,
-                'connected': True
-            }
+            # Mock session without a voice client behind it
+            self.sessions.add(self.configure_session(VoiceSession(guild_id, channel)))
             await self.update_voice_status()
             print(f"🎭 MOCK: Successfully 'connected' to {channel.name}")
             return True
@@ -122,18 +1078,17 @@ class SoundboardBot:
             print(f"Attempting to connect to {channel.name} in {guild.name}")
             
             # Disconnect from any existing connection first
-            if guild_id in self.voice_clients:
+            existing = self.sessions.remove(guild_id)
+            if existing is not None:
                 print("Disconnecting from existing voice connection")
-                if hasattr(self.voice_clients[guild_id], 'disconnect'):
-                    await self.voice_clients[guild_id].disconnect()
-                del self.voice_clients[guild_id]
+                await existing.disconnect()
             
             # Add a small delay before connecting to let any previous disconnect complete
             import asyncio
             await asyncio.sleep(1)
             
-            voice_client = await channel.connect()
-            self.voice_clients[guild_id] = voice_client
+            voice_client = await self.connect_with_backoff(channel, attempts=3)
+            self.sessions.add(self.configure_session(VoiceSession(guild_id, channel, voice_client, self.pacing)))
             print(f"Successfully connected to {channel.name}. Members in channel: {len(channel.members)}")
 
             # Give the connection a moment to stabilize before notifying backend
@@ -146,8 +1101,7 @@ class SoundboardBot:
                 return True
             else:
                 print(f"Voice connection to {channel.name} was not stable, removing from tracking")
-                if guild_id in self.voice_clients:
-                    del self.voice_clients[guild_id]
+                self.sessions.remove(guild_id)
                 return False
                 
         except Exception as e:
@@ -157,75 +1111,245 @@ class SoundboardBot:
     
     async def disconnect_from_voice(self, guild_id):
         """Disconnect from voice channel"""
-        if guild_id in self.voice_clients:
-            voice_client = self.voice_clients[guild_id]
-            
-            if isinstance(voice_client, dict):
-                # Mock connection
-                print(f"🎭 MOCK MODE: Disconnecting from {voice_client['channel'].name}")
-            else:
-                # Real voice client
-                await voice_client.disconnect()
-                
-            del self.voice_clients[guild_id]
+        task = self.reconnect_tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+        session = self.sessions.remove(guild_id)
+        if session is not None:
+            if session.mock:
+                print(f"🎭 MOCK MODE: Disconnecting from {session.channel.name}")
+            await session.disconnect()
             
             # Notify backend of voice connection update
             await self.update_voice_status()
     
-    async def play_sound(self, guild_id, sound_path):
-        """Play a sound file in the voice channel"""
-        if guild_id not in self.voice_clients:
+    def configure_session(self, session):
+        """Apply the guild's saved volume and ducking to a new session"""
+        settings = self.guild_audio.get(session.guild_id, {})
+        session.set_volume(settings.get('volume', 1.0))
+        session.set_ducking(self.duck_gain if settings.get('ducking') else None)
+        return session
+
+    def set_volume(self, guild_id, volume):
+        """Set a guild's volume (1.0 is unchanged), live for sounds already playing"""
+        volume = min(max(volume, 0.0), self.max_volume)
+        self.guild_audio.setdefault(guild_id, {})['volume'] = volume
+        session = self.sessions.get(guild_id)
+        if session is not None:
+            session.set_volume(volume)
+        return volume
+
+    def set_ducking(self, guild_id, enabled):
+        self.guild_audio.setdefault(guild_id, {})['ducking'] = enabled
+        session = self.sessions.get(guild_id)
+        if session is not None:
+            session.set_ducking(self.duck_gain if enabled else None)
+
+    async def set_sound_volume(self, sound_name, volume):
+        """Store a sound's gain in its metadata and apply it wherever it is playing"""
+        entry = self.catalog.find(sound_name)
+        if entry is None:
+            raise ValueError(f"sound {sound_name!r} not found")
+        volume = min(max(volume, 0.0), self.max_volume)
+        self.metadata.update(entry.digest, {'volume': volume})
+        for session in self.sessions:
+            if session.mixer is not None:
+                session.mixer.set_sound_gain(entry.digest, volume)
+        await asyncio.get_running_loop().run_in_executor(None, self.metadata.save)
+        await self.publish_metadata([entry])
+        return volume
+
+    def sound_gain(self, key):
+        return (self.metadata.get(key) or {}).get('volume', 1.0)
+
+    @staticmethod
+    def needs_pcm(session, gain):
+        """Whether a fanned-out play must go through the PCM mixer rather than shared Opus packets"""
+        return gain != 1.0 or session.volume != 1.0 or session.duck_gain is not None
+
+    async def play_sound(self, guild_id, sound_path, stages=None, segment=None):
+        """Play a sound file in the voice channel, timing each stage into stages"""
+        stages = {} if stages is None else stages
+        session = self.sessions.get(guild_id)
+        if session is None:
             return False
-            
-        voice_client = self.voice_clients[guild_id]
         
-        if self.mock_mode or isinstance(voice_client, dict):
+        if self.mock_mode or session.mock:
             print(f"🎭 MOCK MODE: Simulating playback of {sound_path}")
-            import time
             # Simulate playback time
             print(f"🔊 MOCK: Playing sound for 3 seconds...")
+            session.record_play()
             return True
         
-        if voice_client.is_playing():
-            voice_client.stop()
-        
         try:
-            source = discord.FFmpegPCMAudio(sound_path)
-            voice_client.play(source)
+            started = time.perf_counter()
+            key = self.catalog.cache_key(sound_path)
+            gain = self.sound_gain(key)
+            source = self.create_source(sound_path, segment)
+            stages['source'] = elapsed_ms(started)
+            started = time.perf_counter()
+            session.play(source, key, gain)
+            stages['start'] = elapsed_ms(started)
             return True
         except Exception as e:
+            session.record_failure()
             print(f"Failed to play sound: {e}")
             return False
+
+    def create_source(self, sound_path, segment=None):
+        """Build a PCM source for one guild, preferring cached frames over a fresh decode
+
+        PCM sources play through the session's mixer, so volume and ducking
+        changes reach sounds already playing; shared Opus packets are only
+        worth that loss when one encode fans out to several guilds. With a
+        segment, cached sounds start at the segment's frame index directly,
+        so clips of one long file never re-run ffmpeg once it is cached.
+        """
+        first, stop = frame_span(*segment) if segment else (0, None)
+        # Keyed by content digest, so duplicate files share one cache entry
+        key = self.catalog.cache_key(sound_path)
+        frames = self.frame_cache.get(key)
+        if frames is not None:
+            return CachedSource(frames, first, stop)
+
+        # Not cached yet: start playing from the first decoded frames while
+        # the rest of the file decodes in the background and fills the cache
+        decoder = discord.FFmpegPCMAudio(sound_path)
+        return StreamingSource(decoder, key=key, cache=self.frame_cache,
+                               buffer_frames=self.stream_buffer_frames, first=first, stop=stop)
+
+    def create_shared_sources(self, sound_path, count, segment=None):
+        """count sources fed by a single decode and Opus encode of the sound
+
+        Falls back to None (one source per session) if the encoder can't be
+        created, e.g. when libopus isn't loaded.
+        """
+        first, stop = frame_span(*segment) if segment else (0, None)
+        broadcast = self.open_broadcast(sound_path, self.catalog.cache_key(sound_path))
+        if broadcast is None:
+            return None
+        return [broadcast.subscribe(first, stop) for _ in range(count)]
+
+    def open_broadcast(self, sound_path, key):
+        """The shared Opus encode of a sound, started if needed; None if it can't be"""
+        try:
+            broadcast = self.opus_cache.get(key)
+            if broadcast is None:
+                frames = self.frame_cache.get(key)
+                if frames is None:
+                    frames = collect_frames(self.decode_frames(sound_path), key, self.frame_cache)
+                broadcast = self.opus_cache.open(key, frames)
+        except Exception as e:
+            print(f"Shared encode unavailable for {sound_path}: {e}")
+            return None
+        return broadcast
+
+    def decode_frames(self, sound_path):
+        """PCM frames of a sound; ffmpeg only starts once the first frame is pulled"""
+        yield from iter_decoder(discord.FFmpegPCMAudio(sound_path))
     
     async def update_voice_status(self):
         """Update backend with current voice connection status"""
         try:
-            voice_connections = {}
-            
-            for guild_id, voice_client in self.voice_clients.items():
-                # Handle both real voice clients and mock connections
-                if isinstance(voice_client, dict):
-                    # Mock connection
-                    channel = voice_client['channel']
-                    voice_connections[str(guild_id)] = {
-                        'channel_id': str(channel.id),
-                        'channel_name': channel.name
-                    }
-                elif hasattr(voice_client, 'channel') and voice_client.channel:
-                    # Real voice client
-                    voice_connections[str(guild_id)] = {
-                        'channel_id': str(voice_client.channel.id),
-                        'channel_name': voice_client.channel.name
-                    }
+            voice_connections = {str(session.guild_id): session.status() for session in self.sessions}
             
-            async with aiohttp.ClientSession() as session:
-                data = {'voice_connections': voice_connections}
+            async with self.backend_session() as session:
+                data = {'worker_id': self.worker_id, 'voice_connections': voice_connections}
                 async with session.post(f'{self.backend_url}/api/bot/voice-status', json=data) as resp:
                     pass
                     
         except Exception as e:
             print(f"Failed to update voice status: {e}")
 
+    async def sync_guilds(self, guilds):
+        """Send the full guild roster to the backend in pages"""
+        self.roster_version += 1
+        version = self.roster_version
+        infos = [guild_info(guild) for guild in guilds]
+        page_size = self.guild_sync_page_size
+        total_pages = max(1, -(-len(infos) // page_size))
+
+        try:
+            async with self.backend_session() as session:
+                for page in range(total_pages):
+                    data = {
+                        'worker_id': self.worker_id,
+                        'version': version,
+                        'page': page,
+                        'total_pages': total_pages,
+                        'guilds': infos[page * page_size:(page + 1) * page_size]
+                    }
+                    async with session.post(f'{self.backend_url}/api/bot/guilds/sync', json=data) as resp:
+                        if resp.status != 200:
+                            print(f"Guild sync page {page + 1}/{total_pages} rejected: {resp.status}")
+                            return False
+            print(f"Synced {len(infos)} guilds to backend in {total_pages} page(s) (version {version})")
+            return True
+        except Exception as e:
+            print(f"Failed to sync guilds: {e}")
+            return False
+
+    async def send_guild_event(self, event_type, guild):
+        """Send a single guild_join/guild_remove/guild_update to the backend"""
+        self.roster_version += 1
+        data = {
+            'worker_id': self.worker_id,
+            'type': event_type,
+            'version': self.roster_version,
+            'guild': guild_info(guild)
+        }
+        try:
+            async with self.backend_session() as session:
+                async with session.post(f'{self.backend_url}/api/bot/guilds/event', json=data) as resp:
+                    print(f"Sent {event_type} for {guild.name} (version {self.roster_version})")
+        except Exception as e:
+            print(f"Failed to send {event_type}: {e}")
+
+
+def guild_info(guild):
+    """Roster entry the backend keeps for a guild"""
+    return {
+        'id': str(guild.id),
+        'name': guild.name,
+        'member_count': guild.member_count
+    }
+
+
+def parse_offset(text):
+    """Seconds from '12.5', '1:02' or '1:02.5'"""
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+SEGMENT_ARG = re.compile(r'^(?P<start>\d[\d:.]*)?-(?P<end>\d[\d:.]*)?$|^(?P<from>\d[\d:.]*)$')
+
+
+def split_segment_args(text):
+    """Split a trailing 'start-end', 'start' or '@cue' off a !play argument
+
+    Returns (sound name, segment_for keyword arguments).
+    """
+    name, _, last = text.rpartition(' ')
+    if not name:
+        return text, {}
+    if last.startswith('@') and len(last) > 1:
+        return name, {'cue': last[1:]}
+    match = SEGMENT_ARG.match(last)
+    if match is None:
+        return text, {}
+    try:
+        if match.group('from'):
+            return name, {'start': parse_offset(match.group('from'))}
+        return name, {
+            'start': parse_offset(match.group('start')) if match.group('start') else None,
+            'end': parse_offset(match.group('end')) if match.group('end') else None,
+        }
+    except ValueError:
+        return text, {}
+
+
 soundboard = SoundboardBot()
 
 
@@ -233,39 +1357,53 @@ soundboard = SoundboardBot()
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     
-    # Collect guild and voice connection information
-    guilds_info = []
+    # Check which guilds the bot is already connected to voice in
     voice_connections = {}
-    
     for guild in bot.guilds:
-        guilds_info.append({
-            'id': str(guild.id),
-            'name': guild.name,
-            'member_count': guild.member_count
-        })
-        
-        # Check if bot is connected to voice in this guild
         if guild.voice_client:
             voice_connections[str(guild.id)] = {
                 'channel_id': str(guild.voice_client.channel.id),
                 'channel_name': guild.voice_client.channel.name
             }
     
-    # Notify backend that bot is ready with guild info
+    # Usually already running since before login (see run())
+    soundboard.begin_startup()
+
+    # Notify backend that bot is ready; the guild roster follows in pages
     try:
-        async with aiohttp.ClientSession() as session:
+        async with soundboard.backend_session() as session:
             bot_data = {
+                'worker_id': soundboard.worker_id,
                 'connected': True,
-                'guilds': guilds_info,
+                'guild_count': len(bot.guilds),
                 'voice_connections': voice_connections
             }
             async with session.post(f'{soundboard.backend_url}/api/bot/ready', json=bot_data) as resp:
-                print(f"Notified backend: {len(guilds_info)} guilds, {len(voice_connections)} voice connections")
+                print(f"Notified backend: {len(bot.guilds)} guilds, {len(voice_connections)} voice connections")
     except Exception as e:
         print(f"Failed to notify backend: {e}")
 
-    # Connect to backend via Socket.io for real-time communication
-    await soundboard.connect_to_backend()
+    async def roster():
+        await soundboard.sync_guilds(bot.guilds)
+        # The Socket.io connection may have registered before the guild list was known
+        await soundboard.register_with_backend()
+
+    await asyncio.gather(roster(), soundboard.sync_slash_commands())
+
+@bot.event
+async def on_guild_join(guild):
+    await soundboard.send_guild_event('guild_join', guild)
+    await soundboard.register_with_backend()
+
+@bot.event
+async def on_guild_remove(guild):
+    await soundboard.send_guild_event('guild_remove', guild)
+    await soundboard.register_with_backend()
+
+@bot.event
+async def on_guild_update(before, after):
+    if before.name != after.name or before.member_count != after.member_count:
+        await soundboard.send_guild_event('guild_update', after)
 
 @bot.command(name='join')
 async def join_voice(ctx):
@@ -294,40 +1432,161 @@ async def leave_voice(ctx):
     await soundboard.disconnect_from_voice(ctx.guild.id)
     await ctx.send("Left voice channel")
 
+@bot.command(name='reload')
+@commands.is_owner()
+async def reload_library_command(ctx, mode: str = ''):
+    """Rescan the sound library; `!reload caches` also empties the audio caches"""
+    result = await soundboard.reload_library(reset_caches=mode == 'caches')
+    if result is None:
+        await ctx.send("A reload is already running")
+        return
+    added, removed = result
+    await ctx.send(f"Reloaded {len(soundboard.catalog)} sounds ({len(added)} new or changed, {len(removed)} removed)")
+
+@bot.tree.command(name='play', description='Play a sound in your server')
+@app_commands.describe(sound='Sound to play')
+async def play_slash_command(interaction: discord.Interaction, sound: str):
+    """Play a sound picked from autocomplete (or typed by name)"""
+    if interaction.guild_id is None:
+        await interaction.response.send_message("Use /play in a server", ephemeral=True)
+        return
+    entry = soundboard.catalog.find(sound)
+    if entry is None:
+        await interaction.response.send_message(f"Sound '{sound}' not found!", ephemeral=True)
+        return
+    session = soundboard.sessions.get(interaction.guild_id)
+    if session is None:
+        await interaction.response.send_message("Bot is not in a voice channel! Use `!join` first.", ephemeral=True)
+        return
+    if session.reconnecting:
+        await interaction.response.send_message("Voice is reconnecting, try again shortly", ephemeral=True)
+        return
+
+    # Discord drops interactions not answered within 3s; a cold sound can take longer to start
+    await interaction.response.defer(ephemeral=True)
+    success = await soundboard.trigger(entry.filename, interaction.guild_id, 'slash')
+    message = f"Playing {entry.name}" if success else "Failed to play sound"
+    await interaction.followup.send(message, ephemeral=True)
+
+@play_slash_command.autocomplete('sound')
+async def play_sound_autocomplete(interaction: discord.Interaction, current: str):
+    """Sound names starting with what the user typed, from the in-memory name index"""
+    return [
+        app_commands.Choice(name=os.path.splitext(filename)[0][:100], value=filename)
+        for filename in soundboard.catalog.names.complete(current)
+        if len(filename) <= 100
+    ]
+
+@bot.command(name='cue')
+@commands.has_guild_permissions(manage_guild=True)
+async def set_cue_command(ctx, sound_name: str, cue: str, start: str, end: str):
+    """Name a segment of a sound for `!play <sound> @<cue>`"""
+    entry = soundboard.catalog.find(sound_name)
+    if entry is None:
+        await ctx.send(f"Sound '{sound_name}' not found!")
+        return
+    try:
+        start_s, end_s = parse_offset(start), parse_offset(end)
+    except ValueError:
+        await ctx.send("Offsets must be seconds or m:ss")
+        return
+    if end_s <= start_s:
+        await ctx.send("The cue must end after it starts")
+        return
+    soundboard.metadata.set_cue(entry.digest, cue, start_s, end_s)
+    await asyncio.get_running_loop().run_in_executor(None, soundboard.metadata.save)
+    await soundboard.publish_metadata([entry])
+    await ctx.send(f"Cue '{cue}' on {entry.name}: {start_s:g}s to {end_s:g}s")
+
+def parse_percent(text):
+    """Volume from '80' or '80%' as a gain, 0.8"""
+    return float(text.rstrip('%')) / 100
+
+
+@bot.command(name='volume')
+async def volume_command(ctx, percent: str = None):
+    """Show or set this server's volume in percent, applied to sounds already playing too"""
+    if percent is None:
+        volume = soundboard.guild_audio.get(ctx.guild.id, {}).get('volume', 1.0)
+        await ctx.send(f"Volume is {volume * 100:g}%")
+        return
+    try:
+        volume = soundboard.set_volume(ctx.guild.id, parse_percent(percent))
+    except ValueError:
+        await ctx.send("Volume must be a percentage, e.g. `!volume 80`")
+        return
+    await ctx.send(f"Volume set to {volume * 100:g}%")
+
+@bot.command(name='soundvolume')
+@commands.has_guild_permissions(manage_guild=True)
+async def sound_volume_command(ctx, sound_name: str, percent: str):
+    """Set one sound's volume in percent, for every server"""
+    try:
+        volume = await soundboard.set_sound_volume(sound_name, parse_percent(percent))
+    except ValueError as e:
+        await ctx.send(f"Can't set volume: {e}")
+        return
+    await ctx.send(f"{sound_name} volume set to {volume * 100:g}%")
+
+@bot.command(name='duck')
+async def duck_command(ctx, mode: str = 'on'):
+    """`!duck on` keeps older sounds playing quietly under new ones; `!duck off` replaces them"""
+    enabled = mode.lower() in ('on', 'true', 'yes')
+    soundboard.set_ducking(ctx.guild.id, enabled)
+    await ctx.send(f"Ducking {'on' if enabled else 'off'}")
+
 @bot.command(name='play')
 async def play_sound_command(ctx, *, sound_name):
-    """Play a sound by name"""
+    """Play a sound by name, optionally just `start-end` seconds (or m:ss) or `@cue` of it"""
     print(f"Play command called for: {sound_name}")
-    print(f"Voice clients: {list(soundboard.voice_clients.keys())}")
+    print(f"Voice sessions: {soundboard.sessions.guild_ids()}")
+    started = time.perf_counter()
+    stages = {}
+    segment_args = {}
+    if soundboard.catalog.find(sound_name) is None:
+        sound_name, segment_args = split_segment_args(sound_name)
+    entry, suggestions = await soundboard.resolve_sound(sound_name)
+    filename = entry.filename if entry is not None else f"{sound_name}.mp3"
     
-    if ctx.guild.id not in soundboard.voice_clients:
+    session = soundboard.sessions.get(ctx.guild.id)
+    if session is None:
         await ctx.send("Bot is not in a voice channel! Use `!join` first.")
+        soundboard.record_outcome('command', ctx.guild.id, filename, 'no_session', stages, started)
         return
     
-    voice_client = soundboard.voice_clients[ctx.guild.id]
+    if session.reconnecting:
+        # The supervisor is resuming this session; removing it would make the resume fail
+        await ctx.send("Voice is reconnecting, try again shortly")
+        soundboard.record_outcome('command', ctx.guild.id, filename, 'reconnecting', stages, started)
+        return
     
-    # Handle mock connections vs real voice clients
-    if isinstance(voice_client, dict):
-        # Mock connection - always considered connected
-        if not voice_client.get('connected', False):
-            await ctx.send("Bot lost voice connection! Please use `!join` again.")
-            del soundboard.voice_clients[ctx.guild.id]
-            return
-    else:
-        # Real voice client
-        if not voice_client.is_connected():
-            await ctx.send("Bot lost voice connection! Please use `!join` again.")
-            del soundboard.voice_clients[ctx.guild.id]
-            return
+    if not session.is_connected():
+        await ctx.send("Bot lost voice connection! Please use `!join` again.")
+        soundboard.sessions.remove(ctx.guild.id)
+        soundboard.record_outcome('command', ctx.guild.id, filename, 'no_session', stages, started)
+        return
     
-    sound_path = f"sounds/{sound_name}.mp3"
-    if not os.path.exists(sound_path):
-        await ctx.send(f"Sound '{sound_name}' not found!")
+    sound_path = await soundboard.sound_path(filename)
+    if entry is None and sound_path is not None:
+        # Not cached yet from a remote library; fetching it indexed it
+        entry = soundboard.catalog.get(filename)
+    if entry is None:
+        hint = f" Did you mean: {', '.join(os.path.splitext(f)[0] for f in suggestions)}?" if suggestions else ""
+        await ctx.send(f"Sound '{sound_name}' not found!{hint}")
+        soundboard.record_outcome('command', ctx.guild.id, filename, 'not_found', stages, started)
         return
+    try:
+        segment = soundboard.segment_for(filename, **segment_args)
+    except ValueError as e:
+        await ctx.send(f"Can't play that part of '{entry.name}': {e}")
+        return
+    stages['resolve'] = elapsed_ms(started)
     
-    success = await soundboard.play_sound(ctx.guild.id, sound_path)
+    success = await soundboard.play_sound(ctx.guild.id, sound_path, stages, segment)
+    soundboard.record_outcome('command', ctx.guild.id, filename, 'played' if success else 'failed', stages, started,
+                              segment=segment)
     if success:
-        await ctx.send(f"Playing {sound_name}")
+        await ctx.send(f"Playing {entry.name}")
     else:
         await ctx.send("Failed to play sound")
 
@@ -338,12 +1597,15 @@ async def on_voice_state_update(member, before, after):
     if member == bot.user:
         print(f"Bot voice state changed: {before.channel} -> {after.channel}")
         
-        # If bot was disconnected (after.channel is None), clean up our tracking
+        # Dropped without a !leave (which removes the session first): resume it
         if after.channel is None and before.channel is not None:
-            guild_id = before.channel.guild.id
-            if guild_id in soundboard.voice_clients:
-                print(f"Bot was disconnected from {before.channel.name}, cleaning up voice client tracking")
-                del soundboard.voice_clients[guild_id]
+            session = soundboard.sessions.get(before.channel.guild.id)
+            if session is not None and not session.mock:
+                print(f"Bot was disconnected from {before.channel.name}, reconnecting")
+                soundboard.supervise(session)
+        elif after.channel is not None and before.channel != after.channel:
+            # Moved to another channel; keep the channel index current
+            if soundboard.sessions.move(after.channel.guild.id, after.channel) is not None:
                 await soundboard.update_voice_status()
         return
 
@@ -351,15 +1613,8 @@ async def on_voice_state_update(member, before, after):
     import asyncio
     await asyncio.sleep(5)  # Wait 5 seconds to let other members join/leave
     
-    for guild_id, voice_client in list(soundboard.voice_clients.items()):
-        # Handle both real voice clients and mock connections
-        if isinstance(voice_client, dict):
-            channel = voice_client['channel']
-        elif hasattr(voice_client, 'channel') and voice_client.channel:
-            channel = voice_client.channel
-        else:
-            continue
-            
+    for session in soundboard.sessions:
+        channel = session.channel
         if channel:
             # Refresh channel data to get current member list
             channel = bot.get_channel(channel.id)
@@ -371,11 +1626,29 @@ async def on_voice_state_update(member, before, after):
                 # Only disconnect if no human members are left (only bots remain)
                 if len(human_members) == 0:
                     print(f"No human members left in {channel.name}, disconnecting bot")
-                    await soundboard.disconnect_from_voice(guild_id)
+                    await soundboard.disconnect_from_voice(session.guild_id)
+
+async def run(token):
+    """Log in to Discord while the catalog, caches and backend connection come up"""
+    async with bot:
+        soundboard.begin_startup()
+        try:
+            await bot.start(token)
+        finally:
+            if soundboard.remote is not None:
+                await soundboard.remote.close()
+            if soundboard.trace is not None:
+                # Write out what the trace thread still has queued
+                await asyncio.get_running_loop().run_in_executor(None, soundboard.trace.close)
+
 
 if __name__ == "__main__":
     token = os.getenv('DISCORD_TOKEN')
     if not token:
         print("DISCORD_TOKEN not found in environment variables!")
     else:
-        bot.run(token)
\ No newline at end of file
+        discord.utils.setup_logging()
+        try:
+            asyncio.run(run(token))
+        except KeyboardInterrupt:
+            pass
\ No newline at end of file
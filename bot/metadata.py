@@ -0,0 +1,139 @@
+import audioop
+import json
+import math
+import os
+import subprocess
+import threading
+
+# Analysis decodes to low-rate mono; plenty for loudness and waveform peaks
+ANALYSIS_SAMPLE_RATE = 8000
+PEAK_COUNT = 100
+
+
+def probe(path):
+    """Duration and stream layout from ffprobe"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+         '-show_entries', 'stream=sample_rate,channels,channel_layout:format=duration',
+         '-of', 'json', path],
+        capture_output=True, check=True, timeout=30
+    )
+    info = json.loads(result.stdout)
+    stream = (info.get('streams') or [{}])[0]
+    return {
+        'duration': round(float(info.get('format', {}).get('duration') or 0), 3),
+        'sample_rate': int(stream.get('sample_rate') or 0),
+        'channels': int(stream.get('channels') or 0),
+        'channel_layout': stream.get('channel_layout') or '',
+    }
+
+
+def decode_for_analysis(path):
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', path, '-f', 's16le',
+         '-ac', '1', '-ar', str(ANALYSIS_SAMPLE_RATE), 'pipe:1'],
+        capture_output=True, check=True, timeout=120
+    )
+    return result.stdout
+
+
+def to_db(level):
+    return round(20 * math.log10(level / 32768), 2) if level > 0 else None
+
+
+def summarize_pcm(pcm, peak_count=PEAK_COUNT):
+    """Loudness (RMS dBFS), peak level and a downsampled peak envelope of mono s16le"""
+    pcm = pcm[:len(pcm) - len(pcm) % 2]
+    if not pcm:
+        return {'loudness_db': None, 'peak_db': None, 'peaks': []}
+
+    samples = len(pcm) // 2
+    bucket = max(1, -(-samples // peak_count))
+    peaks = []
+    for start in range(0, samples, bucket):
+        chunk = pcm[start * 2:(start + bucket) * 2]
+        peaks.append(round(audioop.max(chunk, 2) / 32768, 3))
+
+    return {
+        'loudness_db': to_db(audioop.rms(pcm, 2)),
+        'peak_db': to_db(audioop.max(pcm, 2)),
+        'peaks': peaks,
+    }
+
+
+def analyze(path):
+    """Full metadata for one sound file"""
+    metadata = probe(path)
+    metadata.update(summarize_pcm(decode_for_analysis(path)))
+    return metadata
+
+
+class MetadataStore:
+    """Sound metadata persisted as JSON, keyed by content digest"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def __contains__(self, digest):
+        return digest in self._entries
+
+    def get(self, digest):
+        return self._entries.get(digest)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            print(f"Failed to load sound metadata: {e}")
+            self._entries = {}
+
+    def put(self, digest, metadata):
+        with self._lock:
+            self._entries[digest] = metadata
+            self._dirty = True
+
+    def update(self, digest, metadata):
+        """Merge fields into a digest's entry, keeping the ones not given"""
+        with self._lock:
+            self._entries[digest] = dict(self._entries.get(digest) or {}, **metadata)
+            self._dirty = True
+
+    def analyzed(self, digest):
+        """Whether the digest has analysis results, not just user-set fields like cues"""
+        return 'loudness_db' in (self._entries.get(digest) or {})
+
+    def set_cue(self, digest, name, start, end):
+        """Name the segment start..end seconds of a sound"""
+        with self._lock:
+            entry = dict(self._entries.get(digest) or {})
+            entry['cues'] = dict(entry.get('cues') or {}, **{name: [start, end]})
+            self._entries[digest] = entry
+            self._dirty = True
+
+    def cue(self, digest, name):
+        """(start, end) seconds of a named cue, or None"""
+        span = ((self._entries.get(digest) or {}).get('cues') or {}).get(name)
+        return tuple(span) if span else None
+
+    def save(self):
+        """Write to disk atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._entries, separators=(',', ':'))
+            self._dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,239 @@
+import asyncio
+import bisect
+import threading
+import time
+
+import aiohttp
+
+# Seconds; covers sub-millisecond cache hits up to multi-second decodes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def samples(self):
+        """(suffix, label names, label values, value) tuples to expose"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{format_labels(names, values)} {format_value(value)}')
+        return lines
+
+
+def collect(func):
+    """Normalize a scrape-time callback's number or {labels: value} into sorted samples"""
+    result = func()
+    if isinstance(result, dict):
+        return sorted((key if isinstance(key, tuple) else (key,), value) for key, value in result.items())
+    return [((), result)]
+
+
+class Counter(Metric):
+    """Incremented directly, or read at scrape time from ``func`` for totals kept elsewhere"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=(), func=None):
+        super().__init__(name, help_text, labels)
+        self.func = func
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return dict(self.samples_by_key()).get(self._key(labels), 0)
+
+    def samples_by_key(self):
+        if self.func is not None:
+            return collect(self.func)
+        with self._lock:
+            return sorted(self._values.items())
+
+    def samples(self):
+        return [('', self.labels, key, value) for key, value in self.samples_by_key()]
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by ``func`` (returning a number or {labels: value})"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), func=None):
+        super().__init__(name, help_text, labels)
+        self.func = func
+        self._values = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        return dict(self.samples_by_key()).get(self._key(labels), 0)
+
+    def samples_by_key(self):
+        if self.func is not None:
+            return collect(self.func)
+        with self._lock:
+            return sorted(self._values.items())
+
+    def samples(self):
+        return [('', self.labels, key, value) for key, value in self.samples_by_key()]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0
+
+    def samples(self):
+        names = self.labels + ('le',)
+        samples = []
+        with self._lock:
+            for key, (counts, total, value_sum) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(('_bucket', names, key + (format_value(bound),), cumulative))
+                samples.append(('_bucket', names, key + ('+Inf',), total))
+                samples.append(('_sum', self.labels, key, value_sum))
+                samples.append(('_count', self.labels, key, total))
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=(), func=None):
+        return self.register(Counter(name, help_text, labels, func))
+
+    def gauge(self, name, help_text, labels=(), func=None):
+        return self.register(Gauge(name, help_text, labels, func))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def http_trace_config(histogram, errors):
+    """aiohttp TraceConfig timing every request by method and path"""
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        histogram.observe(time.perf_counter() - context.started, method=params.method, path=params.url.path)
+
+    async def on_request_exception(session, context, params):
+        errors.inc(method=params.method, path=params.url.path)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config
+
+
+async def monitor_loop_lag(histogram, gauge, interval=0.5):
+    """Measure how late the event loop wakes a sleeping task, forever"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        histogram.observe(lag)
+        gauge.set(lag)
+
+
+class MetricsServer:
+    """Serves a registry on GET /metrics for a local Prometheus scraper"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.runner = None
+
+        # aiohttp.web is only imported when the endpoint is enabled
+        from aiohttp import web
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+
+    async def start(self):
+        from aiohttp import web
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        print(f"📈 Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(body=self.registry.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+
+import discord
+
+from bot.audio import FRAME_DURATION
+
+# Sent after a sound ends so clients don't interpolate the last frame
+OPUS_SILENCE = b'\xf8\xff\xfe'
+
+
+class PacedStream:
+    """One voice client's current source inside a pacing loop"""
+
+    __slots__ = ('client', 'source', 'after', 'encode')
+
+    def __init__(self, client, source, after):
+        self.client = client
+        self.source = source
+        self.after = after
+        self.encode = not source.is_opus()
+
+
+class PacingLoop:
+    """A thread that sends one frame for each of its streams every 20ms
+
+    Ticks are scheduled against an absolute start time, like discord.py's
+    AudioPlayer, so sleep overshoot doesn't accumulate into drift. Sources
+    with a ``ready()`` method that returns False are skipped for that tick
+    instead of blocking every other stream behind a slow decode.
+    """
+
+    def __init__(self, name='soundboard-pacer', delay=FRAME_DURATION):
+        self.delay = delay
+        self.ticks = 0
+        self.late_ticks = 0
+        self.underruns = 0
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._streams)
+
+    def add(self, stream):
+        with self._lock:
+            previous = self._streams.get(id(stream.client))
+            self._streams[id(stream.client)] = stream
+        if previous is not None:
+            self._finish(previous, None, interrupted=True)
+        speak(stream.client, discord.SpeakingState.voice)
+        self._wake.set()
+
+    def remove(self, client):
+        with self._lock:
+            stream = self._streams.pop(id(client), None)
+        if stream is not None:
+            self._finish(stream, None)
+        return stream is not None
+
+    def get(self, client):
+        return self._streams.get(id(client))
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        for stream in list(self._streams.values()):
+            self.remove(stream.client)
+
+    def _run(self):
+        start, ticks = time.perf_counter(), 0
+        while not self._closed:
+            with self._lock:
+                streams = list(self._streams.values())
+            if not streams:
+                self._wake.wait()
+                self._wake.clear()
+                start, ticks = time.perf_counter(), 0
+                continue
+
+            for stream in streams:
+                self._send(stream)
+
+            ticks += 1
+            self.ticks += 1
+            delay = start + self.delay * ticks - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.late_ticks += 1
+
+    def _send(self, stream):
+        client, source = stream.client, stream.source
+        try:
+            if not client.is_connected():
+                return
+            ready = getattr(source, 'ready', None)
+            if ready is not None and not ready():
+                self.underruns += 1
+                return
+            data = source.read()
+            if not data:
+                self._end(stream, None)
+                return
+            client.send_audio_packet(data, encode=stream.encode)
+        except Exception as e:
+            self._end(stream, e)
+
+    def _end(self, stream, error):
+        with self._lock:
+            if self._streams.get(id(stream.client)) is not stream:
+                return
+            del self._streams[id(stream.client)]
+        self._finish(stream, error)
+
+    def _finish(self, stream, error, interrupted=False):
+        try:
+            stream.source.cleanup()
+        finally:
+            if not interrupted:
+                send_silence(stream.client)
+                speak(stream.client, discord.SpeakingState.none)
+            if stream.after is not None:
+                try:
+                    stream.after(error)
+                except Exception as e:
+                    print(f"Playback callback failed: {e}")
+            elif error is not None:
+                print(f"Playback failed: {error}")
+
+
+class PacingEngine:
+    """Plays audio for every voice session from a small fixed pool of pacing loops
+
+    Replaces discord.py's one AudioPlayer thread per VoiceClient: each
+    client is assigned to the least loaded loop, which sends its frames
+    with ``VoiceClient.send_audio_packet``. PCM sources are Opus-encoded
+    per client exactly as ``VoiceClient.play`` would.
+    """
+
+    def __init__(self, threads=1, encoder_factory=None):
+        self.encoder_factory = encoder_factory or discord.opus.Encoder
+        self.loops = [PacingLoop(name=f'soundboard-pacer-{i}') for i in range(max(1, threads))]
+        self._assigned = {}
+
+    def _loop_for(self, client):
+        loop = self._assigned.get(id(client))
+        if loop is None:
+            loop = min(self.loops, key=len)
+            self._assigned[id(client)] = loop
+        return loop
+
+    def play(self, client, source, after=None):
+        if not client.is_connected():
+            raise discord.ClientException('Not connected to voice.')
+        if not source.is_opus() and not getattr(client, 'encoder', None):
+            client.encoder = self.encoder_factory()
+        self._loop_for(client).add(PacedStream(client, source, after))
+
+    def stop(self, client):
+        loop = self._assigned.get(id(client))
+        if loop is not None:
+            loop.remove(client)
+
+    def forget(self, client):
+        """Stop and release a client that is going away"""
+        self.stop(client)
+        self._assigned.pop(id(client), None)
+
+    def is_playing(self, client):
+        loop = self._assigned.get(id(client))
+        return loop is not None and loop.get(client) is not None
+
+    def active(self):
+        return sum(len(loop) for loop in self.loops)
+
+    def close(self):
+        for loop in self.loops:
+            loop.close()
+        self._assigned.clear()
+
+
+def speak(client, state):
+    """Update the speaking indicator from a pacing thread"""
+    try:
+        asyncio.run_coroutine_threadsafe(client.ws.speak(state), client.client.loop)
+    except Exception:
+        pass
+
+
+def send_silence(client, count=5):
+    try:
+        for _ in range(count):
+            client.send_audio_packet(OPUS_SILENCE, encode=False)
+    except Exception:
+        pass
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+import aiohttp
+
+INDEX_FILE = '.remote-cache.json'
+
+
+class RemoteSoundCache:
+    """Sound files fetched on demand from the backend's /sounds route into a bounded local directory
+
+    For bots that don't share a disk with the backend. A cached file is
+    played as-is until it is revalidate_seconds old; the next play then
+    sends a conditional GET (If-None-Match / If-Modified-Since), which costs
+    one round trip and no download while the file is unchanged. If the
+    backend can't be reached, a cached copy is played stale rather than
+    failing. Beyond max_bytes the least recently played files are removed.
+
+    on_download(filenames) is awaited after files are (re)downloaded and
+    before fetch() returns, so they can be indexed before they're decoded;
+    on_evict(filename) is called for each file removed to stay in bounds.
+    Call open() to pick up files cached by an earlier run. The index is
+    read and written in a worker thread, like the downloads.
+    """
+
+    def __init__(self, base_url, directory, max_bytes, revalidate_seconds=300, timeout=30,
+                 on_download=None, on_evict=None):
+        self.base_url = base_url.rstrip('/')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.on_download = on_download
+        self.on_evict = on_evict
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.results = {'hit': 0, 'revalidated': 0, 'downloaded': 0, 'stale': 0, 'missing': 0, 'failed': 0}
+        self._entries = {}
+        self._fetching = {}
+        self._session = None
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def resident_bytes(self):
+        return sum(entry['size'] for entry in self._entries.values())
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    async def open(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.load)
+
+    def load(self):
+        """Read validators of files cached by an earlier run, dropping any that are gone"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            print(f"Failed to load remote sound cache index: {e}")
+            entries = {}
+        self._entries = {name: entry for name, entry in entries.items() if os.path.exists(self.path(name))}
+
+    def save(self):
+        """Write the index atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._entries, separators=(',', ':'))
+            self._dirty = False
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.index_path)
+
+    def _changed(self):
+        with self._lock:
+            self._dirty = True
+
+    def session(self):
+        """One session for every fetch, so they reuse kept-alive connections"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, filename):
+        """Local path of a sound, downloading or revalidating it first if needed; None if unavailable"""
+        path, downloaded = await self._fetch_once(filename, revalidate=False)
+        if downloaded and self.on_download is not None:
+            await self.on_download([filename])
+        return path
+
+    async def prefetch(self, filenames):
+        """Download or revalidate several sounds now, e.g. just after an upload; returns those downloaded"""
+        results = await asyncio.gather(*(self._fetch_once(f, revalidate=True) for f in filenames))
+        downloaded = [f for f, (_, fresh) in zip(filenames, results) if fresh]
+        if downloaded and self.on_download is not None:
+            await self.on_download(downloaded)
+        return downloaded
+
+    async def remove(self, filename):
+        """Forget a sound deleted from the backend"""
+        if self._entries.pop(filename, None) is not None:
+            self._changed()
+        await asyncio.get_running_loop().run_in_executor(None, self._discard, filename)
+
+    def _discard(self, filename):
+        try:
+            os.remove(self.path(filename))
+        except OSError:
+            pass
+        self.save()
+
+    async def _fetch_once(self, filename, revalidate):
+        """(path, downloaded), sharing one request between concurrent callers for the same file"""
+        if os.path.basename(filename) != filename or filename.startswith('.'):
+            return None, False
+        task = self._fetching.get(filename)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(filename, revalidate))
+            self._fetching[filename] = task
+            task.add_done_callback(lambda _: self._fetching.pop(filename, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, filename, revalidate):
+        path = self.path(filename)
+        entry = self._entries.get(filename)
+        now = time.time()
+        if entry is not None and not revalidate and now - entry['checked'] < self.revalidate_seconds:
+            entry['used'] = now
+            self.results['hit'] += 1
+            return path, False
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.session().get(f'{self.base_url}/{quote(filename)}', headers=headers) as resp:
+                if resp.status == 304 and entry is not None:
+                    entry['checked'] = entry['used'] = now
+                    self._changed()
+                    self.results['revalidated'] += 1
+                    return path, False
+                if resp.status == 404:
+                    if entry is not None:
+                        await self.remove(filename)
+                    self.results['missing'] += 1
+                    return None, False
+                resp.raise_for_status()
+                body = await resp.read()
+                etag, last_modified = resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if entry is not None:
+                print(f"⚠️ Couldn't revalidate {filename} ({e}), playing the cached copy")
+                self.results['stale'] += 1
+                return path, False
+            print(f"❌ Failed to fetch {filename}: {e}")
+            self.results['failed'] += 1
+            return None, False
+
+        await loop.run_in_executor(None, self._write, path, body)
+        self._entries[filename] = {'etag': etag, 'last_modified': last_modified, 'size': len(body),
+                                   'checked': now, 'used': now}
+        self._changed()
+        self.results['downloaded'] += 1
+        self.evict(keep=filename)
+        await loop.run_in_executor(None, self.save)
+        return path, True
+
+    def _write(self, path, body):
+        """Write a download beside its final path and rename it into place"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.fetch-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def evict(self, keep=None):
+        """Remove least recently played files until the cache fits; returns their names"""
+        total = self.resident_bytes
+        evicted = []
+        for filename in sorted(self._entries, key=lambda f: self._entries[f]['used']):
+            if total <= self.max_bytes:
+                break
+            if filename == keep or filename in self._fetching:
+                continue
+            try:
+                os.remove(self.path(filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Still open on some platforms; try again after the next download
+                print(f"Couldn't evict {filename}: {e}")
+                continue
+            total -= self._entries.pop(filename)['size']
+            evicted.append(filename)
+        if evicted:
+            self._changed()
+            for filename in evicted:
+                if self.on_evict is not None:
+                    self.on_evict(filename)
+        return evicted
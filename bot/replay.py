@@ -0,0 +1,174 @@
+"""
+Replay a play-traffic trace (BOT_TRACE_FILE) against a mock-mode bot.
+
+    python -m bot.replay trace.jsonl --speed 10 --report candidate.json
+    python -m bot.replay --compare baseline.json candidate.json
+
+Requests are re-issued at their recorded offsets (divided by --speed) into
+mock voice sessions for the guilds that had a connection when recorded, and
+latency, scheduling lag and drop metrics are reported. Segments are played
+as recorded; a scheduled multi-guild play is re-issued once for its
+guild_ids, starting on the next frame. Run the same trace on two builds and
+--compare the reports to spot regressions.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import statistics
+import sys
+import time
+import types
+
+if __package__ in (None, ''):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.audio import FRAME_DURATION
+from bot.sessions import VoiceSession
+from bot.trace import load_trace
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        'mean': round(statistics.mean(ordered), 3),
+        'p50': round(pick(0.50), 3),
+        'p95': round(pick(0.95), 3),
+        'p99': round(pick(0.99), 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def prepare_sessions(soundboard, records):
+    """Mock sessions for every guild that had a voice connection when recorded"""
+    guilds = {r['guild'] for r in records if r.get('guild') and r.get('outcome') != 'no_session'}
+    for guild in guilds:
+        channel = types.SimpleNamespace(id=int(guild), name=f'replay-{guild}')
+        soundboard.sessions.add(VoiceSession(int(guild), channel))
+
+
+def requests(records):
+    """Records as the requests that produced them: a scheduled play traces one line per guild"""
+    merged = []
+    for record in records:
+        previous = merged[-1] if merged else None
+        if (record.get('guild_ids') and previous is not None and previous.get('guild_ids') == record['guild_ids']
+                and previous.get('start_at') == record.get('start_at') and previous['sound'] == record['sound']):
+            previous['ok'] = previous.get('ok', False) or record.get('ok', False)
+            continue
+        merged.append(dict(record))
+    return merged
+
+
+async def replay(soundboard, records, speed=1.0):
+    """Re-issue records at their recorded pace; returns the metrics report"""
+    if not records:
+        return {'count': 0}
+
+    prepare_sessions(soundboard, records)
+    records = requests(records)
+    t0 = records[0]['t']
+    start = time.monotonic()
+    latencies, lags, outcomes, mismatches = [], [], collections.Counter(), 0
+
+    async def run(record):
+        nonlocal mismatches
+        issued = time.perf_counter()
+        source = record.get('src', 'replay')
+        segment = tuple(record['segment']) if record.get('segment') else None
+        if 'start_at' in record:
+            # The recorded start_at has passed; start on the next frame boundary instead
+            scheduled = await soundboard.schedule_play(
+                record['sound'], record.get('guild_ids'), time.time() * 1000, source, segment)
+            success = scheduled > 0
+        else:
+            success = await soundboard.trigger(record['sound'], record.get('guild'), source, segment)
+        latencies.append((time.perf_counter() - issued) * 1000)
+        if 'start_at' in record and success:
+            # Let the scheduled start run before the replay finishes
+            await asyncio.sleep(FRAME_DURATION)
+        outcome = 'played' if success else 'dropped'
+        outcomes[outcome] += 1
+        if success != record.get('ok', success):
+            mismatches += 1
+
+    tasks = []
+    for record in records:
+        target = start + (record['t'] - t0) / speed
+        delay = target - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lags.append(max(0.0, time.monotonic() - target) * 1000)
+        tasks.append(asyncio.create_task(run(record)))
+    await asyncio.gather(*tasks)
+
+    count = len(records)
+    return {
+        'count': count,
+        'speed': speed,
+        'wall_seconds': round(time.monotonic() - start, 3),
+        'outcomes': dict(outcomes),
+        'drop_rate': round(outcomes['dropped'] / count, 4),
+        'outcome_mismatches': mismatches,
+        'latency_ms': percentiles(latencies),
+        'schedule_lag_ms': percentiles(lags),
+        'recorded_latency_ms': percentiles([r['total'] for r in records if 'total' in r]),
+    }
+
+
+def compare(baseline, candidate):
+    """Print metric deltas between two replay reports"""
+    rows = [('drop_rate', baseline.get('drop_rate'), candidate.get('drop_rate'))]
+    for group in ('latency_ms', 'schedule_lag_ms'):
+        for key in ('mean', 'p50', 'p95', 'p99', 'max'):
+            rows.append((f'{group}.{key}', baseline.get(group, {}).get(key), candidate.get(group, {}).get(key)))
+
+    print(f"{'metric':<24}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for name, before, after in rows:
+        if before is None or after is None:
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+        print(f"{name:<24}{before:>12}{after:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace', nargs='?', help='trace file recorded with BOT_TRACE_FILE')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier')
+    parser.add_argument('--sounds-dir', help='sounds directory (default: BOT_SOUNDS_DIR or sounds)')
+    parser.add_argument('--report', help='write the JSON report here')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help='compare two reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        compare(*reports)
+        return
+    if not args.trace:
+        parser.error('a trace file is required unless --compare is used')
+
+    if args.sounds_dir:
+        os.environ['BOT_SOUNDS_DIR'] = args.sounds_dir
+    os.environ['BOT_MOCK_VOICE'] = 'true'
+    os.environ.pop('BOT_TRACE_FILE', None)
+    # bot.main builds its SoundboardBot on import, from the environment set above;
+    # replay into that one instead of constructing a second
+    from bot.main import soundboard
+
+    report = asyncio.run(replay(soundboard, load_trace(args.trace), args.speed))
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
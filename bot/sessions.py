@@ -0,0 +1,206 @@
+import random
+import time
+
+from bot.audio import MixerSource
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff for retry attempt (0-based), jittered to 50-100%"""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class VoiceSession:
+    """A guild's voice connection, backed by a real VoiceClient or mocked
+
+    Mock sessions (``client is None``) stand in for voice connections in
+    environments where Discord voice doesn't work, so callers never need to
+    check which kind they hold.
+    """
+
+    __slots__ = (
+        'guild_id', 'channel', 'client', 'engine', 'connected',
+        'mixer', 'volume', 'duck_gain', 'plays', 'failures',
+        'created_at', 'last_activity',
+        'reconnecting', 'reconnects', 'dropped_at',
+    )
+
+    def __init__(self, guild_id, channel, client=None, engine=None):
+        self.guild_id = guild_id
+        self.channel = channel
+        self.client = client
+        # Shared PacingEngine, or None for discord.py's per-client player thread
+        self.engine = engine
+        self.connected = True
+        # The mixer feeding the voice client, if any
+        self.mixer = None
+        # Guild volume and ducking gain (None: new sounds replace old ones)
+        self.volume = 1.0
+        self.duck_gain = None
+        self.plays = 0
+        self.failures = 0
+        self.created_at = time.monotonic()
+        self.last_activity = self.created_at
+        # Set while a dropped connection is being re-established
+        self.reconnecting = False
+        self.reconnects = 0
+        self.dropped_at = None
+
+    @property
+    def mock(self):
+        return self.client is None
+
+    def is_connected(self):
+        if self.client is None:
+            return self.connected
+        return self.client.is_connected()
+
+    def is_playing(self):
+        if self.client is None:
+            return False
+        if self.engine is not None:
+            return self.engine.is_playing(self.client)
+        return self.client.is_playing()
+
+    def drop(self):
+        """Mark the connection lost; settings, counters and the sounds being mixed are kept for the resume"""
+        self.reconnecting = True
+        self.dropped_at = time.monotonic()
+        if self.mixer is not None:
+            # Out of reach of the old client's player, which cleans up its source when it stops
+            self.mixer = self.mixer.detach()
+
+    def attach(self, client):
+        """Resume on a new voice client, continuing the mix; returns seconds since the drop
+
+        Sounds sent as shared Opus packets (see play()) aren't resumed.
+        """
+        if self.engine is not None and self.client is not None:
+            self.engine.forget(self.client)
+        self.client = client
+        self.connected = True
+        self.reconnecting = False
+        self.reconnects += 1
+        recovered = time.monotonic() - self.dropped_at if self.dropped_at is not None else 0.0
+        self.dropped_at = None
+        if self.mixer is not None and self.mixer.sources():
+            self._start(self.mixer)
+        else:
+            self.mixer = None
+        return recovered
+
+    def play(self, source, key=None, gain=1.0):
+        """Start source, replacing what is playing or ducking it under source
+
+        PCM sources go through the session's MixerSource so volume changes
+        apply mid-sound; a sound started while the mixer is still playing
+        joins it instead of restarting the player. Opus sources can't be
+        gain-adjusted and are sent as they are.
+        """
+        if not source.is_opus():
+            if self.mixer is not None and self.is_playing() and self.mixer.add(source, key, gain):
+                self.record_play()
+                return
+            self.mixer = MixerSource(self.volume, self.duck_gain)
+            self.mixer.add(source, key, gain)
+            source = self.mixer
+        else:
+            self.mixer = None
+        self._start(source)
+        self.record_play()
+
+    def _start(self, source):
+        if self.engine is not None:
+            self.engine.play(self.client, source)
+        else:
+            if self.client.is_playing():
+                self.client.stop()
+            self.client.play(source)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if self.mixer is not None:
+            self.mixer.volume = volume
+
+    def set_ducking(self, duck_gain):
+        """Duck older sounds to duck_gain under new ones, or None to replace them"""
+        self.duck_gain = duck_gain
+        if self.mixer is not None:
+            self.mixer.duck_gain = duck_gain
+
+    def record_play(self):
+        self.plays += 1
+        self.last_activity = time.monotonic()
+
+    def record_failure(self):
+        self.failures += 1
+        self.last_activity = time.monotonic()
+
+    async def disconnect(self):
+        self.connected = False
+        if self.client is not None:
+            if self.engine is not None:
+                self.engine.forget(self.client)
+            await self.client.disconnect()
+
+    def status(self):
+        """Voice connection entry reported to the backend"""
+        status = {
+            'channel_id': str(self.channel.id),
+            'channel_name': self.channel.name
+        }
+        if self.reconnecting:
+            status['reconnecting'] = True
+        return status
+
+
+class SessionRegistry:
+    """Voice sessions indexed by guild id and by channel id"""
+
+    def __init__(self):
+        self._by_guild = {}
+        self._by_channel = {}
+
+    def __contains__(self, guild_id):
+        return guild_id in self._by_guild
+
+    def __iter__(self):
+        return iter(list(self._by_guild.values()))
+
+    def __len__(self):
+        return len(self._by_guild)
+
+    def guild_ids(self):
+        return list(self._by_guild)
+
+    def get(self, guild_id):
+        return self._by_guild.get(guild_id)
+
+    def by_channel(self, channel_id):
+        return self._by_channel.get(channel_id)
+
+    def first(self):
+        """Any session, for events that don't name a guild"""
+        return next(iter(self._by_guild.values()), None)
+
+    def add(self, session):
+        self.remove(session.guild_id)
+        self._by_guild[session.guild_id] = session
+        self._by_channel[session.channel.id] = session
+        return session
+
+    def remove(self, guild_id):
+        session = self._by_guild.pop(guild_id, None)
+        if session is not None:
+            self._by_channel.pop(session.channel.id, None)
+        return session
+
+    def move(self, guild_id, channel):
+        """Re-index a session whose bot was moved to another channel"""
+        session = self._by_guild.get(guild_id)
+        if session is None or session.channel.id == channel.id:
+            return session
+        self._by_channel.pop(session.channel.id, None)
+        session.channel = channel
+        self._by_channel[channel.id] = session
+        return session
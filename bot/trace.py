@@ -0,0 +1,96 @@
+import json
+import queue
+import threading
+import time
+
+
+def elapsed_ms(since):
+    return round((time.perf_counter() - since) * 1000, 3)
+
+
+class TraceRecorder:
+    """Append-only JSON-lines trace of play requests
+
+    One compact line per request: offset from recorder start (``t``), wall
+    clock (``ts``), trigger source, guild, sound filename, outcome, per-stage
+    timings and total latency in milliseconds. Requests for part of a sound
+    add ``segment`` ([start, end] seconds); scheduled plays add ``start_at``
+    and the request's ``guild_ids``, one line per guild started.
+    ``bot.replay`` feeds these back into a mock-mode bot.
+
+    ``record`` only enqueues; a writer thread appends queued lines in
+    batches of up to ``batch_size`` (or every ``flush_interval`` seconds),
+    so tracing never puts file writes on the event loop.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.started = time.monotonic()
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=100000)
+        self._closed = threading.Event()
+        self._file = open(path, 'a', encoding='utf-8')
+
+        self._thread = threading.Thread(target=self._write, name='soundboard-trace', daemon=True)
+        self._thread.start()
+
+    def record(self, source, guild_id, sound, outcome, stages, started, segment=None, start_at=None,
+               guild_ids=None):
+        entry = {
+            't': round(time.monotonic() - self.started, 4),
+            'ts': round(time.time(), 3),
+            'src': source,
+            'guild': str(guild_id) if guild_id is not None else None,
+            'sound': sound,
+            'ok': outcome == 'played',
+            'outcome': outcome,
+            'stages': dict(stages),
+            'total': elapsed_ms(started),
+        }
+        if segment is not None:
+            entry['segment'] = list(segment)
+        if start_at is not None or guild_ids:
+            entry['start_at'] = start_at
+            entry['guild_ids'] = [str(g) for g in guild_ids or []]
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self):
+        try:
+            while not (self._closed.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._file.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in batch))
+                    self._file.flush()
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"Failed to write {len(batch)} trace records: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            self._file.close()
+
+    def flush(self):
+        """Block until every queued record is written"""
+        self._queue.join()
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+
+
+def load_trace(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -20,6 +20,60 @@ import ctypes.util
 import sys
 import platform
 
+# Fuzzy name matching is shared with the main bot when this file runs from
+# the repository; a standalone copy falls back to exact lookups
+try:
+    from bot.fuzzy import FuzzyIndex
+except ImportError:
+    FuzzyIndex = None
+
+# Likewise the remote sound cache, for running on a different host than the
+# backend: with BOT_SOUNDS_URL set, sounds/ holds copies fetched on demand
+try:
+    from bot.remote import RemoteSoundCache
+except ImportError:
+    RemoteSoundCache = None
+
+_fuzzy_index = (None, None)
+_remote_fuzzy_index = (None, None)
+
+
+def fuzzy_index(extensions):
+    """FuzzyIndex over sounds/, rebuilt only when the directory changes"""
+    global _fuzzy_index
+    try:
+        mtime = os.stat('sounds').st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if _fuzzy_index[0] != mtime or _fuzzy_index[1] is None:
+        _fuzzy_index = (mtime, FuzzyIndex.from_directory('sounds', extensions))
+    return _fuzzy_index[1]
+
+
+async def remote_fuzzy_index(backend_url, extensions):
+    """FuzzyIndex over the backend's whole library, rebuilt only when its listing ETag changes
+
+    With a remote library sounds/ only holds the files fetched so far, so
+    near misses are matched against the backend listing instead; if the
+    backend can't be reached the cached files are all there is.
+    """
+    global _remote_fuzzy_index
+    etag, index = _remote_fuzzy_index
+    headers = {'If-None-Match': etag} if etag and index is not None else {}
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'{backend_url}/api/sounds', headers=headers) as resp:
+                if resp.status == 200:
+                    index = FuzzyIndex()
+                    for sound in await resp.json():
+                        index.add(sound['name'], sound['filename'])
+                    _remote_fuzzy_index = (resp.headers.get('ETag'), index)
+                elif resp.status != 304:
+                    print(f"⚠️  Sound listing failed: {resp.status}")
+    except aiohttp.ClientError as e:
+        print(f"⚠️  Sound listing failed: {e}")
+    return index if index is not None else fuzzy_index(extensions)
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -54,6 +108,14 @@ class SoundboardBot:
         # Default to WSL2 backend, but allow override
         self.backend_url = os.getenv('BACKEND_URL', 'http://localhost:3001')
         print(f"🔗 Backend URL: {self.backend_url}")
+        self.remote_sounds = None
+        sounds_url = os.getenv('BOT_SOUNDS_URL')
+        if sounds_url and RemoteSoundCache is not None:
+            self.remote_sounds = RemoteSoundCache(
+                sounds_url, 'sounds', int(os.getenv('REMOTE_SOUND_CACHE_MB', '1024')) * 1024 * 1024,
+                revalidate_seconds=float(os.getenv('REMOTE_SOUND_REVALIDATE_SECONDS', '300'))
+            )
+            print(f"🌐 Fetching sounds from {sounds_url}")
     
     async def connect_to_voice(self, guild_id, channel_id):
         """Connect to a voice channel"""
@@ -232,10 +294,30 @@ async def play_sound_command(ctx, *, sound_name):
     
     for ext in sound_extensions:
         test_path = f"sounds/{sound_name}{ext}"
-        if os.path.exists(test_path):
+        if soundboard.remote_sounds is not None:
+            sound_path = await soundboard.remote_sounds.fetch(f"{sound_name}{ext}")
+        elif os.path.exists(test_path):
             sound_path = test_path
+        if sound_path:
             break
     
+    fuzzy_mode = os.getenv('FUZZY_PLAY_MODE', 'suggest').lower()
+    if not sound_path and FuzzyIndex is not None and fuzzy_mode != 'off':
+        if soundboard.remote_sounds is not None:
+            index = await remote_fuzzy_index(soundboard.backend_url, sound_extensions)
+        else:
+            index = fuzzy_index(sound_extensions)
+        matches = index.matches(sound_name)
+        if matches and fuzzy_mode == 'auto':
+            if soundboard.remote_sounds is not None:
+                sound_path = await soundboard.remote_sounds.fetch(matches[0][0])
+            else:
+                sound_path = f"sounds/{matches[0][0]}"
+        elif matches:
+            names = ', '.join(os.path.splitext(filename)[0] for filename, _ in matches)
+            await ctx.send(f"❌ Sound '{sound_name}' not found! Did you mean: {names}?")
+            return
+
     if not sound_path:
         await ctx.send(f"❌ Sound '{sound_name}' not found! (tried: {', '.join(sound_extensions)})")
         return
@@ -275,6 +357,17 @@ async def status_command(ctx):
     
     await ctx.send(status_msg)
 
+async def run(token):
+    """Log in to Discord with the remote sound cache's index loaded, closing its session on exit"""
+    async with bot:
+        if soundboard.remote_sounds is not None:
+            await soundboard.remote_sounds.open()
+        try:
+            await bot.start(token)
+        finally:
+            if soundboard.remote_sounds is not None:
+                await soundboard.remote_sounds.close()
+
 if __name__ == "__main__":
     token = os.getenv('DISCORD_TOKEN')
     if not token:
@@ -285,8 +378,11 @@ if __name__ == "__main__":
         sys.exit(1)
     else:
         print("🚀 Starting Discord Soundboard Bot (Windows Version)")
+        discord.utils.setup_logging()
         try:
-            bot.run(token)
+            asyncio.run(run(token))
+        except KeyboardInterrupt:
+            pass
         except Exception as e:
             print(f"❌ Failed to start bot: {e}")
             sys.exit(1)
\ No newline at end of file
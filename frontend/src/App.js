@@ -23,22 +23,44 @@ function App() {
     // Socket event listeners
     newSocket.on('connect', () => {
       console.log('Connected to server');
+      // Rooms are per connection, so resubscribe after every reconnect
+      newSocket.emit('subscribe', ['bot_status', 'sounds', 'hotkeys']);
     });
 
     newSocket.on('bot_status', (status) => {
       setBotStatus(status);
     });
 
+    // Incremental roster changes after the initial sync
+    newSocket.on('guild_event', ({ type, guild, version }) => {
+      setBotStatus(prev => {
+        const guilds = (prev.guilds || []).filter(g => g.id !== guild.id);
+        if (type !== 'guild_remove') {
+          guilds.push(guild);
+        }
+        return { ...prev, guilds, roster_version: version };
+      });
+    });
+
     newSocket.on('sound_added', (sound) => {
       setSounds(prev => [...prev, sound]);
     });
 
+    newSocket.on('sounds_imported', (imported) => {
+      setSounds(prev => {
+        const known = new Set(prev.map(sound => sound.filename));
+        return [...prev, ...imported.filter(sound => !known.has(sound.filename))];
+      });
+    });
+
     newSocket.on('sound_deleted', (filename) => {
       setSounds(prev => prev.filter(sound => sound.filename !== filename));
     });
 
-    newSocket.on('play_sound', (data) => {
-      console.log('Sound played:', data);
+    newSocket.on('sound_metadata', (metadata) => {
+      setSounds(prev => prev.map(sound =>
+        metadata[sound.filename] ? { ...sound, metadata: metadata[sound.filename] } : sound
+      ));
     });
 
     // Hotkey events
@@ -1,6 +1,10 @@
 class ApiClient {
   constructor() {
     this.baseUrl = 'http://localhost:3051';
+    // Optional direct trigger endpoint on the bot (DIRECT_TRIGGER_PORT), skips the backend relay.
+    // The bot must list this app's origin in DIRECT_TRIGGER_ORIGINS.
+    this.directUrl = localStorage.getItem('discord_soundboard_direct_url');
+    this.directToken = localStorage.getItem('discord_soundboard_direct_token');
     this.connected = false;
     this.testConnection();
   }
@@ -113,6 +117,14 @@ class ApiClient {
   }
 
   async playSound(soundFile, guildId = null, triggeredBy = 'hotkey') {
+    if (this.directUrl) {
+      try {
+        return await this.playSoundDirect(soundFile, guildId);
+      } catch (error) {
+        console.warn('Direct trigger failed, falling back to backend:', error);
+      }
+    }
+
     return await this.post('/api/play', {
       sound: soundFile,
       guild_id: guildId,
@@ -120,6 +132,25 @@ class ApiClient {
     });
   }
 
+  async playSoundDirect(soundFile, guildId = null) {
+    const headers = { 'Content-Type': 'application/json' };
+    if (this.directToken) {
+      headers.Authorization = `Bearer ${this.directToken}`;
+    }
+
+    const response = await fetch(`${this.directUrl}/play`, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({ sound: soundFile, guild_id: guildId })
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  }
+
   async getStatus() {
     return await this.get('/api/status');
   }
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.analytics import PlayAnalytics
+
+
+class TestPlayAnalytics:
+
+    def test_records_are_batched_and_queryable(self, tmp_path):
+        analytics = PlayAnalytics(str(tmp_path / 'plays.db'), flush_interval=0.05)
+        try:
+            for sound in ('airhorn.mp3', 'airhorn.mp3', 'bruh.mp3', 'airhorn.mp3'):
+                analytics.record(sound, 1, 'hotkey', 'played', 1.5)
+            analytics.record('bruh.mp3', 1, 'hotkey', 'failed', 2.0)
+            analytics.flush()
+
+            assert analytics.top_sounds(10) == [('airhorn.mp3', 3), ('bruh.mp3', 1)]
+            assert analytics.top_sounds(1) == [('airhorn.mp3', 3)]
+        finally:
+            analytics.close()
+
+    def test_popularity_window(self, tmp_path):
+        analytics = PlayAnalytics(str(tmp_path / 'plays.db'), flush_interval=0.05)
+        try:
+            analytics.record('old.mp3', 1, 'hotkey', 'played', 1.0)
+            analytics.flush()
+            since = time.time() + 0.001
+            time.sleep(0.01)
+            analytics.record('new.mp3', 1, 'hotkey', 'played', 1.0)
+            analytics.flush()
+
+            assert analytics.top_sounds(10, since) == [('new.mp3', 1)]
+        finally:
+            analytics.close()
+
+    def test_history_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'plays.db')
+        analytics = PlayAnalytics(path, flush_interval=0.05)
+        analytics.record('airhorn.mp3', 1, 'hotkey', 'played', 1.0)
+        analytics.close()
+
+        reopened = PlayAnalytics(path, flush_interval=0.05)
+        try:
+            assert reopened.top_sounds(10) == [('airhorn.mp3', 1)]
+        finally:
+            reopened.close()
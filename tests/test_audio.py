@@ -0,0 +1,266 @@
+import array
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.audio import (FRAME_SIZE, frame_span, FrameCache, CachedSource, StreamingSource, OpusCache,
+                       MixerSource, collect_frames, iter_decoder)
+
+
+class FakeDecoder:
+    """Stands in for FFmpegPCMAudio, yielding numbered frames"""
+
+    def __init__(self, count):
+        self.frames = [bytes([i % 256]) * FRAME_SIZE for i in range(count)]
+        self.reads = 0
+        self.cleaned_up = False
+
+    def read(self):
+        if self.reads >= len(self.frames):
+            return b''
+        frame = self.frames[self.reads]
+        self.reads += 1
+        return frame
+
+    def cleanup(self):
+        self.cleaned_up = True
+
+
+class FakeEncoder:
+    """Stands in for discord.opus.Encoder, counting encodes"""
+
+    SAMPLES_PER_FRAME = 960
+    encodes = 0
+
+    def encode(self, pcm, frame_size):
+        FakeEncoder.encodes += 1
+        return b'opus' + pcm[:1]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+class TestFrameCache:
+
+    def test_get_miss_and_hit(self):
+        cache = FrameCache(10 * FRAME_SIZE)
+        assert cache.get('a') is None
+        cache.put('a', [b'x' * FRAME_SIZE])
+        assert cache.get('a') == [b'x' * FRAME_SIZE]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = FrameCache(4 * FRAME_SIZE)
+        cache.put('a', [b'a' * FRAME_SIZE] * 2)
+        cache.put('b', [b'b' * FRAME_SIZE] * 2)
+        cache.get('a')
+        cache.put('c', [b'c' * FRAME_SIZE] * 2)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert cache.resident_bytes == 4 * FRAME_SIZE
+
+    def test_pinned_entries_are_not_evicted(self):
+        cache = FrameCache(4 * FRAME_SIZE)
+        cache.set_pinned({'a'})
+        cache.put('a', [b'a' * FRAME_SIZE] * 2)
+        cache.put('b', [b'b' * FRAME_SIZE] * 2)
+        cache.put('c', [b'c' * FRAME_SIZE] * 2)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+
+        cache.set_pinned(set())
+        cache.put('d', [b'd' * FRAME_SIZE] * 2)
+        assert 'a' not in cache
+
+    def test_rejects_oversized_entries(self):
+        cache = FrameCache(10 * FRAME_SIZE, max_entry_bytes=2 * FRAME_SIZE)
+        assert cache.put('a', [b'a' * FRAME_SIZE] * 3) is False
+        assert 'a' not in cache
+        assert cache.oversized == {'a'}
+
+        list(collect_frames(iter([b'b' * FRAME_SIZE] * 3), 'b', cache))
+        assert cache.oversized == {'a', 'b'}
+        cache.retain({'b'})
+        assert cache.oversized == {'b'}
+
+
+class TestSources:
+
+    def test_cached_source_reads_frames_in_order(self):
+        source = CachedSource([b'1', b'2'])
+        assert [source.read(), source.read(), source.read()] == [b'1', b'2', b'']
+
+    def test_streaming_source_plays_all_frames_and_fills_cache(self):
+        decoder = FakeDecoder(20)
+        cache = FrameCache(100 * FRAME_SIZE)
+        source = StreamingSource(decoder, key='s', cache=cache, buffer_frames=4)
+
+        played = []
+        while True:
+            frame = source.read()
+            if not frame:
+                break
+            played.append(frame)
+
+        assert played == decoder.frames
+        wait_for(lambda: 's' in cache)
+        assert cache.get('s') == decoder.frames
+        assert decoder.cleaned_up
+
+    def test_cached_source_plays_frame_range(self):
+        frames = FakeDecoder(10).frames
+        source = CachedSource(frames, first=3, stop=6)
+        assert [source.read() for _ in range(4)] == frames[3:6] + [b'']
+
+    def test_streaming_segment_plays_range_and_caches_whole_sound(self):
+        decoder = FakeDecoder(20)
+        cache = FrameCache(100 * FRAME_SIZE)
+        source = StreamingSource(decoder, key='s', cache=cache, first=5, stop=8)
+
+        assert [source.read() for _ in range(4)] == decoder.frames[5:8] + [b'']
+        source.cleanup()
+        wait_for(lambda: 's' in cache)
+        assert len(cache.get('s')) == 20
+
+    def test_frame_span_converts_seconds(self):
+        assert frame_span(1.0, 1.5) == (50, 75)
+        assert frame_span(None, 0.2) == (0, 10)
+        assert frame_span(2.0) == (100, None)
+
+    def test_streaming_source_applies_backpressure(self):
+        decoder = FakeDecoder(100)
+        source = StreamingSource(decoder, buffer_frames=5)
+
+        wait_for(lambda: source.buffered() == 5)
+        time.sleep(0.05)
+        # Decoder may hold one frame in hand while waiting for space
+        assert decoder.reads <= 6
+        source.cleanup()
+
+    def test_streaming_source_finishes_cache_after_early_stop(self):
+        decoder = FakeDecoder(50)
+        cache = FrameCache(100 * FRAME_SIZE)
+        source = StreamingSource(decoder, key='s', cache=cache, buffer_frames=2)
+
+        assert source.read() == decoder.frames[0]
+        source.cleanup()
+
+        wait_for(lambda: 's' in cache)
+        assert len(cache.get('s')) == 50
+
+
+def tone(level, frames):
+    return [array.array('h', [level]).tobytes() * (FRAME_SIZE // 2)] * frames
+
+
+def level_of(frame):
+    return array.array('h', frame)[0]
+
+
+class TestMixerSource:
+
+    def test_volume_changes_mid_sound(self):
+        mixer = MixerSource()
+        mixer.add(CachedSource(tone(1000, 3)), key='a')
+
+        assert level_of(mixer.read()) == 1000
+        mixer.volume = 0.5
+        assert level_of(mixer.read()) == 500
+        mixer.set_sound_gain('a', 0.5)
+        assert level_of(mixer.read()) == 250
+        assert mixer.read() == b''
+
+    def test_new_sound_replaces_old_without_ducking(self):
+        mixer = MixerSource()
+        old = CachedSource(tone(1000, 10))
+        mixer.add(old)
+        mixer.add(CachedSource(tone(200, 1)))
+
+        assert mixer.sources() != [old]
+        assert level_of(mixer.read()) == 200
+        assert mixer.read() == b''
+        assert not mixer.add(CachedSource(tone(200, 1)))
+
+    def test_ducking_ramps_older_sounds_down_and_back(self):
+        mixer = MixerSource(duck_gain=0.5, ramp_frames=2)
+        mixer.add(CachedSource(tone(1000, 10)))
+        assert level_of(mixer.read()) == 1000
+        mixer.add(CachedSource(tone(100, 2)))
+
+        assert [level_of(mixer.read()) for _ in range(2)] == [750 + 100, 500 + 100]
+        # The newer sound ends on the next read, then the older one ramps back up
+        assert [level_of(mixer.read()) for _ in range(3)] == [500, 750, 1000]
+
+    def test_mix_saturates_instead_of_wrapping(self):
+        mixer = MixerSource(duck_gain=1.0)
+        mixer.add(CachedSource(tone(30000, 2)))
+        mixer.add(CachedSource(tone(30000, 2)))
+        assert level_of(mixer.read()) == 32767
+
+    def test_short_last_frame_is_padded(self):
+        mixer = MixerSource()
+        mixer.add(CachedSource([b'\x01\x00' * 10]))
+        assert len(mixer.read()) == FRAME_SIZE
+
+
+class TestOpusBroadcast:
+
+    def setup_method(self):
+        FakeEncoder.encodes = 0
+
+    def test_subscribers_share_one_encode(self):
+        decoder = FakeDecoder(10)
+        cache = OpusCache(1024 * 1024, encoder_factory=FakeEncoder)
+        broadcast = cache.open('s', iter_decoder(decoder))
+        subscribers = [broadcast.subscribe() for _ in range(5)]
+
+        for subscriber in subscribers:
+            assert subscriber.is_opus()
+            packets = [subscriber.read() for _ in range(11)]
+            assert packets[:10] == [b'opus' + bytes([i]) for i in range(10)]
+            assert packets[10] == b''
+
+        assert FakeEncoder.encodes == 10
+        assert decoder.cleaned_up
+
+    def test_subscriber_seeks_to_segment(self):
+        cache = OpusCache(1024 * 1024, encoder_factory=FakeEncoder)
+        broadcast = cache.open('s', FakeDecoder(10).frames)
+        subscriber = broadcast.subscribe(first=4, stop=6)
+        assert [subscriber.read() for _ in range(3)] == [b'opus\x04', b'opus\x05', b'']
+
+    def test_late_subscriber_reuses_finished_encode(self):
+        cache = OpusCache(1024 * 1024, encoder_factory=FakeEncoder)
+        first = cache.open('s', FakeDecoder(4).frames)
+        wait_for(lambda: first.finished)
+
+        assert cache.open('s', FakeDecoder(4).frames) is first
+        assert cache.get('s').subscribe().read() == b'opus\x00'
+        assert FakeEncoder.encodes == 4
+        assert cache.resident_bytes == first.nbytes
+
+    def test_evicts_finished_broadcasts_over_budget(self):
+        cache = OpusCache(6, encoder_factory=FakeEncoder)
+        a = cache.open('a', FakeDecoder(1).frames)
+        wait_for(lambda: a.finished)
+        b = cache.open('b', FakeDecoder(1).frames)
+        wait_for(lambda: b.finished)
+
+        assert 'a' not in cache
+        assert 'b' in cache
+
+    def test_collect_frames_fills_pcm_cache(self):
+        decoder = FakeDecoder(3)
+        cache = FrameCache(100 * FRAME_SIZE)
+
+        assert list(collect_frames(iter_decoder(decoder), 's', cache)) == decoder.frames
+        assert cache.get('s') == decoder.frames
@@ -1,5 +1,7 @@
 import pytest
 import asyncio
+import threading
+import time
 import os
 from unittest.mock import AsyncMock, MagicMock, patch
 import sys
@@ -7,6 +9,45 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import discord
 
 from bot.main import SoundboardBot
+from bot.audio import FRAME_SIZE, CachedSource, StreamingSource, OpusCache, BroadcastSubscriber
+from bot.sessions import VoiceSession
+from bot.catalog import SoundCatalog
+from bot.metadata import MetadataStore
+
+
+class FakeResponse:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Records JSON bodies posted through aiohttp.ClientSession"""
+
+    def __init__(self, posts):
+        self.posts = posts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def post(self, url, json=None):
+        self.posts.append((url, json))
+        return FakeResponse()
+
+
+def make_guild(guild_id):
+    guild = MagicMock()
+    guild.id = guild_id
+    guild.name = f'Guild {guild_id}'
+    guild.member_count = 10
+    return guild
 
 
 class TestSoundboardBot:
@@ -39,7 +80,7 @@ class TestSoundboardBot:
 
     def test_soundboard_init(self, soundboard):
         """Test SoundboardBot initialization"""
-        assert soundboard.voice_clients == {}
+        assert len(soundboard.sessions) == 0
         assert soundboard.backend_url == 'http://localhost:3001'
     
     @pytest.mark.asyncio
@@ -55,9 +96,27 @@ class TestSoundboardBot:
             result = await soundboard.connect_to_voice(12345, 67890)
             
             assert result is True
-            assert soundboard.voice_clients[12345] == mock_voice_client
+            assert soundboard.sessions.get(12345).client == mock_voice_client
+            assert soundboard.sessions.by_channel(67890).guild_id == 12345
             mock_voice_channel.connect.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_connect_to_voice_cancels_pending_reconnect(self, soundboard, mock_guild, mock_voice_channel):
+        """Test that a fresh join stops a supervisor still resuming the old session"""
+        mock_voice_channel.connect.return_value = MagicMock()
+        reconnect = asyncio.create_task(asyncio.sleep(60))
+        soundboard.reconnect_tasks[12345] = reconnect
+
+        with patch('bot.main.bot') as mock_bot, \
+             patch.object(soundboard, 'update_voice_status', AsyncMock()):
+            mock_bot.get_guild.return_value = mock_guild
+            mock_guild.get_channel.return_value = mock_voice_channel
+            assert await soundboard.connect_to_voice(12345, 67890) is True
+
+        assert 12345 not in soundboard.reconnect_tasks
+        with pytest.raises(asyncio.CancelledError):
+            await reconnect
+
     @pytest.mark.asyncio
     async def test_connect_to_voice_guild_not_found(self, soundboard):
         """Test voice connection when guild is not found"""
@@ -67,7 +126,7 @@ class TestSoundboardBot:
             result = await soundboard.connect_to_voice(12345, 67890)
             
             assert result is False
-            assert 12345 not in soundboard.voice_clients
+            assert 12345 not in soundboard.sessions
     
     @pytest.mark.asyncio
     async def test_connect_to_voice_channel_not_found(self, soundboard, mock_guild):
@@ -79,29 +138,29 @@ class TestSoundboardBot:
             result = await soundboard.connect_to_voice(12345, 67890)
             
             assert result is False
-            assert 12345 not in soundboard.voice_clients
+            assert 12345 not in soundboard.sessions
     
     @pytest.mark.asyncio
     async def test_disconnect_from_voice(self, soundboard, mock_voice_client):
         """Test disconnecting from voice channel"""
-        soundboard.voice_clients[12345] = mock_voice_client
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
         
         await soundboard.disconnect_from_voice(12345)
         
         mock_voice_client.disconnect.assert_called_once()
-        assert 12345 not in soundboard.voice_clients
+        assert 12345 not in soundboard.sessions
     
     @pytest.mark.asyncio
     async def test_disconnect_from_voice_not_connected(self, soundboard):
         """Test disconnecting when not connected to voice"""
         # Should not raise an exception
         await soundboard.disconnect_from_voice(12345)
-        assert 12345 not in soundboard.voice_clients
+        assert 12345 not in soundboard.sessions
     
     @pytest.mark.asyncio
     async def test_play_sound_success(self, soundboard, mock_voice_client):
         """Test successful sound playback"""
-        soundboard.voice_clients[12345] = mock_voice_client
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
         
         with patch('discord.FFmpegPCMAudio') as mock_audio:
             mock_source = MagicMock()
@@ -111,12 +170,27 @@ class TestSoundboardBot:
             
             assert result is True
             mock_audio.assert_called_once_with('test.mp3')
-            mock_voice_client.play.assert_called_once_with(mock_source)
+            played = mock_voice_client.play.call_args[0][0].sources()[0]
+            assert isinstance(played, StreamingSource)
+            assert played.decoder is mock_source
+    
+    @pytest.mark.asyncio
+    async def test_play_sound_uses_cached_frames(self, soundboard, mock_voice_client):
+        """Test that a cached sound is played without spawning ffmpeg"""
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
+        soundboard.frame_cache.put('test.mp3', [b'\x01' * FRAME_SIZE])
+        
+        with patch('discord.FFmpegPCMAudio') as mock_audio:
+            result = await soundboard.play_sound(12345, 'test.mp3')
+            
+            assert result is True
+            mock_audio.assert_not_called()
+            assert isinstance(mock_voice_client.play.call_args[0][0].sources()[0], CachedSource)
     
     @pytest.mark.asyncio
     async def test_play_sound_stops_current_sound(self, soundboard, mock_voice_client):
         """Test that current sound is stopped before playing new one"""
-        soundboard.voice_clients[12345] = mock_voice_client
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
         mock_voice_client.is_playing.return_value = True
         
         with patch('discord.FFmpegPCMAudio') as mock_audio:
@@ -134,9 +208,655 @@ class TestSoundboardBot:
     @pytest.mark.asyncio
     async def test_play_sound_audio_error(self, soundboard, mock_voice_client):
         """Test sound playback with audio error"""
-        soundboard.voice_clients[12345] = mock_voice_client
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
         
         with patch('discord.FFmpegPCMAudio', side_effect=Exception("Audio error")):
             result = await soundboard.play_sound(12345, 'test.mp3')
             
-            assert result is False
\ No newline at end of file
+            assert result is False
+    
+    @pytest.mark.asyncio
+    async def test_sync_guilds_is_paginated(self, soundboard):
+        """Test that the initial guild roster is sent in pages"""
+        soundboard.guild_sync_page_size = 2
+        posts = []
+        
+        with patch('aiohttp.ClientSession', lambda **kwargs: FakeSession(posts)):
+            result = await soundboard.sync_guilds([make_guild(i) for i in range(5)])
+        
+        assert result is True
+        assert [url.rsplit('/', 1)[1] for url, _ in posts] == ['sync'] * 3
+        assert [len(body['guilds']) for _, body in posts] == [2, 2, 1]
+        assert {body['total_pages'] for _, body in posts} == {3}
+        assert len({body['version'] for _, body in posts}) == 1
+    
+    @pytest.mark.asyncio
+    async def test_publish_metadata_is_batched_and_checked(self, soundboard):
+        """Test that sound metadata is sent in bounded batches and a rejected batch is reported"""
+        soundboard.metadata_batch_size = 2
+        entries = [MagicMock(filename=f'{i}.mp3', digest=f'd{i}') for i in range(5)]
+        posts = []
+
+        with patch('aiohttp.ClientSession', lambda **kwargs: FakeSession(posts)), \
+             patch.object(soundboard.metadata, 'get', return_value={'duration': 1.0}):
+            assert await soundboard.publish_metadata(entries) is True
+            assert [len(body['sounds']) for _, body in posts] == [2, 2, 1]
+            assert posts[0][1]['sounds']['0.mp3'] == {'duration': 1.0, 'digest': 'd0'}
+
+            posts.clear()
+            with patch.object(FakeResponse, 'status', 413):
+                assert await soundboard.publish_metadata(entries) is False
+            assert len(posts) == 1
+
+    @pytest.mark.asyncio
+    async def test_guild_events_have_increasing_versions(self, soundboard):
+        """Test that incremental guild events carry increasing versions"""
+        posts = []
+        
+        with patch('aiohttp.ClientSession', lambda **kwargs: FakeSession(posts)):
+            await soundboard.send_guild_event('guild_join', make_guild(1))
+            await soundboard.send_guild_event('guild_remove', make_guild(1))
+        
+        first, second = posts[0][1], posts[1][1]
+        assert first['type'] == 'guild_join'
+        assert second['type'] == 'guild_remove'
+        assert second['version'] > first['version']
+        assert first['guild']['id'] == '1'
+    
+    @pytest.mark.asyncio
+    async def test_register_with_backend_sends_guild_ids(self, soundboard):
+        """Test that the bot registers its guilds for targeted routing"""
+        soundboard.sio = MagicMock()
+        soundboard.sio.connected = True
+        soundboard.sio.emit = AsyncMock()
+        
+        with patch('bot.main.bot') as mock_bot:
+            mock_bot.guilds = [make_guild(1), make_guild(2)]
+            await soundboard.register_with_backend()
+        
+        soundboard.sio.emit.assert_awaited_once_with(
+            'register_bot', {'worker_id': 'default', 'guild_ids': ['1', '2']})
+    
+    @pytest.mark.asyncio
+    async def test_register_with_backend_from_connect_handler(self, soundboard):
+        """Test that registration isn't skipped before sio.connected is set"""
+        soundboard.sio.namespaces = {'/': 'sid'}
+        soundboard.sio.emit = AsyncMock()
+        
+        with patch('bot.main.bot') as mock_bot:
+            mock_bot.guilds = [make_guild(1)]
+            await soundboard.register_with_backend()
+        
+        soundboard.sio.emit.assert_awaited_once_with(
+            'register_bot', {'worker_id': 'default', 'guild_ids': ['1']})
+    
+    @pytest.mark.asyncio
+    async def test_startup_runs_once_beside_login(self, soundboard):
+        """Test that startup brings up the library and backend connection concurrently, once"""
+        soundboard.load_catalog = AsyncMock()
+        soundboard.start_analytics = AsyncMock()
+        soundboard.ingest_metadata = AsyncMock()
+        soundboard.connect_to_backend = AsyncMock(side_effect=ConnectionError('backend down'))
+        soundboard.install_reload_signal = MagicMock()
+        
+        with patch('bot.main.load_opus', return_value=False):
+            task = soundboard.begin_startup()
+            assert soundboard.begin_startup() is task
+            await task
+            await soundboard.ingest_task
+        
+        # A failed step doesn't stop the others
+        soundboard.load_catalog.assert_awaited_once()
+        soundboard.start_analytics.assert_awaited_once()
+        soundboard.ingest_metadata.assert_awaited_once()
+        soundboard.install_reload_signal.assert_called_once()
+        assert soundboard.startup_seconds is not None
+    
+    @pytest.mark.asyncio
+    async def test_schedule_play_starts_all_guilds_on_frame_boundary(self, soundboard, tmp_path):
+        """Test that a scheduled play starts every guild together"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        clients = {}
+        for guild_id in (1, 2):
+            client = MagicMock()
+            client.is_playing.return_value = False
+            clients[guild_id] = client
+            soundboard.sessions.add(VoiceSession(guild_id, MagicMock(id=guild_id * 10), client))
+        started = {}
+        
+        loop = asyncio.get_running_loop()
+        with patch.object(soundboard, 'create_source', return_value=MagicMock()), \
+             patch.object(loop, 'call_at', wraps=loop.call_at) as call_at:
+            for guild_id, client in clients.items():
+                client.play.side_effect = lambda source, g=guild_id: started.setdefault(g, loop.time())
+            start_at = (time.time() + 0.05) * 1000
+            scheduled = await soundboard.schedule_play('airhorn.mp3', ['1', '2'], start_at)
+            await asyncio.sleep(0.15)
+        
+        assert scheduled == 2
+        target = call_at.call_args_list[0][0][0]
+        assert abs(target / 0.02 - round(target / 0.02)) < 1e-6
+        assert set(started) == {1, 2}
+        assert abs(started[1] - started[2]) < 0.005
+    
+    @pytest.mark.asyncio
+    async def test_schedule_play_encodes_once_for_all_guilds(self, soundboard, tmp_path):
+        """Test that a multi-guild play shares one Opus encode"""
+        class FakeEncoder:
+            SAMPLES_PER_FRAME = 960
+            encode = MagicMock(return_value=b'opus')
+
+        path = tmp_path / 'airhorn.mp3'
+        path.write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.opus_cache = OpusCache(1024 * 1024, encoder_factory=FakeEncoder)
+        soundboard.frame_cache.put(str(path), [b'\x00' * FRAME_SIZE] * 3)
+        clients = []
+        for guild_id in (1, 2, 3):
+            client = MagicMock()
+            client.is_playing.return_value = False
+            clients.append(client)
+            soundboard.sessions.add(VoiceSession(guild_id, MagicMock(id=guild_id * 10), client))
+
+        assert await soundboard.schedule_play('airhorn.mp3', ['1', '2', '3']) == 3
+        await asyncio.sleep(0.1)
+
+        sources = [client.play.call_args[0][0] for client in clients]
+        assert all(isinstance(source, BroadcastSubscriber) for source in sources)
+        assert len({id(source.broadcast) for source in sources}) == 1
+        assert FakeEncoder.encode.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_schedule_play_rejects_far_future(self, soundboard, tmp_path):
+        """Test that plays beyond the scheduling horizon or at no valid time are refused before decoding"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.sessions.add(VoiceSession(1, MagicMock(id=10), MagicMock()))
+        
+        start_at = (time.time() + soundboard.max_schedule_ahead + 60) * 1000
+        with patch.object(soundboard, 'create_source') as create_source:
+            assert await soundboard.schedule_play('airhorn.mp3', ['1'], start_at) == 0
+            assert await soundboard.schedule_play('airhorn.mp3', ['1'], 'soon') == 0
+            assert await soundboard.schedule_play('airhorn.mp3', ['1'], 'nan') == 0
+            assert await soundboard.schedule_play('airhorn.mp3', ['1'], [5]) == 0
+        create_source.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_trigger_counts_outcomes_and_stages(self, soundboard, tmp_path):
+        """Test that play requests show up in the metrics"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.sessions.add(VoiceSession(1, MagicMock(id=10)))
+        
+        assert await soundboard.trigger('airhorn.mp3', '1', 'hotkey')
+        assert not await soundboard.trigger('missing.mp3', '1', 'hotkey')
+        
+        assert soundboard.plays_total.value(outcome='played', source='hotkey') == 1
+        assert soundboard.plays_total.value(outcome='not_found', source='hotkey') == 1
+        assert soundboard.stage_seconds.count(stage='resolve') == 1
+        assert 'soundboard_voice_sessions{mode="mock"} 1' in soundboard.metrics.render()
+    
+    def test_metrics_report_queue_depths(self, soundboard, mock_voice_client):
+        """Test that analytics, stream buffers and mixers expose how much is queued"""
+        soundboard.analytics = MagicMock(dropped=3, pending=MagicMock(return_value=12))
+        session = soundboard.sessions.add(VoiceSession(1, MagicMock(id=10), mock_voice_client))
+        session.set_ducking(0.3)
+        mock_voice_client.is_playing.return_value = True
+        stream = MagicMock(spec=StreamingSource)
+        stream.buffered.return_value = 7
+        stream.is_opus.return_value = False
+        session.play(stream, 'a')
+        session.play(CachedSource([b'\x00' * FRAME_SIZE]), 'b')
+        soundboard.sessions.add(VoiceSession(2, MagicMock(id=20), MagicMock()))
+
+        rendered = soundboard.metrics.render()
+        assert 'soundboard_analytics_queue_depth 12' in rendered
+        assert 'soundboard_analytics_dropped_total 3' in rendered
+        assert 'soundboard_stream_buffered_frames{guild="1"} 7' in rendered
+        assert 'soundboard_mixer_tracks{guild="1"} 2' in rendered
+        assert 'soundboard_mixer_tracks{guild="2"} 0' in rendered
+
+    @pytest.mark.asyncio
+    async def test_remote_library_fetches_and_indexes_before_playing(self, soundboard, tmp_path):
+        """Test that a bot without the backend's disk fetches sounds and caches them by digest"""
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.sessions.add(VoiceSession(1, MagicMock(id=10)))
+
+        async def fetch(filename):
+            if filename != 'airhorn.mp3':
+                return None
+            (tmp_path / filename).write_bytes(b'audio')
+            await soundboard.remote_downloaded([filename])
+            return str(tmp_path / filename)
+        soundboard.remote = MagicMock(fetch=AsyncMock(side_effect=fetch), prefetch=AsyncMock())
+
+        with patch.object(soundboard, 'add_sounds', AsyncMock()):
+            assert await soundboard.trigger('airhorn.mp3', '1', 'hotkey')
+            assert not await soundboard.trigger('missing.mp3', '1', 'hotkey')
+        assert soundboard.catalog.get('airhorn.mp3') is not None
+
+        # New uploads are fetched ahead of their first play
+        await soundboard.sio.handlers['/']['sound_added']({'filename': 'bruh.mp3'})
+        soundboard.remote.prefetch.assert_awaited_once_with(['bruh.mp3'])
+
+    @pytest.mark.asyncio
+    async def test_warm_cache_decodes_most_played_sounds(self, soundboard, tmp_path):
+        """Test that popular sounds are cached before anyone plays them"""
+        for name in ('airhorn.mp3', 'bruh.mp3'):
+            (tmp_path / name).write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.analytics_path = str(tmp_path / 'plays.db')
+        soundboard.cache_warm_top_k = 0
+        await soundboard.start_analytics()
+        try:
+            for sound in ('airhorn.mp3', 'airhorn.mp3', 'bruh.mp3'):
+                soundboard.analytics.record(sound, 1, 'hotkey', 'played', 1.0)
+            soundboard.analytics.flush()
+            soundboard.cache_warm_top_k = 1
+            
+            with patch.object(soundboard, 'decode_frames', return_value=iter([b'\x00' * FRAME_SIZE] * 2)) as decode:
+                assert await soundboard.warm_cache() == 1
+            
+            decode.assert_called_once_with(os.path.join(str(tmp_path), 'airhorn.mp3'))
+            assert os.path.join(str(tmp_path), 'airhorn.mp3') in soundboard.frame_cache
+        finally:
+            soundboard.analytics.close()
+    
+    @pytest.mark.asyncio
+    async def test_hotkey_events_pin_and_prefetch_bound_sounds(self, soundboard, tmp_path):
+        """Test that sounds bound to enabled hotkeys are pinned and unpinned with their bindings"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        path = os.path.join(str(tmp_path), 'airhorn.mp3')
+        handlers = soundboard.sio.handlers['/']
+        hotkey = {'id': 'h1', 'soundFile': 'airhorn.mp3', 'enabled': True}
+        
+        with patch.object(soundboard, 'decode_frames', return_value=iter([b'\x00' * FRAME_SIZE] * 2)):
+            await handlers['hotkey_added'](hotkey)
+            for _ in range(50):
+                if path in soundboard.frame_cache:
+                    break
+                await asyncio.sleep(0.01)
+        
+        assert soundboard.frame_cache.pinned == {path}
+        assert path in soundboard.frame_cache
+        
+        await handlers['hotkey_updated'](dict(hotkey, enabled=False))
+        assert soundboard.frame_cache.pinned == set()
+        
+        await handlers['hotkey_updated'](hotkey)
+        await handlers['hotkey_deleted']('h1')
+        assert soundboard.frame_cache.pinned == set()
+    
+    @pytest.mark.asyncio
+    async def test_pinned_sound_too_long_to_cache_is_decoded_once(self, soundboard, tmp_path):
+        """Test that refreshing pins doesn't keep re-decoding a sound over the per-entry limit"""
+        (tmp_path / 'long.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.frame_cache.max_entry_bytes = FRAME_SIZE
+        path = os.path.join(str(tmp_path), 'long.mp3')
+        handlers = soundboard.sio.handlers['/']
+        decode = MagicMock(side_effect=lambda p: iter([b'\x00' * FRAME_SIZE] * 2))
+
+        with patch.object(soundboard, 'decode_frames', decode):
+            await handlers['hotkey_added']({'id': 'h1', 'soundFile': 'long.mp3', 'enabled': True})
+            for _ in range(50):
+                if not soundboard.prefetching:
+                    break
+                await asyncio.sleep(0.01)
+            await handlers['hotkey_added']({'id': 'h2', 'soundFile': 'long.mp3', 'enabled': True})
+            await asyncio.sleep(0.05)
+
+        assert decode.call_count == 1
+        assert path in soundboard.frame_cache.pinned
+        assert path in soundboard.frame_cache.oversized
+        assert path not in soundboard.frame_cache
+
+    @pytest.mark.asyncio
+    async def test_reload_library_keeps_sessions_and_unchanged_cache(self, soundboard, tmp_path):
+        """Test that a reload swaps in a new catalog and only drops stale cache entries"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        (tmp_path / 'bruh.mp3').write_bytes(b'bruh')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        session = VoiceSession(1, MagicMock(id=10))
+        soundboard.sessions.add(session)
+        frames = [b'\x00' * FRAME_SIZE]
+        horn = soundboard.catalog.get('airhorn.mp3').digest
+        old_bruh = soundboard.catalog.get('bruh.mp3').digest
+        soundboard.frame_cache.put(horn, frames)
+        soundboard.frame_cache.put(old_bruh, frames)
+        old_catalog = soundboard.catalog
+        
+        (tmp_path / 'bruh.mp3').write_bytes(b'new bruh')
+        (tmp_path / 'huh.mp3').write_bytes(b'huh')
+        with patch.object(soundboard, 'ingest_metadata', AsyncMock()):
+            added, removed = await soundboard.reload_library()
+        
+        assert sorted(added) == ['bruh.mp3', 'huh.mp3']
+        assert soundboard.catalog is not old_catalog
+        assert horn in soundboard.frame_cache
+        assert old_bruh not in soundboard.frame_cache
+        assert soundboard.sessions.get(1) is session
+
+    @pytest.mark.asyncio
+    async def test_reload_keeps_sounds_added_and_deleted_mid_scan(self, soundboard, tmp_path):
+        """Test that sound_added/sound_deleted during a reload survive the catalog swap"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        (tmp_path / 'bruh.mp3').write_bytes(b'bruh')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        handlers = soundboard.sio.handlers['/']
+        scanned = asyncio.Event()
+        resume = threading.Event()
+        scan = SoundCatalog.scan
+        loop = asyncio.get_running_loop()
+
+        def slow_scan(catalog):
+            # Finish the scan, then hold the reload until the events below have run
+            result = scan(catalog)
+            loop.call_soon_threadsafe(scanned.set)
+            resume.wait(5)
+            return result
+
+        with patch.object(SoundCatalog, 'scan', slow_scan), \
+             patch.object(soundboard, 'ingest_metadata', AsyncMock()):
+            reload = asyncio.create_task(soundboard.reload_library())
+            await scanned.wait()
+            (tmp_path / 'huh.mp3').write_bytes(b'huh')
+            await handlers['sound_added']({'filename': 'huh.mp3'})
+            (tmp_path / 'bruh.mp3').unlink()
+            await handlers['sound_deleted']('bruh.mp3')
+            resume.set()
+            await reload
+
+        assert soundboard.catalog.get('huh.mp3') is not None
+        assert soundboard.catalog.get('bruh.mp3') is None
+        assert soundboard.catalog.get('airhorn.mp3') is not None
+
+    @pytest.mark.asyncio
+    async def test_dropped_session_reconnects_with_backoff(self, soundboard):
+        """Test that a dropped voice connection is resumed on a new client"""
+        channel = MagicMock(id=10)
+        channel.name = 'General'
+        new_client = MagicMock()
+        channel.connect = AsyncMock(side_effect=[Exception('timeout'), new_client])
+        old_client = MagicMock()
+        old_client.is_playing.return_value = False
+        # Like discord.py's player, stopping the old client cleans up what it was playing
+        old_client.disconnect = AsyncMock(side_effect=lambda **kw: old_client.play.call_args[0][0].cleanup())
+        session = soundboard.sessions.add(VoiceSession(1, channel, old_client))
+        sound = MagicMock()
+        sound.is_opus.return_value = False
+        session.play(sound, 'horn')
+        
+        with patch('bot.main.bot') as mock_bot, \
+             patch('bot.main.backoff_delay', return_value=0), \
+             patch.object(soundboard, 'update_voice_status', AsyncMock()):
+            mock_bot.get_channel.return_value = channel
+            assert await soundboard.supervise(session) is True
+        
+        assert soundboard.sessions.get(1) is session
+        assert session.client is new_client
+        # The sound that was mixing at the drop carries on on the new client
+        assert new_client.play.call_args[0][0].sources() == [sound]
+        sound.cleanup.assert_not_called()
+        assert soundboard.voice_reconnects.value(result='failed') == 1
+        assert soundboard.voice_recovery.count() == 1
+        assert 1 not in soundboard.reconnect_tasks
+    
+    @pytest.mark.asyncio
+    async def test_plays_during_reconnect_keep_the_session(self, soundboard, tmp_path):
+        """Test that plays are refused while reconnecting, and a leave isn't counted as a recovery"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+        soundboard.sounds_dir = str(tmp_path)
+        channel = MagicMock(id=10)
+        connected = asyncio.Event()
+        new_client = MagicMock()
+        new_client.disconnect = AsyncMock()
+
+        async def connect():
+            await connected.wait()
+            return new_client
+        channel.connect = connect
+        old_client = MagicMock()
+        old_client.disconnect = AsyncMock()
+        session = soundboard.sessions.add(VoiceSession(1, channel, old_client))
+        
+        with patch('bot.main.bot') as mock_bot, \
+             patch.object(soundboard, 'update_voice_status', AsyncMock()):
+            mock_bot.get_channel.return_value = channel
+            task = soundboard.supervise(session)
+            await asyncio.sleep(0)
+            assert not await soundboard.trigger('airhorn.mp3', '1', 'hotkey')
+            assert soundboard.sessions.get(1) is session
+            assert soundboard.plays_total.value(outcome='reconnecting', source='hotkey') == 1
+            
+            soundboard.sessions.remove(1)
+            connected.set()
+            assert await task is False
+        
+        new_client.disconnect.assert_awaited_once()
+        assert soundboard.voice_recovery.count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_reconnect_gives_up_when_channel_is_gone(self, soundboard):
+        """Test that a session is dropped once its channel can't be found"""
+        session = soundboard.sessions.add(VoiceSession(1, MagicMock(id=10), MagicMock()))
+        
+        with patch('bot.main.bot') as mock_bot, \
+             patch.object(soundboard, 'update_voice_status', AsyncMock()):
+            mock_bot.get_channel.return_value = None
+            assert await soundboard.supervise(session) is False
+        
+        assert 1 not in soundboard.sessions
+        assert soundboard.voice_reconnects.value(result='gave_up') == 1
+    
+    @pytest.mark.asyncio
+    async def test_slash_play_autocomplete_uses_name_index(self, soundboard, tmp_path):
+        """Test that /play suggests sounds by prefix from the catalog"""
+        from bot import main
+        for name in ('airhorn.mp3', 'airplane.mp3', 'bruh.mp3'):
+            (tmp_path / name).write_bytes(name.encode())
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        
+        with patch.object(main, 'soundboard', soundboard):
+            choices = await main.play_sound_autocomplete(MagicMock(), 'AIR')
+        
+        assert [(c.name, c.value) for c in choices] == [('airhorn', 'airhorn.mp3'), ('airplane', 'airplane.mp3')]
+    
+    @pytest.mark.asyncio
+    async def test_slash_play_defers_before_playing(self, soundboard, tmp_path):
+        """Test that /play acknowledges the interaction before a slow trigger, then follows up"""
+        from bot import main
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        soundboard.sessions.add(VoiceSession(1, MagicMock(id=2), MagicMock()))
+        interaction = MagicMock()
+        interaction.guild_id = 1
+        interaction.response.defer = AsyncMock()
+        interaction.response.send_message = AsyncMock()
+        interaction.followup.send = AsyncMock()
+
+        async def slow_trigger(*args):
+            interaction.response.defer.assert_awaited_once_with(ephemeral=True)
+            return True
+        soundboard.trigger = AsyncMock(side_effect=slow_trigger)
+
+        with patch.object(main, 'soundboard', soundboard):
+            await main.play_slash_command.callback(interaction, 'airhorn')
+
+        soundboard.trigger.assert_awaited_once_with('airhorn.mp3', 1, 'slash')
+        interaction.response.send_message.assert_not_awaited()
+        interaction.followup.send.assert_awaited_once_with('Playing airhorn', ephemeral=True)
+
+    @pytest.mark.asyncio
+    async def test_play_sound_event_resolves_near_miss_names(self, soundboard, tmp_path):
+        """Test fuzzy resolution in auto and suggest modes"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        handler = soundboard.sio.handlers['/']['play_sound']
+        
+        soundboard.fuzzy_mode = 'suggest'
+        entry, suggestions = await soundboard.resolve_sound('airhron')
+        assert entry is None and suggestions == ['airhorn.mp3']
+        
+        soundboard.fuzzy_mode = 'auto'
+        with patch.object(soundboard, 'dispatch_play', AsyncMock()) as dispatch:
+            await handler({'sound': 'airhron.mp3', 'triggered_by': 'hotkey'})
+        dispatch.assert_awaited_once_with({'sound': 'airhorn.mp3', 'triggered_by': 'hotkey'}, 'hotkey')
+
+        with patch.object(soundboard, 'dispatch_play', AsyncMock()) as dispatch:
+            await soundboard.sio.handlers['/']['bot_command']({'command': 'play', 'sound': 'airhron'})
+        dispatch.assert_awaited_once_with({'command': 'play', 'sound': 'airhorn.mp3'}, 'dashboard')
+        
+        soundboard.fuzzy_mode = 'off'
+        assert await soundboard.resolve_sound('airhron') == (None, [])
+
+    @pytest.mark.asyncio
+    async def test_remote_exact_name_beats_cached_near_miss(self, soundboard, tmp_path):
+        """Test that an uncached remote sound is fetched before fuzzy matching"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        soundboard.fuzzy_mode = 'auto'
+
+        async def fetch(filename):
+            if filename != 'airhorns.mp3':
+                return None
+            (tmp_path / filename).write_bytes(b'horns')
+            soundboard.catalog.add_file(filename)
+            return str(tmp_path / filename)
+
+        soundboard.remote = MagicMock()
+        soundboard.remote.fetch = AsyncMock(side_effect=fetch)
+        with patch.object(soundboard, 'dispatch_play', AsyncMock()) as dispatch:
+            await soundboard.sio.handlers['/']['play_sound']({'sound': 'airhorns'})
+        soundboard.remote.fetch.assert_awaited_once_with('airhorns.mp3')
+        dispatch.assert_awaited_once_with({'sound': 'airhorns.mp3'}, 'unknown')
+
+        # A name the backend doesn't have still falls back to the closest cached one
+        entry, _ = await soundboard.resolve_sound('airhron')
+        assert entry.filename == 'airhorn.mp3'
+    
+    @pytest.mark.asyncio
+    async def test_commands_for_unowned_guilds_are_dropped(self, soundboard):
+        """Test that a worker only plays in guilds the backend says it owns"""
+        play = soundboard.sio.handlers['/']['play_sound']
+        command = soundboard.sio.handlers['/']['bot_command']
+        await soundboard.sio.handlers['/']['ownership']({'guild_ids': ['1']})
+
+        with patch.object(soundboard, 'dispatch_play', AsyncMock()) as dispatch:
+            await play({'sound': 'airhorn.mp3', 'guild_id': '2'})
+            await command({'command': 'play', 'sound': 'airhorn.mp3', 'guild_id': '2'})
+            dispatch.assert_not_awaited()
+
+            await play({'sound': 'airhorn.mp3', 'guild_ids': ['1', '2'], 'start_at': 5})
+        dispatch.assert_awaited_once_with(
+            {'sound': 'airhorn.mp3', 'guild_ids': ['1'], 'start_at': 5}, 'unknown')
+
+    @pytest.mark.asyncio
+    async def test_commands_for_connected_guilds_are_kept(self, soundboard, mock_voice_client):
+        """Test that a worker keeps playing where it holds a voice session"""
+        await soundboard.sio.handlers['/']['ownership']({'guild_ids': ['1']})
+        soundboard.sessions.add(VoiceSession(12345, MagicMock(id=67890), mock_voice_client))
+
+        with patch.object(soundboard, 'dispatch_play', AsyncMock()) as dispatch:
+            await soundboard.sio.handlers['/']['play_sound']({'sound': 'airhorn.mp3', 'guild_ids': ['12345', '2']})
+        dispatch.assert_awaited_once_with({'sound': 'airhorn.mp3', 'guild_ids': ['12345']}, 'unknown')
+
+    @pytest.mark.asyncio
+    async def test_dispatch_play_resolves_cue_to_segment(self, soundboard, tmp_path):
+        """Test that a named cue plays only its frames from the cached sound"""
+        (tmp_path / 'speech.mp3').write_bytes(b'speech')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        entry = soundboard.catalog.get('speech.mp3')
+        soundboard.metadata.set_cue(entry.digest, 'punchline', 0.1, 0.14)
+        frames = [bytes([i]) * FRAME_SIZE for i in range(10)]
+        soundboard.frame_cache.put(entry.digest, frames)
+        
+        with patch.object(soundboard, 'trigger', AsyncMock(return_value=True)) as trigger:
+            assert await soundboard.dispatch_play({'sound': 'speech.mp3', 'cue': 'punchline'}, 'api')
+        trigger.assert_awaited_once_with('speech.mp3', None, 'api', (0.1, 0.14))
+        
+        source = soundboard.create_source(str(tmp_path / 'speech.mp3'), (0.1, 0.14))
+        assert isinstance(source, CachedSource)
+        assert [source.read() for _ in range(3)] == frames[5:7] + [b'']
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_play_rejects_bad_segments(self, soundboard):
+        """Test that unknown cues and inverted offsets don't play"""
+        with patch.object(soundboard, 'trigger', AsyncMock()) as trigger:
+            assert not await soundboard.dispatch_play({'sound': 'x.mp3', 'cue': 'nope'}, 'api')
+            assert not await soundboard.dispatch_play({'sound': 'x.mp3', 'start': 5, 'end': 2}, 'api')
+        trigger.assert_not_awaited()
+    
+    def test_split_segment_args(self):
+        """Test the !play segment syntax"""
+        from bot.main import split_segment_args
+        assert split_segment_args('long speech 12.5-15') == ('long speech', {'start': 12.5, 'end': 15.0})
+        assert split_segment_args('speech 1:02') == ('speech', {'start': 62.0})
+        assert split_segment_args('speech -3') == ('speech', {'start': None, 'end': 3.0})
+        assert split_segment_args('speech @intro') == ('speech', {'cue': 'intro'})
+        assert split_segment_args('airhorn') == ('airhorn', {})
+        assert split_segment_args('take 5') == ('take', {'start': 5.0})
+    
+    @pytest.mark.asyncio
+    async def test_sounds_imported_ingests_as_one_batch(self, soundboard, tmp_path):
+        """Test that a bulk import is analyzed and published once, not per file"""
+        for name in ('airhorn.mp3', 'bruh.mp3'):
+            (tmp_path / name).write_bytes(name.encode())
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        handler = soundboard.sio.handlers['/']['sounds_imported']
+        
+        with patch.object(soundboard, 'ingest_metadata', AsyncMock()) as ingest:
+            await handler([{'filename': 'airhorn.mp3'}, {'filename': 'bruh.mp3'}, {'filename': 'gone.mp3'}])
+        
+        assert len(soundboard.catalog) == 2
+        ingest.assert_awaited_once()
+        assert [e.filename for e in ingest.await_args.args[0]] == ['airhorn.mp3', 'bruh.mp3']
+    
+    @pytest.mark.asyncio
+    async def test_volume_settings_apply_live_and_survive_rejoin(self, soundboard, mock_voice_client, tmp_path):
+        """Test guild and per-sound volume reach the playing mixer"""
+        (tmp_path / 'airhorn.mp3').write_bytes(b'horn')
+        soundboard.sounds_dir = str(tmp_path)
+        soundboard.catalog = SoundCatalog(str(tmp_path))
+        soundboard.catalog.scan()
+        soundboard.metadata = MetadataStore(str(tmp_path / 'metadata.json'))
+        entry = soundboard.catalog.get('airhorn.mp3')
+        soundboard.frame_cache.put(entry.digest, [b'\x00' * FRAME_SIZE] * 3)
+        encoder = MagicMock(SAMPLES_PER_FRAME=960, encode=MagicMock(return_value=b'opus'))
+        soundboard.opus_cache = OpusCache(1024 * 1024, encoder_factory=lambda: encoder)
+        soundboard.opus_cache.open(entry.digest, [b'\x00' * FRAME_SIZE] * 3)
+        session = soundboard.sessions.add(soundboard.configure_session(VoiceSession(1, MagicMock(id=10), mock_voice_client)))
+        
+        # Even at unity gain with shared Opus packets ready, a single guild plays
+        # through its mixer, so a volume change reaches the sound already playing
+        assert await soundboard.play_sound(1, entry.path)
+        mixer = mock_voice_client.play.call_args[0][0]
+        assert session.mixer is mixer
+        assert isinstance(mixer.sources()[0], CachedSource)
+        assert soundboard.set_volume(1, 5.0) == soundboard.max_volume
+        assert mixer.volume == soundboard.max_volume
+        
+        soundboard.set_volume(1, 0.5)
+        with patch.object(soundboard, 'publish_metadata', AsyncMock()):
+            await soundboard.set_sound_volume('airhorn', 0.8)
+        assert mixer.volume == 0.5
+        assert mixer._tracks[0].gain == 0.8
+        assert soundboard.metadata.get(entry.digest)['volume'] == 0.8
+        
+        soundboard.set_ducking(1, True)
+        assert session.mixer.duck_gain == soundboard.duck_gain
+        rejoined = soundboard.configure_session(VoiceSession(1, MagicMock(id=10), MagicMock()))
+        assert (rejoined.volume, rejoined.duck_gain) == (0.5, soundboard.duck_gain)
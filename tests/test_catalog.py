@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.catalog import NameIndex, SoundCatalog
+
+
+def write(directory, filename, data):
+    path = directory / filename
+    path.write_bytes(data)
+    return path
+
+
+class TestSoundCatalog:
+
+    def test_scan_indexes_audio_files_only(self, tmp_path):
+        write(tmp_path, 'airhorn.mp3', b'horn')
+        write(tmp_path, 'notes.txt', b'text')
+        catalog = SoundCatalog(str(tmp_path))
+
+        added, removed = catalog.scan()
+
+        assert added == ['airhorn.mp3']
+        assert removed == []
+        assert catalog.get('airhorn.mp3').name == 'airhorn'
+
+    def test_identical_files_share_cache_key(self, tmp_path):
+        a = write(tmp_path, 'bruh.mp3', b'same audio')
+        b = write(tmp_path, 'bruh_copy.mp3', b'same audio')
+        c = write(tmp_path, 'other.mp3', b'different')
+        catalog = SoundCatalog(str(tmp_path))
+        catalog.scan()
+
+        assert catalog.cache_key(str(a)) == catalog.cache_key(str(b))
+        assert catalog.cache_key(str(a)) != catalog.cache_key(str(c))
+        assert list(catalog.duplicates().values()) == [['bruh.mp3', 'bruh_copy.mp3']]
+
+    def test_unknown_path_is_its_own_key(self, tmp_path):
+        catalog = SoundCatalog(str(tmp_path))
+        assert catalog.cache_key('sounds/missing.mp3') == 'sounds/missing.mp3'
+
+    def test_rescan_skips_unchanged_and_drops_removed(self, tmp_path):
+        write(tmp_path, 'a.mp3', b'a')
+        b = write(tmp_path, 'b.mp3', b'b')
+        catalog = SoundCatalog(str(tmp_path))
+        catalog.scan()
+
+        os.remove(b)
+        added, removed = catalog.scan()
+
+        assert added == []
+        assert removed == ['b.mp3']
+        assert len(catalog) == 1
+
+    def test_remove_reports_digest_only_when_unshared(self, tmp_path):
+        write(tmp_path, 'a.mp3', b'same')
+        write(tmp_path, 'b.mp3', b'same')
+        catalog = SoundCatalog(str(tmp_path))
+        catalog.scan()
+
+        assert catalog.remove_file('a.mp3') is None
+        assert catalog.remove_file('b.mp3') is not None
+        assert catalog.duplicates() == {}
+
+    def test_copy_rescans_without_touching_original(self, tmp_path):
+        write(tmp_path, 'airhorn.mp3', b'horn')
+        catalog = SoundCatalog(str(tmp_path))
+        catalog.scan()
+        write(tmp_path, 'bruh.mp3', b'bruh')
+
+        clone = catalog.copy()
+        added, removed = clone.scan()
+
+        assert added == ['bruh.mp3']
+        assert clone.get('bruh.mp3') is not None
+        assert catalog.get('bruh.mp3') is None
+        assert clone.get('airhorn.mp3') is catalog.get('airhorn.mp3')
+
+
+class TestNameIndex:
+
+    def test_complete_is_case_insensitive_and_sorted(self):
+        index = NameIndex()
+        for name in ('Bruh', 'airhorn', 'Air Raid', 'bonk'):
+            index.add(name, name + '.mp3')
+
+        assert index.complete('air') == ['Air Raid.mp3', 'airhorn.mp3']
+        assert index.complete('B') == ['bonk.mp3', 'Bruh.mp3']
+        assert index.complete('') == ['Air Raid.mp3', 'airhorn.mp3', 'bonk.mp3', 'Bruh.mp3']
+        assert index.complete('zzz') == []
+
+    def test_catalog_keeps_index_current(self, tmp_path):
+        write(tmp_path, 'airhorn.mp3', b'horn')
+        catalog = SoundCatalog(str(tmp_path))
+        catalog.scan()
+        write(tmp_path, 'airplane.mp3', b'plane')
+        catalog.add_file('airplane.mp3')
+        assert catalog.names.complete('air') == ['airhorn.mp3', 'airplane.mp3']
+
+        os.remove(tmp_path / 'airhorn.mp3')
+        catalog.scan()
+        assert catalog.names.complete('air') == ['airplane.mp3']
+        assert catalog.find('AIRPLANE').filename == 'airplane.mp3'
+        assert catalog.find('airhorn') is None
+
+    def test_complete_is_fast_on_large_libraries(self):
+        index = NameIndex()
+        for i in range(50000):
+            index.add(f'sound-{i:05d}', f'sound-{i:05d}.mp3')
+
+        started = time.perf_counter()
+        for prefix in ('sound-4', 'sound-12', 'x', ''):
+            assert len(index.complete(prefix)) <= 25
+        assert time.perf_counter() - started < 0.05
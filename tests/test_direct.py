@@ -0,0 +1,125 @@
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.direct import DirectTriggerServer
+
+
+@pytest.fixture
+def soundboard():
+    board = MagicMock()
+    board.dispatch_play = AsyncMock(return_value=True)
+    return board
+
+
+async def make_client(server):
+    client = TestClient(TestServer(server.app))
+    await client.start_server()
+    return client
+
+
+class TestDirectTriggerServer:
+
+    @pytest.mark.asyncio
+    async def test_play_with_token(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard, token='secret'))
+        try:
+            resp = await client.post('/play', json={'sound': 'airhorn.mp3', 'guild_id': '1'},
+                                     headers={'Authorization': 'Bearer secret'})
+            body = await resp.json()
+        finally:
+            await client.close()
+
+        assert resp.status == 200
+        assert body['success'] is True
+        soundboard.dispatch_play.assert_awaited_once_with({'sound': 'airhorn.mp3', 'guild_id': '1'}, 'direct')
+
+    @pytest.mark.asyncio
+    async def test_rejects_wrong_token(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard, token='secret'))
+        try:
+            resp = await client.post('/play', json={'sound': 'airhorn.mp3'},
+                                     headers={'Authorization': 'Bearer nope'})
+        finally:
+            await client.close()
+
+        assert resp.status == 401
+        soundboard.dispatch_play.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_requires_sound(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard))
+        try:
+            resp = await client.post('/play', json={})
+        finally:
+            await client.close()
+
+        assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_websocket_replies_per_command(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard, token='secret'))
+        try:
+            ws = await client.ws_connect('/ws?token=secret')
+            await ws.send_json({'id': 7, 'sound': 'airhorn.mp3'})
+            reply = await ws.receive_json()
+            await ws.close()
+        finally:
+            await client.close()
+
+        assert reply['id'] == 7
+        assert reply['success'] is True
+
+    @pytest.mark.asyncio
+    async def test_refuses_unlisted_browser_origins(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard))
+        try:
+            resp = await client.post('/play', data='{"sound": "airhorn.mp3"}',
+                                     headers={'Origin': 'https://evil.example', 'Content-Type': 'text/plain'})
+        finally:
+            await client.close()
+
+        assert resp.status == 403
+        soundboard.dispatch_play.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_answers_preflight_for_allowed_origin(self, soundboard):
+        origin = 'overwolf-extension://app'
+        client = await make_client(DirectTriggerServer(soundboard, token='secret', allowed_origins=[origin]))
+        try:
+            preflight = await client.options('/play', headers={
+                'Origin': origin,
+                'Access-Control-Request-Method': 'POST',
+                'Access-Control-Request-Headers': 'authorization, content-type'
+            })
+            resp = await client.post('/play', json={'sound': 'airhorn.mp3'},
+                                     headers={'Origin': origin, 'Authorization': 'Bearer secret'})
+        finally:
+            await client.close()
+
+        assert preflight.status == 204
+        assert preflight.headers['Access-Control-Allow-Origin'] == origin
+        assert 'Authorization' in preflight.headers['Access-Control-Allow-Headers']
+        assert resp.status == 200
+        assert resp.headers['Access-Control-Allow-Origin'] == origin
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_object_bodies(self, soundboard):
+        client = await make_client(DirectTriggerServer(soundboard))
+        try:
+            resp = await client.post('/play', json=['airhorn.mp3'])
+            ws = await client.ws_connect('/ws')
+            await ws.send_json('airhorn.mp3')
+            reply = await ws.receive_json()
+            await ws.close()
+        finally:
+            await client.close()
+
+        assert resp.status == 400
+        assert reply == {'success': False, 'error': 'Expected a JSON object'}
+        soundboard.dispatch_play.assert_not_awaited()
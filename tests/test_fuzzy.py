@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.fuzzy import FuzzyIndex, edit_distance, normalize
+
+
+def make_index(*names):
+    index = FuzzyIndex()
+    for name in names:
+        index.add(name, name + '.mp3')
+    return index
+
+
+class TestFuzzyIndex:
+
+    def test_normalize_ignores_case_and_separators(self):
+        assert normalize('God_Did--Remix') == 'god did remix'
+
+    def test_normalize_keeps_non_ascii_letters(self):
+        assert normalize('Café_Ñandú') == 'café ñandú'
+        assert normalize('ドン！ドン') == 'ドン ドン'
+        assert make_index('ドンドン', 'café').closest('ドンドソ') == 'ドンドン.mp3'
+
+    def test_edit_distance_stops_past_limit(self):
+        assert edit_distance('airhorn', 'airhron', 2) == 2
+        assert edit_distance('airhorn', 'bruh', 2) == 3
+
+    def test_resolves_typos_to_closest_name(self):
+        index = make_index('airhorn', 'airplane', 'bruh', 'god-did')
+
+        assert index.closest('airhron') == 'airhorn.mp3'
+        assert index.closest('god did') == 'god-did.mp3'
+        assert index.closest('BRUH') == 'bruh.mp3'
+        assert index.closest('xylophone') is None
+
+    def test_matches_are_ranked_by_distance(self):
+        index = make_index('bonk', 'bonks', 'honk')
+        assert [f for f, _ in index.matches('bonk')][0] == 'bonk.mp3'
+        assert set(f for f, _ in index.matches('bonk')) == {'bonk.mp3', 'bonks.mp3', 'honk.mp3'}
+
+    def test_remove_drops_name(self):
+        index = make_index('airhorn')
+        index.remove('airhorn.mp3')
+        assert index.closest('airhorn') is None
+        assert len(index) == 0
+
+    def test_lookup_is_sub_millisecond_on_large_libraries(self):
+        index = FuzzyIndex()
+        for i in range(20000):
+            index.add(f'sound {i} effect', f'sound-{i}.mp3')
+        index.add('airhorn', 'airhorn.mp3')
+
+        started = time.perf_counter()
+        for _ in range(10):
+            assert index.closest('airhron') == 'airhorn.mp3'
+        assert (time.perf_counter() - started) / 10 < 0.001
+
+    def test_common_trigrams_do_not_scan_the_library(self):
+        index = FuzzyIndex()
+        for i in range(20000):
+            index.add(f'sound {i} effect', f'sound-{i}.mp3')
+        index.add('the sound', 'the-sound.mp3')
+
+        started = time.perf_counter()
+        for _ in range(10):
+            assert index.closest('sound 123 efect') == 'sound-123.mp3'
+            assert index.closest('the sound') == 'the-sound.mp3'
+        assert (time.perf_counter() - started) / 20 < 0.001
@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import sys
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.importer import import_pack, notify_backend, safe_name
+
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as pack:
+        for name, data in members.items():
+            pack.writestr(name, data)
+
+
+class TestSafeName:
+
+    def test_sanitizes_like_uploads(self):
+        assert safe_name('pack/My Sound!.mp3') == 'My_Sound_.mp3'
+        assert safe_name('../../etc/evil.WAV') == 'evil.WAV'
+
+    def test_skips_non_sounds_and_hidden_files(self):
+        assert safe_name('readme.txt') is None
+        assert safe_name('pack/.hidden.mp3') is None
+        assert safe_name('__MACOSX/pack/airhorn.mp3') is None
+
+
+class TestImportPack:
+
+    def test_imports_new_sounds_and_dedupes(self, tmp_path):
+        sounds = tmp_path / 'sounds'
+        sounds.mkdir()
+        (sounds / 'existing.mp3').write_bytes(b'already here')
+        (sounds / 'airhorn.mp3').write_bytes(b'a different horn')
+        pack = tmp_path / 'pack.zip'
+        write_zip(pack, {
+            'pack/airhorn.mp3': b'horn',
+            'pack/copy of horn.mp3': b'horn',
+            'pack/same.mp3': b'already here',
+            'pack/My Sound!.wav': b'sound',
+            'pack/notes.txt': b'hi',
+            'pack/empty.ogg': b'',
+        })
+
+        result = import_pack(str(pack), str(sounds), workers=2)
+
+        assert result['imported'] == ['airhorn-2.mp3', 'My_Sound_.wav']
+        assert dict(result['skipped']) == {
+            'pack/copy of horn.mp3': 'duplicate',
+            'pack/same.mp3': 'duplicate',
+            'pack/notes.txt': 'not a sound',
+            'pack/empty.ogg': 'empty',
+        }
+        assert (sounds / 'airhorn-2.mp3').read_bytes() == b'horn'
+        assert sorted(os.listdir(sounds)) == ['My_Sound_.wav', 'airhorn-2.mp3', 'airhorn.mp3', 'existing.mp3']
+
+    def test_enforces_size_limit_while_copying(self, tmp_path):
+        pack = tmp_path / 'pack.tar'
+        with tarfile.open(pack, 'w') as tar:
+            for name, data in (('big.mp3', b'x' * 200), ('small.mp3', b'x' * 10)):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+        result = import_pack(str(pack), str(tmp_path / 'sounds'), max_bytes=100)
+
+        assert result['imported'] == ['small.mp3']
+        assert result['skipped'] == [('big.mp3', 'too large')]
+
+    def test_directory_dry_run_changes_nothing(self, tmp_path):
+        pack = tmp_path / 'pack'
+        (pack / 'nested').mkdir(parents=True)
+        (pack / 'nested' / 'bruh.ogg').write_bytes(b'bruh')
+        sounds = tmp_path / 'sounds'
+
+        result = import_pack(str(pack), str(sounds), dry_run=True)
+
+        assert result['imported'] == ['bruh.ogg']
+        assert os.listdir(sounds) == []
+
+
+class TestNotifyBackend:
+
+    def test_sends_filenames_in_batches(self):
+        bodies = []
+
+        def urlopen(request, timeout):
+            sounds = json.loads(request.data)['sounds']
+            bodies.append(sounds)
+            return io.BytesIO(json.dumps({'success': True, 'count': len(sounds)}).encode())
+
+        filenames = [f'sound-{i}.mp3' for i in range(450)]
+        with patch('urllib.request.urlopen', urlopen):
+            assert notify_backend('http://backend', filenames) == 450
+
+        assert [len(body) for body in bodies] == [200, 200, 50]
+        assert sum(bodies, []) == filenames
+        assert max(len(json.dumps({'sounds': body})) for body in bodies) < 100 * 1024
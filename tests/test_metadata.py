@@ -0,0 +1,64 @@
+import os
+import struct
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.metadata import MetadataStore, summarize_pcm
+
+
+def pcm(samples):
+    return struct.pack(f'<{len(samples)}h', *samples)
+
+
+class TestSummarizePcm:
+
+    def test_full_scale_square_wave(self):
+        summary = summarize_pcm(pcm([32767, -32767] * 500), peak_count=10)
+
+        assert summary['loudness_db'] == 0.0
+        assert summary['peak_db'] == 0.0
+        assert len(summary['peaks']) == 10
+        assert all(p > 0.99 for p in summary['peaks'])
+
+    def test_peaks_follow_envelope(self):
+        summary = summarize_pcm(pcm([0] * 100 + [16384] * 100), peak_count=2)
+
+        assert summary['peaks'] == [0.0, 0.5]
+        assert summary['peak_db'] == -6.02
+
+    def test_silence_and_empty_input(self):
+        assert summarize_pcm(pcm([0] * 10))['loudness_db'] is None
+        assert summarize_pcm(b'') == {'loudness_db': None, 'peak_db': None, 'peaks': []}
+
+
+class TestMetadataStore:
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / 'meta' / 'metadata.json')
+        store = MetadataStore(path)
+        store.put('abc', {'duration': 1.5})
+        store.save()
+
+        reloaded = MetadataStore(path)
+        assert 'abc' in reloaded
+        assert reloaded.get('abc') == {'duration': 1.5}
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        path = tmp_path / 'metadata.json'
+        path.write_text('{not json')
+
+        assert MetadataStore(str(path)).get('abc') is None
+
+    def test_cues_survive_analysis_updates(self, tmp_path):
+        store = MetadataStore(str(tmp_path / 'metadata.json'))
+        store.set_cue('abc', 'intro', 0.0, 2.5)
+        assert not store.analyzed('abc')
+
+        store.update('abc', {'loudness_db': -14.0})
+        store.save()
+
+        reloaded = MetadataStore(str(tmp_path / 'metadata.json'))
+        assert reloaded.analyzed('abc')
+        assert reloaded.cue('abc', 'intro') == (0.0, 2.5)
+        assert reloaded.cue('abc', 'outro') is None
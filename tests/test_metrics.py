@@ -0,0 +1,94 @@
+import os
+import sys
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.metrics import MetricsRegistry, MetricsServer, http_trace_config
+
+
+class TestMetricsRegistry:
+
+    def test_counter_renders_labelled_samples(self):
+        registry = MetricsRegistry()
+        plays = registry.counter('plays_total', 'Plays', ('outcome',))
+        plays.inc(outcome='played')
+        plays.inc(outcome='played')
+        plays.inc(outcome='failed')
+
+        text = registry.render()
+        assert '# TYPE plays_total counter' in text
+        assert 'plays_total{outcome="played"} 2' in text
+        assert 'plays_total{outcome="failed"} 1' in text
+
+    def test_gauge_reads_callback_at_scrape_time(self):
+        registry = MetricsRegistry()
+        sessions = []
+        registry.gauge('sessions', 'Sessions', func=lambda: len(sessions))
+
+        assert 'sessions 0\n' in registry.render()
+        sessions.append(object())
+        assert 'sessions 1\n' in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.5):
+            latency.observe(value, stage='start')
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{stage="start",le="0.01"} 1' in text
+        assert 'latency_seconds_bucket{stage="start",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{stage="start",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{stage="start"} 3' in text
+
+    def test_escapes_label_values(self):
+        registry = MetricsRegistry()
+        registry.counter('plays_total', 'Plays', ('sound',)).inc(sound='say "hi"')
+        assert 'plays_total{sound="say \\"hi\\""} 1' in registry.render()
+
+
+class TestMetricsEndpoints:
+
+    @pytest.mark.asyncio
+    async def test_serves_text_format(self):
+        registry = MetricsRegistry()
+        registry.counter('plays_total', 'Plays').inc()
+        client = TestClient(TestServer(MetricsServer(registry).app))
+        await client.start_server()
+        try:
+            resp = await client.get('/metrics')
+            text = await resp.text()
+        finally:
+            await client.close()
+
+        assert resp.status == 200
+        assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert 'plays_total 1' in text
+
+    @pytest.mark.asyncio
+    async def test_http_trace_times_requests_by_path(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('backend_seconds', 'Backend', ('method', 'path'))
+        errors = registry.counter('backend_errors_total', 'Errors', ('method', 'path'))
+
+        async def ready(request):
+            return web.json_response({})
+
+        app = web.Application()
+        app.router.add_post('/api/bot/ready', ready)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession(trace_configs=[http_trace_config(latency, errors)]) as session:
+                async with session.post(server.make_url('/api/bot/ready'), json={}) as resp:
+                    await resp.read()
+        finally:
+            await server.close()
+
+        assert latency.count(method='POST', path='/api/bot/ready') == 1
+        assert errors.value(method='POST', path='/api/bot/ready') == 0
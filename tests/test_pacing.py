@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from discord.utils import MISSING
+
+from bot.audio import FRAME_SIZE, CachedSource
+from bot.pacing import OPUS_SILENCE, PacingEngine
+
+
+class FakeClient:
+    """Stands in for a VoiceClient, recording sent packets"""
+
+    def __init__(self):
+        self.sent = []
+        # discord.py's VoiceClient starts without an encoder as MISSING, not None
+        self.encoder = MISSING
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def send_audio_packet(self, data, *, encode=True):
+        self.sent.append((time.perf_counter(), data, encode))
+
+
+class OpusSource(CachedSource):
+    def is_opus(self):
+        return True
+
+
+class StalledSource(OpusSource):
+    def __init__(self, frames):
+        super().__init__(frames)
+        self.is_ready = False
+
+    def ready(self):
+        return self.is_ready
+
+
+def play_and_wait(engine, client, source):
+    done = threading.Event()
+    engine.play(client, source, after=lambda error: done.set())
+    assert done.wait(2)
+
+
+class TestPacingEngine:
+
+    def test_plays_many_clients_from_one_thread(self):
+        engine = PacingEngine(threads=1)
+        try:
+            clients = [FakeClient() for _ in range(20)]
+            finished = []
+            done = threading.Event()
+
+            def after(error):
+                finished.append(error)
+                if len(finished) == len(clients):
+                    done.set()
+
+            for client in clients:
+                engine.play(client, OpusSource([b'opus'] * 5), after=after)
+            assert done.wait(2)
+        finally:
+            engine.close()
+
+        for client in clients:
+            audio = [data for _, data, _ in client.sent if data != OPUS_SILENCE]
+            assert audio == [b'opus'] * 5
+            assert not engine.is_playing(client)
+
+    def test_frames_are_paced_at_20ms(self):
+        engine = PacingEngine(threads=1)
+        client = FakeClient()
+        try:
+            play_and_wait(engine, client, OpusSource([b'opus'] * 10))
+        finally:
+            engine.close()
+
+        times = [t for t, data, _ in client.sent if data != OPUS_SILENCE]
+        assert 0.15 <= times[-1] - times[0] <= 0.3
+
+    def test_pcm_sources_are_encoded_per_client(self):
+        engine = PacingEngine(threads=1, encoder_factory=object)
+        client = FakeClient()
+        try:
+            play_and_wait(engine, client, CachedSource([b'\x00' * FRAME_SIZE]))
+        finally:
+            engine.close()
+
+        assert client.encoder is not MISSING
+        assert client.sent[0][2] is True
+
+    def test_stalled_source_does_not_block_others(self):
+        engine = PacingEngine(threads=1)
+        stalled_client, client = FakeClient(), FakeClient()
+        stalled = StalledSource([b'late'])
+        try:
+            engine.play(stalled_client, stalled)
+            play_and_wait(engine, client, OpusSource([b'opus'] * 3))
+            assert stalled_client.sent == []
+            assert engine.loops[0].underruns > 0
+
+            stalled.is_ready = True
+            deadline = time.monotonic() + 2
+            while engine.is_playing(stalled_client) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            engine.close()
+
+        assert stalled_client.sent[0][1] == b'late'
+
+    def test_new_sound_replaces_current_one(self):
+        engine = PacingEngine(threads=1)
+        client = FakeClient()
+        interrupted = []
+        try:
+            engine.play(client, OpusSource([b'old'] * 100), after=interrupted.append)
+            play_and_wait(engine, client, OpusSource([b'new'] * 2))
+        finally:
+            engine.close()
+
+        assert interrupted == [None]
+        assert [data for _, data, _ in client.sent if data != OPUS_SILENCE][-2:] == [b'new', b'new']
+
+    def test_clients_spread_across_loops(self):
+        engine = PacingEngine(threads=2)
+        try:
+            for _ in range(4):
+                engine.play(FakeClient(), OpusSource([b'opus'] * 50))
+            assert [len(loop) for loop in engine.loops] == [2, 2]
+        finally:
+            engine.close()
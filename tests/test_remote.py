@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import os
+import sys
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.remote import RemoteSoundCache
+
+
+class FakeSounds:
+    """The backend's /sounds route: ETag validators, 304 when unchanged, 404 when missing"""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.app = web.Application()
+        self.app.router.add_get('/sounds/{filename}', self.get)
+
+    def put(self, filename, body):
+        self.files[filename] = body
+
+    async def get(self, request):
+        filename = request.match_info['filename']
+        self.requests.append((filename, request.headers.get('If-None-Match')))
+        body = self.files.get(filename)
+        if body is None:
+            raise web.HTTPNotFound()
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, headers={'ETag': etag})
+
+
+@contextlib.asynccontextmanager
+async def serving(tmp_path):
+    """A running FakeSounds, and a factory for caches of it in tmp_path"""
+    backend = FakeSounds()
+    server = TestServer(backend.app)
+    await server.start_server()
+    backend.url = str(server.make_url('/sounds'))
+    caches = []
+
+    def make_cache(**kwargs):
+        cache = RemoteSoundCache(backend.url, str(tmp_path), kwargs.pop('max_bytes', 1024 * 1024), **kwargs)
+        caches.append(cache)
+        return cache
+    try:
+        yield backend, make_cache
+    finally:
+        for cache in caches:
+            await cache.close()
+        await server.close()
+
+
+class TestRemoteSoundCache:
+
+    @pytest.mark.asyncio
+    async def test_downloads_once_then_plays_from_disk(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            cache = make_cache()
+
+            path = await cache.fetch('airhorn.mp3')
+            assert path == str(tmp_path / 'airhorn.mp3')
+            assert open(path, 'rb').read() == b'horn'
+            assert await cache.fetch('airhorn.mp3') == path
+
+            assert len(backend.requests) == 1
+            assert cache.results['downloaded'] == 1
+            assert cache.results['hit'] == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidates_with_etag_after_interval(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            cache = make_cache(revalidate_seconds=0)
+            await cache.fetch('airhorn.mp3')
+
+            await cache.fetch('airhorn.mp3')
+            assert backend.requests[-1][1] is not None
+            assert cache.results['revalidated'] == 1
+
+            backend.put('airhorn.mp3', b'louder horn')
+            path = await cache.fetch('airhorn.mp3')
+            assert open(path, 'rb').read() == b'louder horn'
+            assert cache.results['downloaded'] == 2
+
+    @pytest.mark.asyncio
+    async def test_validators_survive_restart(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            await make_cache().fetch('airhorn.mp3')
+
+            restarted = make_cache(revalidate_seconds=0)
+            await restarted.open()
+            assert 'airhorn.mp3' in restarted
+            await restarted.fetch('airhorn.mp3')
+            assert restarted.results['revalidated'] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fetches_share_one_request(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            cache = make_cache()
+
+            paths = await asyncio.gather(*(cache.fetch('airhorn.mp3') for _ in range(5)))
+
+            assert len(set(paths)) == 1
+            assert len(backend.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_plays_stale_copy_when_backend_is_down(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            cache = make_cache(revalidate_seconds=0)
+            path = await cache.fetch('airhorn.mp3')
+
+            cache.base_url = 'http://127.0.0.1:1/sounds'
+            assert await cache.fetch('airhorn.mp3') == path
+            assert cache.results['stale'] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_sound_is_dropped(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('airhorn.mp3', b'horn')
+            cache = make_cache(revalidate_seconds=0)
+            await cache.fetch('airhorn.mp3')
+
+            del backend.files['airhorn.mp3']
+            assert await cache.fetch('airhorn.mp3') is None
+            assert 'airhorn.mp3' not in cache
+            assert not (tmp_path / 'airhorn.mp3').exists()
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_played(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            for name in ('a.mp3', 'b.mp3', 'c.mp3'):
+                backend.put(name, b'x' * 40)
+            evicted = []
+            cache = make_cache(max_bytes=100, on_evict=evicted.append)
+
+            await cache.fetch('a.mp3')
+            await cache.fetch('b.mp3')
+            await cache.fetch('a.mp3')
+            await cache.fetch('c.mp3')
+
+            assert evicted == ['b.mp3']
+            assert not (tmp_path / 'b.mp3').exists()
+            assert cache.resident_bytes == 80
+
+    @pytest.mark.asyncio
+    async def test_prefetch_reports_downloads_once(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            backend.put('a.mp3', b'a')
+            backend.put('b.mp3', b'b')
+            batches = []
+
+            async def downloaded(filenames):
+                batches.append(sorted(filenames))
+            cache = make_cache(on_download=downloaded)
+
+            assert sorted(await cache.prefetch(['a.mp3', 'b.mp3', 'gone.mp3'])) == ['a.mp3', 'b.mp3']
+            # Prefetch revalidates even fresh copies; unchanged ones aren't reported
+            await cache.prefetch(['a.mp3'])
+            assert batches == [['a.mp3', 'b.mp3']]
+
+    @pytest.mark.asyncio
+    async def test_rejects_paths_outside_cache(self, tmp_path):
+        async with serving(tmp_path) as (backend, make_cache):
+            cache = make_cache()
+            assert await cache.fetch('../etc/passwd') is None
+            assert await cache.fetch('.remote-cache.json') is None
+            assert backend.requests == []
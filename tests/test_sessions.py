@@ -0,0 +1,143 @@
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.audio import SILENCE, CachedSource, MixerSource
+from bot.sessions import VoiceSession, SessionRegistry, backoff_delay
+
+
+def make_channel(channel_id, name='General'):
+    channel = MagicMock()
+    channel.id = channel_id
+    channel.name = name
+    return channel
+
+
+class TestVoiceSession:
+
+    def test_drop_and_attach_keep_counters(self):
+        session = VoiceSession(1, make_channel(10), MagicMock())
+        session.record_play()
+        session.drop()
+
+        assert session.status()['reconnecting'] is True
+        client = MagicMock()
+        assert session.attach(client) >= 0
+        assert session.client is client
+        assert session.plays == 1
+        assert session.reconnects == 1
+        assert 'reconnecting' not in session.status()
+
+    def test_backoff_delay_grows_with_jitter_and_cap(self):
+        for attempt in range(4):
+            assert 2 ** attempt / 2 <= backoff_delay(attempt) <= 2 ** attempt
+        assert 30 <= backoff_delay(20, cap=60) <= 60
+
+    def test_slots_reject_unknown_attributes(self):
+        session = VoiceSession(1, make_channel(10))
+        with pytest.raises(AttributeError):
+            session.extra = True
+
+    @pytest.mark.asyncio
+    async def test_mock_session_connection_state(self):
+        session = VoiceSession(1, make_channel(10))
+        assert session.mock
+        assert session.is_connected()
+        assert not session.is_playing()
+
+        await session.disconnect()
+        assert not session.is_connected()
+
+    def test_play_stops_current_sound_and_counts(self):
+        client = MagicMock()
+        client.is_playing.return_value = True
+        session = VoiceSession(1, make_channel(10), client)
+        source = CachedSource([SILENCE])
+
+        session.play(source)
+
+        client.stop.assert_called_once()
+        mixer = client.play.call_args[0][0]
+        assert isinstance(mixer, MixerSource) and mixer is session.mixer
+        assert mixer.sources() == [source]
+        assert session.plays == 1
+
+    def test_play_joins_running_mixer(self):
+        client = MagicMock()
+        client.is_playing.return_value = True
+        session = VoiceSession(1, make_channel(10), client)
+        first, second = CachedSource([SILENCE] * 5), CachedSource([SILENCE])
+
+        session.play(first)
+        session.play(second, key='b', gain=0.5)
+
+        client.play.assert_called_once()
+        assert session.mixer.sources() == [second]
+        assert session.plays == 2
+
+    def test_opus_sources_bypass_mixer(self):
+        client = MagicMock()
+        client.is_playing.return_value = False
+        session = VoiceSession(1, make_channel(10), client)
+        source = MagicMock()
+        source.is_opus.return_value = True
+
+        session.play(source)
+
+        client.play.assert_called_once_with(source)
+        assert session.mixer is None
+
+    def test_play_through_shared_engine(self):
+        client, engine = MagicMock(), MagicMock()
+        engine.is_playing.return_value = True
+        session = VoiceSession(1, make_channel(10), client, engine)
+
+        session.play(CachedSource([SILENCE]))
+
+        engine.play.assert_called_once_with(client, session.mixer)
+        client.play.assert_not_called()
+        assert session.is_playing()
+
+    @pytest.mark.asyncio
+    async def test_real_session_disconnects_client(self):
+        client = MagicMock()
+        client.disconnect = AsyncMock()
+        session = VoiceSession(1, make_channel(10), client)
+
+        await session.disconnect()
+
+        client.disconnect.assert_called_once()
+
+
+class TestSessionRegistry:
+
+    def test_indexes_by_guild_and_channel(self):
+        registry = SessionRegistry()
+        session = registry.add(VoiceSession(1, make_channel(10)))
+
+        assert registry.get(1) is session
+        assert registry.by_channel(10) is session
+        assert 1 in registry
+        assert registry.first() is session
+
+    def test_remove_clears_both_indexes(self):
+        registry = SessionRegistry()
+        registry.add(VoiceSession(1, make_channel(10)))
+
+        assert registry.remove(1) is not None
+        assert registry.by_channel(10) is None
+        assert registry.remove(1) is None
+
+    def test_move_reindexes_channel(self):
+        registry = SessionRegistry()
+        session = registry.add(VoiceSession(1, make_channel(10)))
+
+        registry.move(1, make_channel(20, 'Music'))
+
+        assert registry.by_channel(10) is None
+        assert registry.by_channel(20) is session
+        assert session.status() == {'channel_id': '20', 'channel_name': 'Music'}
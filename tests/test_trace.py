@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+import time
+import types
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bot.audio import FRAME_DURATION
+from bot.main import SoundboardBot
+from bot.replay import replay
+from bot.sessions import VoiceSession
+from bot.trace import TraceRecorder, load_trace
+
+
+@pytest.fixture
+def soundboard(tmp_path):
+    (tmp_path / 'airhorn.mp3').write_bytes(b'audio')
+    board = SoundboardBot()
+    board.mock_mode = True
+    board.sounds_dir = str(tmp_path)
+    return board
+
+
+class TestTraceRecording:
+
+    @pytest.mark.asyncio
+    async def test_trigger_records_outcomes(self, soundboard, tmp_path):
+        soundboard.trace = TraceRecorder(str(tmp_path / 'trace.jsonl'))
+        channel = types.SimpleNamespace(id=10, name='General')
+        soundboard.sessions.add(VoiceSession(1, channel))
+
+        await soundboard.trigger('airhorn.mp3', '1', 'hotkey')
+        await soundboard.trigger('missing.mp3', '1', 'hotkey')
+        await soundboard.trigger('airhorn.mp3', '2', 'web_dashboard')
+        soundboard.trace.close()
+
+        records = load_trace(str(tmp_path / 'trace.jsonl'))
+        assert [r['outcome'] for r in records] == ['played', 'not_found', 'no_session']
+        assert records[0]['src'] == 'hotkey'
+        assert records[0]['guild'] == '1'
+        assert 'resolve' in records[0]['stages']
+        assert 'segment' not in records[0] and 'guild_ids' not in records[0]
+
+    @pytest.mark.asyncio
+    async def test_records_segment_and_schedule(self, soundboard, tmp_path):
+        soundboard.trace = TraceRecorder(str(tmp_path / 'trace.jsonl'))
+        for guild_id in (1, 2):
+            soundboard.sessions.add(VoiceSession(guild_id, types.SimpleNamespace(id=10 + guild_id, name='General')))
+        start_at = time.time() * 1000
+
+        await soundboard.trigger('airhorn.mp3', '1', 'hotkey', (0.5, 1.0))
+        assert await soundboard.schedule_play('airhorn.mp3', ['1', '2'], start_at, 'api', (0.5, None)) == 2
+        await asyncio.sleep(2 * FRAME_DURATION)
+        soundboard.trace.close()
+
+        played, *scheduled = load_trace(str(tmp_path / 'trace.jsonl'))
+        assert played['segment'] == [0.5, 1.0]
+        assert [r['guild'] for r in scheduled] == ['1', '2']
+        for record in scheduled:
+            assert record['guild_ids'] == ['1', '2']
+            assert record['start_at'] == start_at
+            assert record['segment'] == [0.5, None]
+
+
+    def test_records_are_written_by_the_writer_thread(self, tmp_path):
+        trace = TraceRecorder(str(tmp_path / 'trace.jsonl'), flush_interval=0.1)
+        stages = {'resolve': 1.0}
+        for _ in range(3):
+            trace.record('hotkey', 1, 'airhorn.mp3', 'played', stages, time.perf_counter())
+        stages['start'] = 2.0
+        trace.flush()
+
+        records = load_trace(str(tmp_path / 'trace.jsonl'))
+        assert len(records) == 3
+        assert records[0]['stages'] == {'resolve': 1.0}
+        trace.close()
+
+
+class TestReplay:
+
+    @pytest.mark.asyncio
+    async def test_replay_reproduces_outcomes(self, soundboard):
+        records = [
+            {'t': 0.0, 'src': 'hotkey', 'guild': '1', 'sound': 'airhorn.mp3', 'ok': True, 'outcome': 'played', 'total': 1.0},
+            {'t': 0.01, 'src': 'hotkey', 'guild': '1', 'sound': 'missing.mp3', 'ok': False, 'outcome': 'not_found', 'total': 0.5},
+            {'t': 0.02, 'src': 'command', 'guild': '2', 'sound': 'airhorn.mp3', 'ok': False, 'outcome': 'no_session', 'total': 0.1},
+        ]
+
+        report = await replay(soundboard, records, speed=10)
+
+        assert report['count'] == 3
+        assert report['outcomes'] == {'played': 1, 'dropped': 2}
+        assert report['outcome_mismatches'] == 0
+        assert set(report['latency_ms']) == {'mean', 'p50', 'p95', 'p99', 'max'}
+
+    @pytest.mark.asyncio
+    async def test_replay_reissues_segments_and_scheduled_plays(self, soundboard):
+        scheduled = {'src': 'api', 'sound': 'airhorn.mp3', 'ok': True, 'outcome': 'played', 'segment': [0.5, None],
+                     'start_at': 1000.0, 'guild_ids': ['1', '2'], 'total': 0.2}
+        records = [
+            {'t': 0.0, 'src': 'hotkey', 'guild': '1', 'sound': 'airhorn.mp3', 'ok': True, 'outcome': 'played',
+             'segment': [0.5, 1.0], 'total': 1.0},
+            dict(scheduled, t=0.01, guild='1'),
+            dict(scheduled, t=0.01, guild='2'),
+        ]
+
+        with patch.object(soundboard, 'trigger', wraps=soundboard.trigger) as trigger, \
+             patch.object(soundboard, 'schedule_play', wraps=soundboard.schedule_play) as schedule_play:
+            report = await replay(soundboard, records, speed=10)
+
+        trigger.assert_awaited_once_with('airhorn.mp3', '1', 'hotkey', (0.5, 1.0))
+        assert schedule_play.await_count == 1
+        sound, guild_ids, start_at, source, segment = schedule_play.await_args.args
+        assert (sound, guild_ids, source, segment) == ('airhorn.mp3', ['1', '2'], 'api', (0.5, None))
+        assert report['count'] == 2
+        assert report['outcomes'] == {'played': 2}
+        assert report['outcome_mismatches'] == 0
+        assert {s.guild_id: s.plays for s in soundboard.sessions} == {1: 2, 2: 1}